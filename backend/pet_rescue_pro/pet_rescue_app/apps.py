@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PetRescueAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pet_rescue_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (connects receivers)
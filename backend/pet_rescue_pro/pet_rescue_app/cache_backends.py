@@ -0,0 +1,157 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+class TwoTierCache(BaseCache):
+    """
+    Small in-process LRU in front of a shared cache (file, database or Redis).
+
+    Every worker process and node sees the same shared tier, so values such
+    as OTPs written by one worker are visible to all of them. Reads that hit
+    the local tier skip the shared backend entirely; local copies live at
+    most LOCAL_TIMEOUT seconds, which bounds how stale another worker's
+    write can look. Writes go through to the shared tier and replace the
+    local copy; atomic operations (add/incr/decr) run on the shared tier only.
+
+    Keys starting with one of LOCAL_EXCLUDE_PREFIXES (one-time codes) are never
+    kept locally. ``stats()`` reports local hits, shared hits and misses for
+    this process.
+
+    OPTIONS: SHARED_ALIAS (default "shared"), LOCAL_MAX_ENTRIES (default 1000),
+    LOCAL_TIMEOUT (seconds, default 5), LOCAL_EXCLUDE_PREFIXES.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.shared_alias = options.get("SHARED_ALIAS", "shared")
+        self.local_max_entries = int(options.get("LOCAL_MAX_ENTRIES", 1000))
+        self.local_timeout = float(options.get("LOCAL_TIMEOUT", 5))
+        self.local_exclude = tuple(options.get("LOCAL_EXCLUDE_PREFIXES", ()))
+        self._local = OrderedDict()  # shared key -> (expires_at, pickled value)
+        self._lock = threading.Lock()
+        self._stats = {"local_hits": 0, "shared_hits": 0, "misses": 0}
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    # -------------------------
+    # Local tier
+    # -------------------------
+    def _local_key(self, key, version):
+        return None if key.startswith(self.local_exclude) else self.shared.make_key(key, version)
+
+    def _local_get(self, local_key):
+        with self._lock:
+            item = self._local.get(local_key)
+            if item is None:
+                return None
+            if item[0] <= time.monotonic():
+                del self._local[local_key]
+                return None
+            self._local.move_to_end(local_key)
+        return item
+
+    def _local_set(self, local_key, value, timeout):
+        if local_key is None:
+            return
+        ttl = self.local_timeout if timeout is None else min(timeout, self.local_timeout)
+        if ttl <= 0:
+            self._local_delete(local_key)
+            return
+        # Pickled like LocMemCache, so callers mutating a result cannot change the cache
+        item = (time.monotonic() + ttl, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            self._local[local_key] = item
+            self._local.move_to_end(local_key)
+            while len(self._local) > self.local_max_entries:
+                self._local.popitem(last=False)
+
+    def _local_delete(self, local_key):
+        if local_key is None:
+            return
+        with self._lock:
+            self._local.pop(local_key, None)
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, local_entries=len(self._local))
+        lookups = stats["local_hits"] + stats["shared_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["local_hits"] + stats["shared_hits"]) / lookups, 4) if lookups else None
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = dict.fromkeys(self._stats, 0)
+
+    def _timeout_seconds(self, timeout):
+        """Seconds until a value set with ``timeout`` expires (None = never)."""
+        return self.shared.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    # -------------------------
+    # Cache API
+    # -------------------------
+    def get(self, key, default=None, version=None):
+        local_key = self._local_key(key, version)
+        if local_key is not None:
+            item = self._local_get(local_key)
+            if item is not None:
+                self._count("local_hits")
+                return pickle.loads(item[1])
+
+        sentinel = object()
+        value = self.shared.get(key, sentinel, version=version)
+        if value is sentinel:
+            self._count("misses")
+            return default
+        self._count("shared_hits")
+        self._local_set(local_key, value, None)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self._local_set(self._local_key(key, version), value, self._timeout_seconds(timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self._local_set(self._local_key(key, version), value, self._timeout_seconds(timeout))
+        else:
+            self._local_delete(self._local_key(key, version))
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self._local_delete(self._local_key(key, version))
+        return self.shared.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        return self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._local_delete(self._local_key(key, version))
+        return self.shared.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        self._local_delete(self._local_key(key, version))
+        return self.shared.decr(key, delta, version=version)
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
@@ -0,0 +1,224 @@
+import hashlib
+import re
+import unicodedata
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.utils.module_loading import import_string
+
+from .model_client import ModelClient
+from .models import Pet, PetReport, PetType, PincodeCentroid
+
+# Settings are read per call (not at import) so tests can swap in a fake model:
+# CHATBOT_MODEL_CLASS is a dotted path to anything that takes the model name and
+# returns an object with GenerativeModel's interface.
+DEFAULT_MODEL_CLASS = "pet_rescue_app.chatbot.gemini_model"
+
+PROMPT = """
+            You are Pet Rescue Assistant for the project pet_rescue_pro.
+
+            The user is currently in the '{section}' section of the dashboard.
+
+            Rules for context:
+            - If in 'pet-owner', focus on pet ownership and lost pet reports.
+            - If in 'pet-rescuer', focus on rescue activities and medical history.
+            - If in 'pet-adopter', focus on adoption and available pets.
+            - If section is empty or unclear, give a friendly response and guide back to project features.
+            - If asked for code or technical solutions unrelated to pets, politely decline and say:
+                "I can only provide coding help related to Pet Rescue Pro (like adoption forms, pet reports, etc.)."
+            General behavior:
+            - Be friendly and conversational. Respond to greetings (hi, hello, hey) warmly.
+            - If the user asks about general things (weather, math, chit-chat), you may answer briefly,
+              but always guide the conversation back to pet rescue, adoption, or project features.
+            - Keep your answers concise and helpful, like a real assistant inside the project.
+            """
+
+ANSWER_KEY = "chatbot:answer:{digest}"
+METRIC_KEY = "chatbot:metrics:{name}"
+METRICS = ("fast_path_answers", "cache_hits", "cache_misses")
+
+# Count questions: "how many lost dogs in Pune", "how many found cats near 411001"
+COUNT_QUESTION = re.compile(r"\bhow many (?P<rest>.*)$")
+PLACE = re.compile(r"\b(?:in|near|at|around|from) (?P<place>[a-z0-9 ]+)$")
+# Words that end a count question without naming a place ("... in total", "... right now")
+PLACE_FILLER = {"total", "all", "the", "now", "right", "today", "currently", "city", "area", "app", "website"}
+# Words allowed between the pet and the place ("... are there currently reported on pet rescue in Pune")
+COUNT_FILLER = PLACE_FILLER | {"are", "is", "were", "there", "have", "been", "reported", "listed", "so", "far", "on", "pet", "rescue"}
+ANY_PET = {"pet", "pets", "animal", "animals"}
+
+_models = {}
+_clients = {}
+
+
+def build_prompt(message, section=""):
+    return f"{PROMPT.format(section=section)}\n\nUser: {message}\nAssistant:"
+
+
+def gemini_model(model_name):
+    """
+    A Gemini model. The client library is heavy to import, so it is loaded
+    and configured here, on the first chatbot call, rather than at startup.
+    """
+    import google.generativeai as genai
+
+    genai.configure(api_key=settings.GEMINI_API_KEY)
+    return genai.GenerativeModel(model_name)
+
+
+def get_model():
+    """One model object per process, reused by every request (sync or async)."""
+    key = (getattr(settings, "CHATBOT_MODEL_CLASS", DEFAULT_MODEL_CLASS), getattr(settings, "CHATBOT_MODEL", "gemini-2.5-flash"))
+    if key not in _models:
+        model_class, model_name = key
+        _models[key] = import_string(model_class)(model_name)
+    return _models[key]
+
+
+def client():
+    """
+    The guarded client (concurrency cap, deadline, circuit breaker, latency
+    histograms; see model_client.py) every chatbot view calls the model through.
+    """
+    key = tuple(
+        getattr(settings, name, default)
+        for name, default in [
+            ("CHATBOT_MODEL_CLASS", DEFAULT_MODEL_CLASS), ("CHATBOT_MODEL", "gemini-2.5-flash"),
+            ("CHATBOT_TIMEOUT", 30), ("CHATBOT_MAX_CONCURRENCY", 8),
+            ("CHATBOT_BREAKER_FAILURES", 5), ("CHATBOT_BREAKER_RESET", 30),
+        ]
+    )
+    if key not in _clients:
+        _, _, timeout, max_concurrency, failure_threshold, reset_timeout = key
+        _clients[key] = ModelClient(get_model(), timeout, max_concurrency, failure_threshold, reset_timeout)
+    return _clients[key]
+
+
+# -------------------------
+# Answers without the model
+# -------------------------
+def normalize(message):
+    """Case, accents, punctuation and spacing folded away: "How do I report a lost pet?!" -> "how do i report a lost pet"."""
+    text = unicodedata.normalize("NFKC", message).casefold()
+    return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+
+def _answer_key(section, normalized):
+    raw = f"{section}\0{normalized}"
+    return ANSWER_KEY.format(digest=hashlib.sha1(raw.encode()).hexdigest())
+
+
+def _count(name):
+    key = METRIC_KEY.format(name=name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def metrics():
+    """Counters across all workers, plus the share of questions answered without the model."""
+    found = cache.get_many([METRIC_KEY.format(name=name) for name in METRICS])
+    counts = {name: found.get(METRIC_KEY.format(name=name), 0) for name in METRICS}
+    lookups = counts["cache_hits"] + counts["cache_misses"]
+    questions = lookups + counts["fast_path_answers"]
+    counts["cache_hit_rate"] = round(counts["cache_hits"] / lookups, 4) if lookups else None
+    # Cache misses are exactly the questions that went to the model
+    counts["answered_without_model_rate"] = round(1 - counts["cache_misses"] / questions, 4) if questions else None
+    return counts
+
+
+def open_reports(pet_status, pet_type=None, city="", pincode=None):
+    """Accepted, unresolved reports of one status (an index lookup on the report status indexes)."""
+    reports = PetReport.objects.filter(report_status="Accepted", is_resolved=False, pet_status=pet_status)
+    if pet_type:
+        reports = reports.filter(pet__pet_type__type=pet_type)
+    if pincode is not None:
+        reports = reports.filter(pet__pincode=pincode)
+    elif city:
+        reports = reports.filter(pet__city__iexact=city)
+    return reports
+
+
+def _pet_type(word, types):
+    candidates = [word, word[:-1] if word.endswith("s") else None, word[:-2] if word.endswith("es") else None]
+    return next((types[c] for c in candidates if c in types), None)
+
+
+def known_place(place):
+    """Whether ``place`` is a pincode or city some pet or the pincode table knows about."""
+    if place.isdigit():
+        pincode = int(place)
+        return PincodeCentroid.objects.filter(pincode=pincode).exists() or Pet.objects.filter(pincode=pincode).exists()
+    return Pet.objects.filter(city__iexact=place).exists() or PincodeCentroid.objects.filter(district__iexact=place).exists()
+
+
+def count_answer(normalized):
+    """
+    Answer "how many [pet type] <lost|found> [pet type] in <city|pincode>" from
+    the accepted, unresolved reports, or None when the question is not one of
+    those ("how many days after my dog got lost ...", "... in the last week").
+    """
+    match = COUNT_QUESTION.search(normalized)
+    if not match:
+        return None
+    words = match.group("rest").split()
+    types = {pet_type.casefold(): pet_type for pet_type in PetType.objects.values_list("type", flat=True)}
+
+    # The status comes right after "how many", or after a pet type: "how many dogs lost"
+    pet_type = _pet_type(words[0], types) if words else None
+    if pet_type:
+        words = words[1:]
+    if not words or words[0] not in ("lost", "found"):
+        return None
+    status, words = words[0], words[1:]
+    if words and pet_type is None and (_pet_type(words[0], types) or words[0] in ANY_PET):
+        pet_type, words = _pet_type(words[0], types), words[1:]
+
+    rest = " ".join(words)
+    place = ""
+    match = PLACE.search(rest)
+    if match:
+        place = " ".join(word for word in match.group("place").split() if word not in PLACE_FILLER)
+        rest = rest[:match.start()]
+    if any(word not in COUNT_FILLER for word in rest.split()):
+        return None
+    if place and not known_place(place):
+        return None
+
+    if place.isdigit():
+        reports = open_reports(status.title(), pet_type, pincode=int(place))
+        where = f" near pincode {place}"
+    else:
+        reports = open_reports(status.title(), pet_type, city=place)
+        where = f" in {place.title()}" if place else ""
+    total = reports.count()
+
+    noun = pet_type.lower() if pet_type else "pet"
+    return (
+        f"There {'is' if total == 1 else 'are'} currently {total} {status} {noun}{'' if total == 1 else 's'} "
+        f"reported{where} on Pet Rescue."
+    )
+
+
+def quick_answer(message, section=""):
+    """
+    The reply when it does not need the model: live counts for data
+    questions, else a cached answer to the same (section, question).
+    Returns None when the model has to answer (then call remember_answer).
+    """
+    normalized = normalize(message)
+    answer = count_answer(normalized)
+    if answer is not None:
+        _count("fast_path_answers")
+        return answer
+    # LRU in each process over a TTL'd shared entry (see the "chatbot" alias in CACHES)
+    answer = caches["chatbot"].get(_answer_key(section, normalized))
+    _count("cache_hits" if answer is not None else "cache_misses")
+    return answer
+
+
+def remember_answer(message, section, answer):
+    caches["chatbot"].set(
+        _answer_key(section, normalize(message)), answer, getattr(settings, "CHATBOT_ANSWER_CACHE_TIMEOUT", 86400),
+    )
@@ -0,0 +1,103 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+# Deletions leave no timestamp behind, so the time of the last one is kept per model
+DELETED_AT_KEY = "conditional:deleted_at:{model}"
+
+# Timestamps behind each serializer's output, nested objects included
+PET_TIMESTAMPS = ("modified_date", "created_by__updated_at", "modified_by__updated_at")
+# Photo processing updates image/image_status without touching modified_date
+REPORT_TIMESTAMPS = ("modified_date", "image_job__updated_at")
+
+
+def nested(prefix, fields):
+    return tuple(f"{prefix}__{field}" for field in fields)
+
+
+def _deleted_at_key(model):
+    return DELETED_AT_KEY.format(model=model._meta.label_lower)
+
+
+def record_deletion(model):
+    """Called (on commit) when rows of ``model`` are deleted."""
+    cache.set(_deleted_at_key(model), time.time(), None)
+
+
+def _deletion_times(models):
+    keys = {_deleted_at_key(model) for model in models}
+    found = cache.get_many(keys)
+    for key in keys - found.keys():
+        # Unknown (cache restarted): assume "just now", which costs one full response
+        cache.add(key, time.time(), None)
+        found[key] = cache.get(key, time.time())
+    return found.values()
+
+
+class ListingValidators:
+    """
+    ETag / Last-Modified for a list endpoint, from one aggregate query
+    (row count + latest timestamps) per source queryset.
+
+    ``sources`` is a list of ``(queryset, timestamp_fields)``, optionally with
+    a dict of extra count aggregates for state that has no timestamp. The
+    timestamp fields should cover everything the serializer renders,
+    including nested objects. The ETag covers the request URL and user too, so it changes
+    whenever the rendered list could. Deletions show up in the row count
+    (ETag) and in a per-model deletion time (Last-Modified). Pass
+    ``last_modified=False`` when rendered state that has no timestamp (such as
+    read flags) can change: a Last-Modified check would miss it, so only the
+    ETag is offered.
+
+    Views check ``not_modified()`` before serializing anything and pass the
+    full response through ``apply()``.
+    """
+
+    def __init__(self, request, sources, extra=(), per_user=True, last_modified=True):
+        self.request = request
+        # Public endpoints render the same body for everyone: leave the user out
+        user_id = getattr(request.user, "pk", None) if per_user else None
+        parts = [request.get_full_path(), user_id, *extra]
+        timestamps = []
+        for queryset, fields, *counts in sources:
+            aggregates = {f"last_{i}": Max(field) for i, field in enumerate(fields)}
+            aggregates.update(counts[0] if counts else {})
+            result = queryset.order_by().aggregate(rows=Count("pk", distinct=True), **aggregates)
+            parts.append(sorted((key, value) for key, value in result.items() if not key.startswith("last_")))
+            for i in range(len(fields)):
+                value = result[f"last_{i}"]
+                parts.append(value.isoformat() if value else None)
+                if value:
+                    timestamps.append(value.timestamp())
+
+        self.last_modified = None
+        if last_modified:
+            # Not part of the ETag: deletion times are only as shared as the cache is
+            timestamps.extend(_deletion_times({source[0].model for source in sources}))
+            self.last_modified = int(max(timestamps)) if timestamps else None
+        self.etag = 'W/"%s"' % hashlib.sha1(repr(parts).encode()).hexdigest()
+
+    @classmethod
+    def from_values(cls, request, etag, last_modified):
+        """Validators computed earlier, e.g. stored along with a cached response."""
+        validators = cls.__new__(cls)
+        validators.request, validators.etag, validators.last_modified = request, etag, last_modified
+        return validators
+
+    def not_modified(self):
+        """A 304 response if the client's copy is current, else None."""
+        response = get_conditional_response(self.request, etag=self.etag, last_modified=self.last_modified)
+        return self.apply(response) if response is not None else None
+
+    def apply(self, response):
+        response["ETag"] = self.etag
+        if self.last_modified is not None:
+            response["Last-Modified"] = http_date(self.last_modified)
+        # Cacheable, but always revalidated (cheap now that it can be a 304)
+        patch_cache_control(response, no_cache=True, private=self.request.user.is_authenticated)
+        patch_vary_headers(response, ["Authorization"])
+        return response
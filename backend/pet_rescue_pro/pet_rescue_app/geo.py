@@ -0,0 +1,91 @@
+import math
+
+from django.conf import settings
+
+from .models import PincodeCentroid
+
+EARTH_RADIUS_KM = 6371.0088
+DEFAULT_RADIUS_KM = getattr(settings, "PROXIMITY_DEFAULT_RADIUS_KM", 10)
+MAX_RADIUS_KM = getattr(settings, "PROXIMITY_MAX_RADIUS_KM", 100)
+
+
+class ProximityError(ValueError):
+    """Bad ``near`` / ``radius_km`` input; the message is safe to show to the client."""
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def bounding_box(lat, lon, radius_km):
+    """``(min_lat, max_lat, min_lon, max_lon)`` enclosing the circle; always a superset of it."""
+    d_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    # Longitude degrees shrink towards the poles; widen the box by the worst-case latitude
+    widest_lat = min(abs(lat) + d_lat, 89.9)
+    d_lon = math.degrees(radius_km / (EARTH_RADIUS_KM * math.cos(math.radians(widest_lat))))
+    return lat - d_lat, lat + d_lat, lon - d_lon, lon + d_lon
+
+
+def pincodes_within(pincode, radius_km):
+    """
+    Map of ``{pincode: distance_km}`` for every known pincode whose centroid
+    lies within ``radius_km`` of ``pincode``'s centroid.
+
+    One indexed range query on the centroid table (bounding box), then the
+    exact haversine check on the few candidates it returns.
+    """
+    origin = PincodeCentroid.objects.filter(pincode=pincode).values_list("latitude", "longitude").first()
+    if origin is None:
+        raise ProximityError(f"Unknown pincode {pincode}")
+    lat, lon = origin
+
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+    candidates = PincodeCentroid.objects.filter(
+        latitude__range=(min_lat, max_lat),
+        longitude__range=(min_lon, max_lon),
+    ).values_list("pincode", "latitude", "longitude")
+
+    nearby = {}
+    for code, c_lat, c_lon in candidates.iterator():
+        distance = haversine_km(lat, lon, c_lat, c_lon)
+        if distance <= radius_km:
+            nearby[code] = round(distance, 2)
+    return nearby
+
+
+def proximity_from_request(request):
+    """
+    Parse ``?near=<pincode>&radius_km=<km>`` into a ``{pincode: distance_km}`` map.
+
+    Returns None when no proximity filter was asked for. ``radius_km`` alone
+    searches around the logged-in user's own profile pincode.
+    """
+    params = request.query_params
+    near = params.get("near")
+    radius = params.get("radius_km")
+    if near is None and radius is None:
+        return None
+
+    if near is None:
+        near = getattr(request.user, "pincode", None)
+        if near is None:
+            raise ProximityError("near pincode is required (no pincode on your profile)")
+
+    try:
+        pincode = int(near)
+    except (TypeError, ValueError):
+        raise ProximityError("near must be a numeric pincode")
+
+    try:
+        radius_km = float(radius) if radius is not None else DEFAULT_RADIUS_KM
+    except ValueError:
+        raise ProximityError("radius_km must be a number")
+    if not 0 < radius_km <= MAX_RADIUS_KM:
+        raise ProximityError(f"radius_km must be between 0 and {MAX_RADIUS_KM}")
+
+    return pincodes_within(pincode, radius_km)
@@ -0,0 +1,173 @@
+from functools import reduce
+from itertools import combinations
+from operator import or_
+
+from django.conf import settings
+from django.db.models import Q
+from PIL import Image, ImageOps
+
+from .models import PetReport, ReportImageHash
+
+HASH_BITS = 64
+# dHash is split into CHUNK_COUNT indexed columns of CHUNK_BITS each (multi-index hashing)
+CHUNK_COUNT = 4
+CHUNK_BITS = HASH_BITS // CHUNK_COUNT
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+DEFAULT_RADIUS = getattr(settings, "IMAGE_SIMILARITY_RADIUS", 10)
+# radius 15 probes 3-bit neighbourhoods of each chunk: 697 values per column
+MAX_RADIUS = 15
+
+
+# -------------------------
+# Perceptual hashes
+# -------------------------
+def _grayscale(image, width, height):
+    image = ImageOps.exif_transpose(image)
+    return image.convert("L").resize((width, height), Image.Resampling.LANCZOS)
+
+
+def average_hash(image):
+    """aHash: 8x8 grayscale thumbnail, one bit per pixel brighter than the mean."""
+    pixels = list(_grayscale(image, 8, 8).getdata())
+    mean = sum(pixels) / len(pixels)
+    return _bits_to_int(pixel > mean for pixel in pixels)
+
+
+def difference_hash(image):
+    """dHash: 9x8 grayscale thumbnail, one bit per pixel brighter than its right neighbour."""
+    small = _grayscale(image, 9, 8)
+    pixels = list(small.getdata())
+    return _bits_to_int(
+        pixels[row * 9 + col] > pixels[row * 9 + col + 1]
+        for row in range(8)
+        for col in range(8)
+    )
+
+
+def _bits_to_int(bits):
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def hash_image_file(file_obj):
+    """``(ahash, dhash)`` as unsigned 64-bit ints for an open image file."""
+    file_obj.seek(0)
+    with Image.open(file_obj) as image:
+        image.load()
+        return average_hash(image), difference_hash(image)
+
+
+def hamming(a, b):
+    return ((a ^ b) & ((1 << HASH_BITS) - 1)).bit_count()
+
+
+# Hashes are unsigned; BigIntegerField is signed 64-bit
+def to_signed(value):
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def to_unsigned(value):
+    return value + (1 << HASH_BITS) if value < 0 else value
+
+
+def chunks(value):
+    """Split a 64-bit hash into CHUNK_COUNT values, most significant first."""
+    return [(value >> (CHUNK_BITS * (CHUNK_COUNT - 1 - i))) & CHUNK_MASK for i in range(CHUNK_COUNT)]
+
+
+def _neighbours(chunk, radius):
+    """Every CHUNK_BITS-bit value within ``radius`` bit flips of ``chunk``."""
+    values = []
+    for flips in range(radius + 1):
+        for positions in combinations(range(CHUNK_BITS), flips):
+            mask = 0
+            for position in positions:
+                mask |= 1 << position
+            values.append(chunk ^ mask)
+    return values
+
+
+# -------------------------
+# Index maintenance
+# -------------------------
+def report_image_file(report):
+    """The image to hash for a report: its own photo, else the pet's."""
+    if report.image:
+        return report.image
+    if report.pet_id and report.pet.image:
+        return report.pet.image
+    return None
+
+
+def index_report_image(report_id):
+    """
+    (Re)hash a report's image into ReportImageHash. Skips work when the stored
+    hash is already for the same file; drops the row when the image is gone.
+    """
+    report = PetReport.objects.select_related("pet").filter(pk=report_id).first()
+    if report is None:
+        return None
+    image = report_image_file(report)
+    if image is None:
+        ReportImageHash.objects.filter(report_id=report_id).delete()
+        return None
+
+    existing = ReportImageHash.objects.filter(report_id=report_id).first()
+    if existing is not None and existing.image_name == image.name:
+        return existing
+
+    try:
+        with image.open("rb") as file_obj:
+            ahash, dhash = hash_image_file(file_obj)
+    except (OSError, ValueError):
+        return None  # missing or unreadable file: nothing to index
+
+    parts = chunks(dhash)
+    row, _ = ReportImageHash.objects.update_or_create(
+        report_id=report_id,
+        defaults={
+            "image_name": image.name,
+            "ahash": to_signed(ahash),
+            "dhash": to_signed(dhash),
+            "dhash_0": parts[0],
+            "dhash_1": parts[1],
+            "dhash_2": parts[2],
+            "dhash_3": parts[3],
+        },
+    )
+    return row
+
+
+# -------------------------
+# Hamming-radius search
+# -------------------------
+def similar_hashes(dhash, radius=DEFAULT_RADIUS):
+    """
+    ReportImageHash rows whose dHash is within ``radius`` bits of ``dhash``,
+    as ``[(row, distance), ...]`` nearest first.
+
+    Multi-index hashing: if two 64-bit hashes differ in at most ``radius``
+    bits, at least one of their four 16-bit chunks differs in at most
+    ``radius // 4`` bits (pigeonhole). So candidates come from indexed
+    ``dhash_i IN (neighbours of chunk i)`` lookups; only those are compared
+    in full.
+    """
+    radius = max(0, min(int(radius), MAX_RADIUS))
+    chunk_radius = radius // CHUNK_COUNT
+    dhash = to_unsigned(dhash)
+
+    lookup = reduce(or_, (
+        Q(**{f"dhash_{i}__in": _neighbours(chunk, chunk_radius)})
+        for i, chunk in enumerate(chunks(dhash))
+    ))
+
+    results = []
+    for row in ReportImageHash.objects.filter(lookup):
+        distance = hamming(dhash, to_unsigned(row.dhash))
+        if distance <= radius:
+            results.append((row, distance))
+    results.sort(key=lambda pair: (pair[1], -pair[0].report_id))
+    return results
@@ -0,0 +1,196 @@
+import io
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .models import Pet, PetReport, ImageJob
+from . import image_hashing, image_variants, response_cache, storage
+
+JOB_MAX_ATTEMPTS = getattr(settings, "IMAGE_JOB_MAX_ATTEMPTS", 5)
+# A job still "Running" after this long belongs to a dead worker and is re-queued
+JOB_TIMEOUT = timedelta(seconds=getattr(settings, "IMAGE_JOB_TIMEOUT", 600))
+RETRY_BASE_SECONDS = 30
+# Variants rendered ahead of time so the first listing page view is a cache hit
+PREGENERATE_SIZES = [image_variants.parse_size(size) for size in getattr(settings, "IMAGE_PREGENERATE_SIZES", ["200x200", "400x400"])]
+
+# Metadata that must not leave the server (GPS position, camera serials, editing history...)
+METADATA_KEYS = ("exif", "xmp", "XML:com.adobe.xmp", "comment", "photoshop", "iptc")
+SAVE_OPTIONS = {
+    "JPEG": {"quality": 90, "optimize": True},
+    "PNG": {"optimize": True},
+    "WEBP": {"quality": 90},
+}
+
+
+# -------------------------
+# Queue
+# -------------------------
+def enqueue(report):
+    """
+    Queue (or re-queue) processing of a report's photo. Call inside the
+    transaction that saved the report, so the job commits with it.
+    """
+    ImageJob.objects.update_or_create(
+        report=report,
+        defaults={"status": "Queued", "attempts": 0, "last_error": "", "available_at": timezone.now(), "claimed_at": None},
+    )
+    set_image_status(report, "Pending" if report.image else "None")
+
+
+def set_image_status(report, image_status):
+    if report.image_status != image_status:
+        report.image_status = image_status
+        PetReport.objects.filter(pk=report.pk).update(image_status=image_status)
+
+
+def claim_jobs(limit):
+    """Mark up to ``limit`` runnable jobs as Running for this worker and return their ids."""
+    now = timezone.now()
+    stale = ImageJob.objects.filter(status="Running", claimed_at__lt=now - JOB_TIMEOUT)
+    # A photo that keeps hanging or killing its worker gives up like one that keeps raising
+    with transaction.atomic():
+        dead = stale.filter(attempts__gte=JOB_MAX_ATTEMPTS)
+        report_ids = list(dead.values_list("report_id", flat=True))
+        dead.update(status="Failed", last_error=f"Timed out after {JOB_MAX_ATTEMPTS} attempts", updated_at=now)
+        PetReport.objects.filter(pk__in=report_ids).update(image_status="Failed")
+    stale.update(status="Queued")
+
+    with transaction.atomic():
+        runnable = ImageJob.objects.filter(status="Queued", available_at__lte=now).order_by("available_at", "id")
+        if connection.features.has_select_for_update_skip_locked:
+            runnable = runnable.select_for_update(skip_locked=True)
+        ids = list(runnable.values_list("id", flat=True)[:limit])
+        ImageJob.objects.filter(id__in=ids, status="Queued").update(
+            status="Running", claimed_at=now, attempts=F("attempts") + 1,
+        )
+    # Without SKIP LOCKED (SQLite) another worker may have won some of them
+    return list(ImageJob.objects.filter(id__in=ids, status="Running", claimed_at=now).values_list("id", flat=True))
+
+
+def run_job(job_id):
+    """
+    Process one claimed job. Safe to call in a worker process. Returns True on
+    success; failures are retried with exponential backoff up to JOB_MAX_ATTEMPTS.
+    """
+    job = ImageJob.objects.select_related("report__pet").filter(pk=job_id, status="Running").first()
+    if job is None:
+        return False
+    report = job.report
+    claimed = ImageJob.objects.filter(pk=job.pk, status="Running", claimed_at=job.claimed_at)
+
+    # Report changes below go through update() and leave modified_date alone (it
+    # drives the adoption clock); the job's updated_at moves with them instead,
+    # which is what listing ETags watch.
+    with transaction.atomic():
+        PetReport.objects.filter(pk=report.pk).update(image_status="Processing" if report.image else "None")
+        claimed.update(updated_at=timezone.now())
+    try:
+        name = process_report_image(report)
+    except Exception as e:  # noqa: BLE001 - any failure is recorded on the job
+        _record_failure(job, f"{type(e).__name__}: {e}")
+        return False
+
+    with transaction.atomic():
+        # Re-queued meanwhile (photo replaced)? Then the newer job owns the status.
+        if claimed.update(status="Done", last_error="", updated_at=timezone.now()) and name:
+            PetReport.objects.filter(pk=report.pk, image=name).update(image_status="Ready")
+        # update() sends no signals; cached public listings show the (renamed) photo
+        transaction.on_commit(lambda: response_cache.invalidate(PetReport, Pet))
+    return True
+
+
+def _record_failure(job, error):
+    """Retry ``job`` later with exponential backoff, or give up after JOB_MAX_ATTEMPTS."""
+    retry = job.attempts < JOB_MAX_ATTEMPTS
+    with transaction.atomic():
+        ImageJob.objects.filter(pk=job.pk, status="Running", claimed_at=job.claimed_at).update(
+            status="Queued" if retry else "Failed",
+            last_error=error[:2000],
+            available_at=timezone.now() + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (job.attempts - 1)),
+            updated_at=timezone.now(),
+        )
+        PetReport.objects.filter(pk=job.report_id).update(image_status="Pending" if retry else "Failed")
+
+
+def fail_running(job_ids, error):
+    """
+    Record ``error`` on the jobs among ``job_ids`` that are still Running,
+    e.g. after their worker process died. Returns how many there were.
+    """
+    jobs = list(ImageJob.objects.filter(id__in=job_ids, status="Running"))
+    for job in jobs:
+        _record_failure(job, error)
+    return len(jobs)
+
+
+# -------------------------
+# Processing
+# -------------------------
+def _has_metadata(image):
+    return any(key in image.info for key in METADATA_KEYS) or len(image.getexif()) > 0
+
+
+def clean_image(file_obj):
+    """
+    Apply the EXIF orientation and drop metadata. Returns ``(bytes, extension)``
+    for the cleaned image, or None when the upload is already clean.
+    """
+    with Image.open(file_obj) as image:
+        if not _has_metadata(image):
+            return None
+        pil_format = image.format if image.format in SAVE_OPTIONS else "JPEG"  # e.g. MPO from phone cameras
+        cleaned = ImageOps.exif_transpose(image)
+        if pil_format == "JPEG" and cleaned.mode not in ("RGB", "L"):
+            cleaned = cleaned.convert("RGB")
+
+        options = dict(SAVE_OPTIONS[pil_format])
+        if image.info.get("icc_profile"):
+            options["icc_profile"] = image.info["icc_profile"]  # colour profile is not personal data
+        out = io.BytesIO()
+        # Pillow only writes EXIF/XMP when passed explicitly, so this drops them
+        cleaned.save(out, pil_format, **options)
+    return out.getvalue(), {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp"}[pil_format]
+
+
+def _replace_file(old_name, modified_time, content, extension):
+    """Store the cleaned copy and repoint every row that shared the original at it."""
+    stem = os.path.splitext(old_name)[0]
+    new_name = default_storage.save(f"{stem}{extension}", ContentFile(content))
+    with transaction.atomic():
+        storage.repoint(old_name, new_name)
+    # The original (with its metadata) must not stay downloadable. Kept if an
+    # upload of the same bytes has been handed it since we read it.
+    if default_storage.purge(old_name, modified_time):
+        image_variants.discard_variants(old_name)
+    return new_name
+
+
+def process_report_image(report):
+    """
+    Orientation fix + metadata strip, pre-rendered listing variants and
+    perceptual hashes for one report. Returns the final image name (None
+    when the report has no photo of its own).
+    """
+    name = report.image.name if report.image else None
+    if name:
+        modified_time = default_storage.get_modified_time(name)
+        with default_storage.open(name, "rb") as file_obj:
+            cleaned = clean_image(file_obj)
+        if cleaned is not None:
+            name = _replace_file(name, modified_time, *cleaned)
+
+        for size in PREGENERATE_SIZES:
+            for fmt in image_variants.FORMATS:
+                handle, _ = image_variants.open_variant(name, size, fmt)
+                handle.close()
+
+    # Reports without a photo of their own are hashed with the pet's
+    image_hashing.index_report_image(report.pk)
+    return name
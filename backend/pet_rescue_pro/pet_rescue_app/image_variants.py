@@ -0,0 +1,190 @@
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+# Only these boxes can be requested, so clients cannot fill the cache with arbitrary sizes
+ALLOWED_SIZES = {
+    tuple(int(part) for part in size.split("x"))
+    for size in getattr(settings, "IMAGE_VARIANT_SIZES", ["200x200", "400x400", "800x800", "1200x1200"])
+}
+CACHE_MAX_BYTES = getattr(settings, "IMAGE_VARIANT_CACHE_MAX_BYTES", 512 * 1024 * 1024)
+# Evict down to this fraction of the limit so eviction scans stay rare
+CACHE_LOW_WATER = 0.9
+# Hits refresh a file's mtime (the LRU clock) at most this often
+TOUCH_INTERVAL = 300
+
+FORMATS = {
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+class VariantError(Exception):
+    """Requested variant cannot be produced; the message is safe to show to the client."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+# -------------------------
+# URLs
+# -------------------------
+def parse_size(value):
+    """``"200x200"`` -> ``(200, 200)`` if it is an allowed size, else None."""
+    try:
+        width, height = (int(part) for part in str(value).lower().split("x"))
+    except ValueError:
+        return None
+    return (width, height) if (width, height) in ALLOWED_SIZES else None
+
+
+def variant_url(name, size):
+    """Site-relative URL of the resized variant of the upload stored as ``name``."""
+    width, height = size
+    return f"{settings.MEDIA_URL}r/{width}x{height}/{quote(name)}"
+
+
+# -------------------------
+# Disk cache
+# -------------------------
+def cache_dir():
+    return Path(getattr(settings, "IMAGE_VARIANT_CACHE_DIR", None) or Path(settings.MEDIA_ROOT) / ".variants")
+
+
+class _CacheBudget:
+    """
+    Approximate running total of the cache directory size for this process.
+
+    The directory is only walked on first use and when the total passes the
+    limit; eviction then deletes least recently used files (oldest mtime)
+    until the cache is back under the low-water mark. Other processes' writes
+    are picked up at that walk, so the limit is soft by at most a few files.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.total = None
+
+    def _scan(self):
+        entries = []
+        for root, _, files in os.walk(cache_dir()):
+            for filename in files:
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def add(self, path, size):
+        with self.lock:
+            if self.total is None:
+                self.total = sum(entry[1] for entry in self._scan())
+            self.total += size
+            if self.total > CACHE_MAX_BYTES:
+                self.total = self._evict(keep=str(path))
+
+    def _evict(self, keep):
+        entries = sorted(self._scan())
+        total = sum(entry[1] for entry in entries)
+        target = CACHE_MAX_BYTES * CACHE_LOW_WATER
+        for _, size, path in entries:
+            if total <= target:
+                break
+            if path == keep:
+                continue  # the variant being served right now
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+        return total
+
+
+_budget = _CacheBudget()
+
+
+def _safe_name(name):
+    """Reject names that escape MEDIA_ROOT or point into the variant cache."""
+    normalized = os.path.normpath(name).replace("\\", "/")
+    if normalized.startswith(("..", "/", ".variants")):
+        raise VariantError("Invalid image path")
+    return normalized
+
+
+def _render(name, size, fmt, destination):
+    pil_format, _, options = FORMATS[fmt]
+    try:
+        with default_storage.open(name, "rb") as source, Image.open(source) as image:
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail(size, Image.Resampling.LANCZOS)  # fit inside the box, keep aspect, never upscale
+            if pil_format == "JPEG" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            # Write next to the target and rename, so readers never see a half-written file
+            fd, tmp_path = tempfile.mkstemp(dir=destination.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as out:
+                    image.save(out, pil_format, **options)
+                os.replace(tmp_path, destination)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+    except FileNotFoundError:
+        raise VariantError("Image not found", status=404)
+    except (OSError, Image.DecompressionBombError, ValueError):
+        raise VariantError("Unsupported image", status=415)
+
+
+def open_variant(name, size, fmt="jpeg"):
+    """
+    Open the ``size`` variant of upload ``name`` in ``fmt`` ("webp" or "jpeg"),
+    rendering it into the disk cache on first request.
+
+    Returns ``(file, content_type)``. Upload names are content hashes
+    (see storage.py), so a cached variant never goes stale.
+    """
+    if tuple(size) not in ALLOWED_SIZES:
+        raise VariantError("Unsupported size")
+    name = _safe_name(name)
+    width, height = size
+    destination = cache_dir() / f"{width}x{height}" / f"{name}.{fmt}"
+
+    for _ in range(2):  # a concurrent eviction can remove the file between render and open
+        try:
+            handle = open(destination, "rb")
+        except FileNotFoundError:
+            _render(name, size, fmt, destination)
+            _budget.add(destination, destination.stat().st_size)
+            continue
+        if time.time() - os.fstat(handle.fileno()).st_mtime > TOUCH_INTERVAL:
+            os.utime(destination)  # LRU: recently served files are evicted last
+        return handle, FORMATS[fmt][1]
+    raise VariantError("Image not available, try again", status=503)
+
+
+def discard_variants(name):
+    """Drop every cached variant of upload ``name`` (call when the upload itself is deleted)."""
+    name = _safe_name(name)
+    for size in ALLOWED_SIZES:
+        for fmt in FORMATS:
+            path = cache_dir() / f"{size[0]}x{size[1]}" / f"{name}.{fmt}"
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def preferred_format(request):
+    """WebP for clients that advertise it, JPEG for everyone else."""
+    return "webp" if "image/webp" in request.META.get("HTTP_ACCEPT", "") else "jpeg"
@@ -0,0 +1,108 @@
+from django.db.models import Prefetch
+
+from .models import PetReport, PetMedicalHistory
+from .image_variants import variant_url
+
+
+# -------------------------
+# Pet report listing engine
+# -------------------------
+def report_listing_queryset(**filters):
+    """
+    Return PetReports matching ``filters`` with everything the listing
+    payload needs loaded up front:
+
+    - report -> pet -> pet_type in the main query (select_related)
+    - medical history in one extra query for the whole page (Prefetch)
+
+    Iterating the result costs two queries no matter how many reports match.
+    """
+    return (
+        PetReport.objects.filter(**filters)
+        .select_related("pet__pet_type")
+        .prefetch_related(
+            Prefetch(
+                "pet__medical_history",
+                queryset=PetMedicalHistory.objects.order_by("id"),
+                to_attr="prefetched_medical_history",
+            )
+        )
+    )
+
+
+def filter_near(queryset, distances, pet_path="pet__"):
+    """
+    Keep only rows whose pet pincode is in ``distances`` (the map returned by
+    ``geo.proximity_from_request``). ``None`` means no proximity filter.
+    """
+    if distances is None:
+        return queryset
+    return queryset.filter(**{f"{pet_path}pincode__in": list(distances)})
+
+
+def _medical_payload(pet_obj):
+    # Same record the old `.filter(pet=pet).first()` returned: lowest id wins
+    records = getattr(pet_obj, "prefetched_medical_history", None)
+    if records is None:
+        records = list(pet_obj.medical_history.order_by("id")[:1])
+    medical_history = records[0] if records else None
+
+    return {
+        "last_vaccinated_date": medical_history.last_vaccinated_date.isoformat() if medical_history and medical_history.last_vaccinated_date else None,
+        "vaccination_name": medical_history.vaccination_name if medical_history else None,
+        "disease_name": medical_history.disease_name if medical_history else None,
+        "stage": medical_history.stage if medical_history else None,
+        "no_of_years": medical_history.no_of_years if medical_history else None,
+    }
+
+
+def _image_url(image, image_size):
+    return variant_url(image.name, image_size) if image_size else image.url
+
+
+def report_listing_payload(report, include_created_date=True, include_pincode=False, distances=None, image_size=None):
+    """
+    Build the dict used by the lost / found / adoptable listing endpoints.
+
+    The two flags keep each endpoint's response shape exactly as it was.
+    ``distances`` (proximity searches only) adds ``pet.distance_km``;
+    ``image_size`` swaps the image for its resized variant URL.
+    """
+    pet_obj = report.pet
+
+    pet_data = {
+        "id": pet_obj.id,
+        "name": pet_obj.name,
+        "pet_type": str(pet_obj.pet_type) if pet_obj.pet_type else None,
+        "breed": pet_obj.breed,
+        "age": pet_obj.age,
+        "description": pet_obj.description,
+        "color": pet_obj.color,
+        "address": pet_obj.address,
+        "city": pet_obj.city,
+        "state": pet_obj.state,
+        "gender": pet_obj.gender,
+        "is_diseased": pet_obj.is_diseased,
+        "is_vaccinated": pet_obj.is_vaccinated,
+        "medical_history": _medical_payload(pet_obj),
+    }
+    if include_pincode:
+        pet_data["pincode"] = pet_obj.pincode
+    if distances is not None:
+        pet_data["distance_km"] = distances.get(pet_obj.pincode)
+
+    data = {
+        "report_id": report.id,
+        "report_status": report.report_status,
+        "pet_status": report.pet_status,
+        "image": _image_url(report.image, image_size) if report.image else None,
+    }
+    if include_created_date:
+        data["created_date"] = report.created_date.isoformat()
+    data["pet"] = pet_data
+    return data
+
+
+def build_report_listing(reports, **payload_options):
+    """Serialize an iterable of reports from ``report_listing_queryset``."""
+    return [report_listing_payload(report, **payload_options) for report in reports]
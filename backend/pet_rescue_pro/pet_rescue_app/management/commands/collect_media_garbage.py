@@ -0,0 +1,103 @@
+import os
+import shutil
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from pet_rescue_app import image_variants, storage
+
+
+def _media_files(root, skip_dirs, min_age_seconds):
+    """
+    Yield ``(name, path, size)`` for every file under ``root`` older than the
+    grace period, one directory at a time (memory does not grow with the volume).
+    """
+    cutoff = time.time() - min_age_seconds
+    for directory, subdirs, files in os.walk(root):
+        # Hidden dirs hold caches (.variants) rather than uploads
+        subdirs[:] = sorted(
+            d for d in subdirs
+            if not d.startswith(".") and os.path.realpath(os.path.join(directory, d)) not in skip_dirs
+        )
+        for filename in sorted(files):
+            path = os.path.join(directory, filename)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if stat.st_mtime > cutoff:
+                continue  # just written: its row may not be committed yet
+            name = os.path.relpath(path, root).replace(os.sep, "/")
+            yield name, path, stat.st_size
+
+
+def _referenced(names):
+    """The subset of ``names`` that some file field still points at (indexed lookups)."""
+    found = set()
+    for model, field in storage.media_fields():
+        found.update(model._default_manager.filter(**{f"{field}__in": names}).values_list(field, flat=True))
+    return found
+
+
+class Command(BaseCommand):
+    help = (
+        "Find files in MEDIA_ROOT that no pet, report, feedback story or profile "
+        "references and quarantine (default) or delete them. Streams the media "
+        "volume in batches, so memory stays flat on large volumes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="List orphans without touching them.")
+        parser.add_argument("--delete", action="store_true", help="Delete orphans instead of quarantining them.")
+        parser.add_argument(
+            "--quarantine-dir",
+            default=None,
+            help="Where orphans are moved (default: MEDIA_QUARANTINE_DIR). Kept in a dated subdirectory.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000, help="Files checked against the database per query.")
+        parser.add_argument("--min-age-hours", type=float, default=24, help="Ignore files modified more recently than this.")
+
+    def handle(self, *args, **options):
+        root = Path(settings.MEDIA_ROOT)
+        quarantine = Path(options["quarantine_dir"] or getattr(settings, "MEDIA_QUARANTINE_DIR", root.parent / "media_quarantine"))
+        quarantine = quarantine / timezone.now().strftime("%Y%m%d-%H%M%S")
+        skip_dirs = {os.path.realpath(image_variants.cache_dir()), os.path.realpath(quarantine.parent)}
+
+        files = _media_files(root, skip_dirs, options["min_age_hours"] * 3600)
+        scanned = orphans = orphan_bytes = 0
+        while True:
+            batch = list(islice(files, options["batch_size"]))
+            if not batch:
+                break
+            scanned += len(batch)
+            referenced = _referenced([name for name, _, _ in batch])
+
+            for name, path, size in batch:
+                if name in referenced:
+                    continue
+                orphans += 1
+                orphan_bytes += size
+                if options["dry_run"]:
+                    self.stdout.write(name)
+                    continue
+                # Last look: a row may have started referencing it since the batch query
+                if storage.is_referenced(name):
+                    orphans -= 1
+                    orphan_bytes -= size
+                    continue
+                if options["delete"]:
+                    os.remove(path)
+                else:
+                    destination = quarantine / name
+                    destination.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.move(path, destination)
+                image_variants.discard_variants(name)
+
+        action = "Found" if options["dry_run"] else ("Deleted" if options["delete"] else f"Quarantined in {quarantine}:")
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {scanned} files. {action} {orphans} orphans ({orphan_bytes / 1024 / 1024:.1f} MB)"
+        ))
@@ -0,0 +1,65 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from pet_rescue_app.models import ReportImageHash
+from pet_rescue_app import image_variants, storage
+
+
+class Command(BaseCommand):
+    help = (
+        "Move uploads stored before content-addressed storage into media/blobs/, "
+        "so identical files are kept once and every row points at the shared copy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be moved.")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        seen = set()
+        moved = missing = duplicates = freed = 0
+
+        for model, field in storage.media_fields():
+            names = (
+                model._default_manager.exclude(**{f"{field}__startswith": f"{storage.BLOB_DIR}/"})
+                .exclude(**{field: ""})
+                .exclude(**{f"{field}__isnull": True})
+                .values_list(field, flat=True)
+                .distinct()
+                .iterator(chunk_size=options["batch_size"])
+            )
+            for name in names:
+                if name in seen:
+                    continue
+                seen.add(name)
+                if not default_storage.exists(name):
+                    missing += 1
+                    continue
+
+                size = default_storage.size(name)
+                modified_time = default_storage.get_modified_time(name)
+                with default_storage.open(name, "rb") as file_obj:
+                    blob = default_storage.blob_name(file_obj, name)
+                    exists = default_storage.exists(blob)
+                    if not dry_run and not exists:
+                        default_storage.save(name, file_obj)
+                if exists:
+                    duplicates += 1
+                    freed += size
+                moved += 1
+                if dry_run:
+                    continue
+
+                with transaction.atomic():
+                    storage.repoint(name, blob)
+                    ReportImageHash.objects.filter(image_name=name).update(image_name=blob)
+                if default_storage.purge(name, modified_time):
+                    image_variants.discard_variants(name)
+
+        prefix = "Would move" if dry_run else "Moved"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {moved} files ({duplicates} duplicates, {freed / 1024 / 1024:.1f} MB freed); "
+            f"{missing} referenced files are missing"
+        ))
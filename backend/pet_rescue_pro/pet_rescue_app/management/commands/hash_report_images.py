@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from pet_rescue_app.models import PetReport, ReportImageHash
+from pet_rescue_app import image_hashing
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute perceptual hashes for report photos that have none yet "
+        "(use --all to rehash every report, e.g. after replacing files)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Rehash reports that already have a hash.")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        reports = PetReport.objects.order_by("id")
+        if options["all"]:
+            ReportImageHash.objects.all().delete()
+        else:
+            reports = reports.filter(image_hash__isnull=True)
+
+        hashed = 0
+        for report_id in reports.values_list("id", flat=True).iterator(chunk_size=options["batch_size"]):
+            if image_hashing.index_report_image(report_id) is not None:
+                hashed += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Hashed {hashed} report images"))
@@ -0,0 +1,104 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from pet_rescue_app.models import PincodeCentroid
+
+# Header aliases, matched case-insensitively. The India Post "All India Pincode
+# Directory" CSV (pincode, latitude, longitude, district, statename) works as-is.
+COLUMN_ALIASES = {
+    "pincode": ("pincode", "pin", "postal_code", "postcode"),
+    "latitude": ("latitude", "lat"),
+    "longitude": ("longitude", "lon", "lng", "long"),
+    "district": ("district", "districtname"),
+    "state": ("state", "statename", "state_name"),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Load the offline pincode -> centroid table used by proximity search. "
+        "Rows sharing a pincode (one per post office) are averaged into one centroid."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path", help="CSV file with at least pincode, latitude and longitude columns.")
+        parser.add_argument(
+            "--replace",
+            action="store_true",
+            help="Delete pincodes that are not in the file (default: upsert only).",
+        )
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        centroids, skipped = self.read_centroids(options["csv_path"])
+        if not centroids:
+            raise CommandError("No usable rows found (need pincode, latitude and longitude).")
+
+        batch_size = options["batch_size"]
+        rows = [
+            PincodeCentroid(
+                pincode=pincode,
+                latitude=acc["lat"] / acc["n"],
+                longitude=acc["lon"] / acc["n"],
+                district=acc["district"],
+                state=acc["state"],
+            )
+            for pincode, acc in centroids.items()
+        ]
+
+        with transaction.atomic():
+            if options["replace"]:
+                PincodeCentroid.objects.exclude(pincode__in=list(centroids)).delete()
+            for start in range(0, len(rows), batch_size):
+                PincodeCentroid.objects.bulk_create(
+                    rows[start:start + batch_size],
+                    update_conflicts=True,
+                    unique_fields=["pincode"],
+                    update_fields=["latitude", "longitude", "district", "state"],
+                )
+
+        self.stdout.write(self.style.SUCCESS(f"Loaded {len(rows)} pincode centroids ({skipped} rows skipped)"))
+
+    def read_centroids(self, path):
+        try:
+            handle = open(path, newline="", encoding="utf-8-sig")
+        except OSError as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+
+        centroids = {}
+        skipped = 0
+        with handle:
+            reader = csv.DictReader(handle)
+            columns = self.resolve_columns(reader.fieldnames or [])
+            for row in reader:
+                try:
+                    pincode = int(str(row[columns["pincode"]]).strip())
+                    lat = float(row[columns["latitude"]])
+                    lon = float(row[columns["longitude"]])
+                except (TypeError, ValueError):
+                    skipped += 1  # "NA" coordinates are common in the public dataset
+                    continue
+                if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                    skipped += 1
+                    continue
+
+                acc = centroids.setdefault(pincode, {"lat": 0.0, "lon": 0.0, "n": 0, "district": None, "state": None})
+                acc["lat"] += lat
+                acc["lon"] += lon
+                acc["n"] += 1
+                for field in ("district", "state"):
+                    if acc[field] is None and columns.get(field):
+                        acc[field] = (row.get(columns[field]) or "").strip()[:100] or None
+        return centroids, skipped
+
+    def resolve_columns(self, fieldnames):
+        by_lower = {name.strip().lower(): name for name in fieldnames}
+        columns = {}
+        for field, aliases in COLUMN_ALIASES.items():
+            columns[field] = next((by_lower[a] for a in aliases if a in by_lower), None)
+        missing = [f for f in ("pincode", "latitude", "longitude") if columns[f] is None]
+        if missing:
+            raise CommandError(f"CSV is missing column(s): {', '.join(missing)}")
+        return columns
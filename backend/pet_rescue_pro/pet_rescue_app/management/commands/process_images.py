@@ -0,0 +1,84 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.management.base import BaseCommand
+
+# No app imports at module level: spawned workers import this module to
+# unpickle their tasks before Django is set up.
+
+
+def _init_worker():
+    # Fresh interpreter (spawn): set Django up once per worker process
+    import django
+    django.setup()
+
+
+def _run_job(job_id):
+    from pet_rescue_app import image_jobs
+    return image_jobs.run_job(job_id)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued report-photo jobs (EXIF orientation, metadata strip, listing "
+        "variants, perceptual hashes) in a pool of worker processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=min(4, os.cpu_count() or 1),
+            help="Worker processes (0 runs jobs in this process, handy for debugging).",
+        )
+        parser.add_argument("--batch-size", type=int, default=None, help="Jobs claimed per poll (default: 4 per worker).")
+        parser.add_argument("--poll-interval", type=float, default=5.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is drained instead of polling.")
+
+    def handle(self, *args, **options):
+        from pet_rescue_app import image_jobs
+
+        workers = options["workers"]
+        batch_size = options["batch_size"] or max(1, workers) * 4
+
+        def new_pool():
+            # spawn, not fork: children must not inherit this process's DB connection
+            return ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker,
+            )
+
+        pool = new_pool() if workers > 0 else None
+
+        done = failed = 0
+        try:
+            while True:
+                job_ids = image_jobs.claim_jobs(batch_size)
+                if not job_ids:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+                try:
+                    for ok in (pool.map if pool is not None else map)(_run_job, job_ids):
+                        if ok:
+                            done += 1
+                        else:
+                            failed += 1
+                except BrokenProcessPool:
+                    # A worker crashed or was OOM-killed: the batch's unfinished jobs
+                    # count as a failed attempt (retried with backoff), then start over
+                    failed += image_jobs.fail_running(job_ids, "Worker process died")
+                    self.stderr.write("Image worker process died; restarting the pool")
+                    pool.shutdown(cancel_futures=True)
+                    pool = new_pool()
+                self.stdout.write(f"Processed {len(job_ids)} image jobs")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        self.stdout.write(self.style.SUCCESS(f"Image jobs: {done} done, {failed} failed or retried"))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from pet_rescue_app.models import Pet, PetReport
+from pet_rescue_app import matching
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the blocking keys (Pet.match_block, match_city_block) for every pet, then rescore lost/found suggestions "
+        "for all open lost/found reports. Needed once after upgrading; afterwards matches are "
+        "kept up to date as reports are created and accepted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        changed = 0
+        batch = []
+        pets = Pet.objects.only("id", "pet_type_id", "pincode", "city", "match_block", "match_city_block")
+        for pet in pets.iterator(chunk_size=batch_size):
+            if matching.refresh_block_key(pet):
+                batch.append(pet)
+            if len(batch) >= batch_size:
+                Pet.objects.bulk_update(batch, ["match_block", "match_city_block"])
+                changed += len(batch)
+                batch = []
+        if batch:
+            Pet.objects.bulk_update(batch, ["match_block", "match_city_block"])
+            changed += len(batch)
+        self.stdout.write(f"Updated blocking keys for {changed} pets")
+
+        # Every open report, so pairs that only share a city are suggested too
+        report_ids = PetReport.objects.filter(
+            pet_status__in=("Lost", "Found"), report_status__in=matching.OPEN_REPORT_STATUSES, is_resolved=False,
+        ).values_list("id", flat=True)
+        reports = 0
+        suggestions = 0
+        for report_id in report_ids.iterator(chunk_size=batch_size):
+            suggestions += matching.match_report(report_id)
+            reports += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Matched {reports} open reports ({suggestions} suggestions)"))
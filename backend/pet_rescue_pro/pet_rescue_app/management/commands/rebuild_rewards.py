@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from pet_rescue_app import rewards
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild RewardPoint totals from the reward ledger in bulk. "
+        "With --reseed, first regenerate the ledger from accepted reports and approved adoptions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reseed",
+            action="store_true",
+            help="Drop the ledger and recreate one entry per qualifying report/adoption (migration 0004 does this once).",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        with transaction.atomic():
+            if options["reseed"]:
+                rewards.reseed_ledger(batch_size=batch_size)
+            updated = rewards.rebuild_totals(batch_size=batch_size)
+            transaction.on_commit(rewards.invalidate_leaderboard)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt reward totals for {updated} users"))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from pet_rescue_app.models import Profile
+from pet_rescue_app.notifications import reconcile_unread_counts
+
+
+class Command(BaseCommand):
+    help = "Recount unread notifications per user and re-prime the cached badge counters (run periodically)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        user_ids = Profile.objects.filter(is_active=True).order_by("id").values_list("id", flat=True)
+
+        total = 0
+        batch = []
+        for user_id in user_ids.iterator(chunk_size=batch_size):
+            batch.append(user_id)
+            if len(batch) >= batch_size:
+                reconcile_unread_counts(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            reconcile_unread_counts(batch)
+            total += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Reconciled unread counters for {total} users"))
@@ -0,0 +1,52 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from pet_rescue_app import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued emails (OTPs and other notifications) from the outbox in "
+        "batches over one persistent SMTP connection, retrying failures with backoff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50, help="Emails claimed per poll.")
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds to sleep when the outbox is empty.")
+        parser.add_argument("--once", action="store_true", help="Exit once the outbox is drained instead of polling.")
+
+    def handle(self, *args, **options):
+        mail_connection = get_connection()
+        is_open = False
+        sent = failed = 0
+        try:
+            while True:
+                emails = outbox.claim(options["batch_size"])
+                if not emails:
+                    if is_open:
+                        # Idle: SMTP servers drop quiet sessions anyway
+                        mail_connection.close()
+                        is_open = False
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+                if not is_open:
+                    # One TLS handshake + login for every batch until the outbox goes idle
+                    try:
+                        mail_connection.open()
+                        is_open = True
+                    except Exception as e:  # noqa: BLE001 - deliver() records it on each row
+                        self.stderr.write(f"SMTP connection failed: {type(e).__name__}: {e}")
+                batch_sent, batch_failed = outbox.deliver(emails, mail_connection)
+                sent += batch_sent
+                failed += batch_failed
+                self.stdout.write(f"Sent {batch_sent} of {len(emails)} queued emails")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            mail_connection.close()
+
+        self.stdout.write(self.style.SUCCESS(f"Emails: {sent} sent, {failed} failed or retried"))
@@ -0,0 +1,91 @@
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a worker does before its first response: load settings and apps,
+# build the WSGI handler (middleware) and import the URLconf (views)
+BOOT_SCRIPT = """
+import time
+started = time.perf_counter()
+import {wsgi_module}
+from django.urls import get_resolver
+get_resolver().url_patterns
+print("startup_ms", (time.perf_counter() - started) * 1000)
+"""
+
+# "import time:       123 |        456 |   package.module" (self and cumulative microseconds)
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| +(\S+)\s*$")
+
+
+def _boot_once(env):
+    wsgi_module = settings.WSGI_APPLICATION.rsplit(".", 1)[0]
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", BOOT_SCRIPT.format(wsgi_module=wsgi_module)],
+        env=env, cwd=settings.BASE_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise CommandError(f"Worker boot failed:\n{result.stderr[-2000:]}")
+
+    modules = {}  # name -> (self_us, cumulative_us)
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative_us))
+    startup_ms = float(re.search(r"^startup_ms (\S+)$", result.stdout, re.M).group(1))
+    return startup_ms, modules
+
+
+class Command(BaseCommand):
+    help = (
+        "Boot a worker (settings, apps, middleware, URLconf) in fresh interpreters "
+        "and report the startup time and where import time goes, per module and "
+        "per package. --max-ms turns it into a regression check."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to boot; the median is reported.")
+        parser.add_argument("--top", type=int, default=15, help="Modules and packages to list.")
+        parser.add_argument("--profile", default=None, help="APP_PROFILE for the booted workers (default: as configured).")
+        parser.add_argument("--max-ms", type=float, default=None, help="Fail when the median startup takes longer than this.")
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+        if options["profile"]:
+            env["APP_PROFILE"] = options["profile"]
+
+        startups, cumulative, self_time = [], defaultdict(list), defaultdict(list)
+        for _ in range(max(1, options["runs"])):
+            startup_ms, modules = _boot_once(env)
+            startups.append(startup_ms)
+            for name, (self_us, cumulative_us) in modules.items():
+                cumulative[name].append(cumulative_us)
+                self_time[name].append(self_us)
+
+        median_ms = statistics.median(startups)
+        top = options["top"]
+        self.stdout.write(
+            f"Worker startup ({env.get('APP_PROFILE', getattr(settings, 'APP_PROFILE', 'development'))} profile): "
+            f"median {median_ms:.0f} ms over {len(startups)} runs, {len(cumulative)} modules imported"
+        )
+
+        self.stdout.write("\nSlowest imports (cumulative, ms):")
+        slowest = sorted(cumulative, key=lambda name: statistics.median(cumulative[name]), reverse=True)
+        for name in slowest[:top]:
+            self.stdout.write(f"  {statistics.median(cumulative[name]) / 1000:8.1f}  {name}")
+
+        packages = defaultdict(float)
+        for name, values in self_time.items():
+            packages[name.split(".")[0]] += statistics.median(values)
+        self.stdout.write("\nImport time by package (self, ms):")
+        for package, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+            self.stdout.write(f"  {self_us / 1000:8.1f}  {package}")
+
+        if options["max_ms"] is not None and median_ms > options["max_ms"]:
+            raise CommandError(f"Worker startup took {median_ms:.0f} ms, over the {options['max_ms']:.0f} ms budget")
@@ -0,0 +1,240 @@
+import re
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .models import PetReport, PetMatch, PincodeCentroid
+from .geo import haversine_km, pincodes_within, ProximityError
+
+# Reports still worth matching; Resolved/Reunited/Rejected ones drop out
+OPEN_REPORT_STATUSES = ("Pending", "Accepted")
+# Pairs scoring below this are not stored
+MATCH_MIN_SCORE = getattr(settings, "MATCH_MIN_SCORE", 40)
+# Neighbouring pincode regions within this distance share a block
+MATCH_RADIUS_KM = getattr(settings, "MATCH_RADIUS_KM", 15)
+# Safety valve for a pathological block (e.g. thousands of reports in one city)
+MATCH_MAX_CANDIDATES = 1000
+
+# Weights add up to 100
+WEIGHTS = {"breed": 25, "color": 20, "location": 20, "date": 15, "gender": 10, "age": 10}
+
+OPPOSITE_STATUS = {"Lost": "Found", "Found": "Lost"}
+
+
+# -------------------------
+# Blocking keys
+# -------------------------
+# Only pets of the same type in the same region are ever compared. A region is
+# the 3-digit pincode prefix (postal sorting district) or, without a pincode,
+# the normalised city name. Each pet stores that key in Pet.match_block and,
+# when it has a city, the city key in Pet.match_city_block (both indexed), so a
+# pet with a pincode is still found by a pet that only knows the city. A report
+# being matched probes its own keys plus those of nearby prefixes.
+def _normalize(text):
+    return re.sub(r"\s+", " ", (text or "").strip().lower())
+
+
+def _region_keys(pet):
+    keys = []
+    if pet.pincode:
+        keys.append(f"p{pet.pincode // 1000}")
+    city = _normalize(pet.city)
+    if city:
+        keys.append(f"c{city}")
+    return keys
+
+
+def block_key(pet):
+    """The key stored on ``pet.match_block`` (None when the pet has no type or region)."""
+    regions = _region_keys(pet)
+    if not pet.pet_type_id or not regions:
+        return None
+    return f"{pet.pet_type_id}:{regions[0]}"[:64]
+
+
+def city_block_key(pet):
+    """The key stored on ``pet.match_city_block`` (None when the pet has no type or city)."""
+    city = _normalize(pet.city)
+    if not pet.pet_type_id or not city:
+        return None
+    return f"{pet.pet_type_id}:c{city}"[:64]
+
+
+def probe_block_keys(pet):
+    """Every block a pet's counterpart may live in: own region, city and nearby pincode prefixes."""
+    if not pet.pet_type_id:
+        return []
+    regions = set(_region_keys(pet))
+    if pet.pincode:
+        try:
+            regions.update(f"p{code // 1000}" for code in pincodes_within(pet.pincode, MATCH_RADIUS_KM))
+        except ProximityError:
+            pass  # pincode not in the centroid table: own prefix only
+    return [f"{pet.pet_type_id}:{region}"[:64] for region in regions]
+
+
+# -------------------------
+# Scoring
+# -------------------------
+def _tokens(text):
+    return set(re.findall(r"[a-z]+", _normalize(text)))
+
+
+def _text_similarity(a, b):
+    """1.0 same text, token overlap (Jaccard) otherwise; None if either side is unknown."""
+    if not _normalize(a) or not _normalize(b):
+        return None
+    if _normalize(a) == _normalize(b):
+        return 1.0
+    ta, tb = _tokens(a), _tokens(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+def _location_similarity(lost_pet, found_pet, centroids):
+    if lost_pet.pincode and found_pet.pincode:
+        if lost_pet.pincode == found_pet.pincode:
+            return 1.0
+        a, b = centroids.get(lost_pet.pincode), centroids.get(found_pet.pincode)
+        if a and b:
+            return max(0.0, 1 - haversine_km(*a, *b) / (2 * MATCH_RADIUS_KM))
+    city_a, city_b = _normalize(lost_pet.city), _normalize(found_pet.city)
+    if city_a and city_a == city_b:
+        return 0.6
+    return 0.2
+
+
+def _date_similarity(lost_report, found_report):
+    gap_days = (found_report.created_date - lost_report.created_date).total_seconds() / 86400
+    if gap_days >= -3:
+        # Found shortly after going missing is most likely; fades out over ~3 months
+        return max(0.0, 1 - max(gap_days, 0) / 90)
+    # Found well before the owner reported it: possible, but weaker
+    return max(0.0, 0.5 * (1 + gap_days / 30))
+
+
+def score_pair(lost_report, found_report, centroids=None):
+    """
+    Score a Lost/Found pair from 0 to 100. Returns ``(score, details)`` or None
+    when the pair is impossible (different pet type or gender).
+    """
+    lost_pet, found_pet = lost_report.pet, found_report.pet
+    if lost_pet.pet_type_id != found_pet.pet_type_id:
+        return None
+    if lost_pet.gender and found_pet.gender and lost_pet.gender != found_pet.gender:
+        return None
+
+    parts = {}
+
+    breed = _text_similarity(lost_pet.breed, found_pet.breed)
+    parts["breed"] = 0.3 if breed is None else breed
+
+    color = _text_similarity(lost_pet.color, found_pet.color)
+    parts["color"] = 0.3 if color is None else color
+
+    parts["gender"] = 1.0 if lost_pet.gender and found_pet.gender else 0.5
+
+    if lost_pet.age is not None and found_pet.age is not None:
+        parts["age"] = max(0.0, 1 - abs(lost_pet.age - found_pet.age) / 4)
+    else:
+        parts["age"] = 0.3
+
+    parts["location"] = _location_similarity(lost_pet, found_pet, centroids or {})
+    parts["date"] = _date_similarity(lost_report, found_report)
+
+    details = {name: round(WEIGHTS[name] * value, 1) for name, value in parts.items()}
+    return round(sum(details.values()), 1), details
+
+
+# -------------------------
+# Incremental matching
+# -------------------------
+def _is_open(report):
+    return report.pet_status in OPPOSITE_STATUS and report.report_status in OPEN_REPORT_STATUSES and not report.is_resolved
+
+
+def candidate_reports(report):
+    """Open reports of the opposite status in the report's blocks (indexed via Pet.match_block / match_city_block)."""
+    keys = probe_block_keys(report.pet)
+    if not keys:
+        return PetReport.objects.none()
+    blocks = Q(pet__match_block__in=keys)
+    city_key = city_block_key(report.pet)
+    if city_key:
+        blocks |= Q(pet__match_city_block=city_key)
+    return (
+        PetReport.objects.filter(
+            blocks,
+            pet_status=OPPOSITE_STATUS[report.pet_status],
+            report_status__in=OPEN_REPORT_STATUSES,
+            is_resolved=False,
+        )
+        .exclude(pet_id=report.pet_id)
+        .select_related("pet")
+        .order_by("-created_date")[:MATCH_MAX_CANDIDATES]
+    )
+
+
+def _centroids_for(pets):
+    pincodes = {pet.pincode for pet in pets if pet.pincode}
+    return {
+        code: (lat, lon)
+        for code, lat, lon in PincodeCentroid.objects.filter(pincode__in=pincodes).values_list("pincode", "latitude", "longitude")
+    }
+
+
+def _report_filter(report):
+    return Q(lost_report=report) if report.pet_status == "Lost" else Q(found_report=report)
+
+
+def match_report(report_id):
+    """
+    (Re)compute suggestions for one report against its blocks.
+
+    Confirmed/Dismissed decisions are kept; only Suggested rows are rescored or
+    dropped. A report that is no longer open loses its pending suggestions.
+    Returns the number of suggestions stored.
+    """
+    report = PetReport.objects.select_related("pet").filter(pk=report_id).first()
+    if report is None or report.pet_status not in OPPOSITE_STATUS:
+        return 0
+
+    if not _is_open(report):
+        PetMatch.objects.filter(_report_filter(report), status="Suggested").delete()
+        return 0
+
+    candidates = list(candidate_reports(report))
+    centroids = _centroids_for([report.pet] + [c.pet for c in candidates])
+
+    matches = []
+    for other in candidates:
+        lost, found = (report, other) if report.pet_status == "Lost" else (other, report)
+        result = score_pair(lost, found, centroids)
+        if result is None or result[0] < MATCH_MIN_SCORE:
+            continue
+        score, details = result
+        matches.append(PetMatch(lost_report=lost, found_report=found, score=score, details=details))
+
+    matched_ids = [m.found_report_id if report.pet_status == "Lost" else m.lost_report_id for m in matches]
+    other_side = "found_report_id" if report.pet_status == "Lost" else "lost_report_id"
+
+    with transaction.atomic():
+        # Pairs that no longer qualify (pet edited, other report closed...)
+        PetMatch.objects.filter(_report_filter(report), status="Suggested").exclude(**{f"{other_side}__in": matched_ids}).delete()
+        PetMatch.objects.bulk_create(
+            matches,
+            update_conflicts=True,
+            unique_fields=["lost_report", "found_report"],
+            update_fields=["score", "details", "updated_at"],
+        )
+    return len(matches)
+
+
+def refresh_block_key(pet):
+    """Recompute ``pet.match_block`` and ``pet.match_city_block`` in place; True when either changed."""
+    key, city_key = block_key(pet), city_block_key(pet)
+    changed = (key, city_key) != (pet.match_block, pet.match_city_block)
+    pet.match_block, pet.match_city_block = key, city_key
+    return changed
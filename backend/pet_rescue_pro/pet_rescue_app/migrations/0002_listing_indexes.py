@@ -0,0 +1,45 @@
+# Generated by Django 5.2.5 on 2026-10-18 07:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet_rescue_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['receiver', 'is_read', '-created_at'], name='notification_receiver_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['receiver'], name='notification_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='petadoption',
+            index=models.Index(fields=['requestor', 'status', '-created_date'], name='adoption_requestor_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='petadoption',
+            index=models.Index(fields=['status', '-created_date'], name='adoption_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='petreport',
+            index=models.Index(fields=['pet_status', 'report_status', '-created_date'], name='petreport_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='petreport',
+            index=models.Index(condition=models.Q(('report_status', 'Accepted')), fields=['pet_status', '-created_date'], name='petreport_accepted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='petreport',
+            index=models.Index(fields=['user', 'pet_status', 'report_status', '-created_date'], name='petreport_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='petreport',
+            index=models.Index(fields=['-created_date'], name='petreport_created_idx'),
+        ),
+    ]
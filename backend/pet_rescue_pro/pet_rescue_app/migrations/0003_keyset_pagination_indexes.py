@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-18 07:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('pet_rescue_app', '0002_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feedbackstory',
+            index=models.Index(fields=['-submitted_at', '-id'], name='feedback_submitted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='petadoption',
+            index=models.Index(fields=['-created_date', '-id'], name='adoption_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['-created_at', '-id'], name='profile_created_idx'),
+        ),
+    ]
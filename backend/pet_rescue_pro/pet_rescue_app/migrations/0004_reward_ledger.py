@@ -0,0 +1,54 @@
+# Generated by Django 5.2.5 on 2026-10-18 07:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from pet_rescue_app import rewards
+
+
+def seed_reward_ledger(apps, schema_editor):
+    """
+    Start the ledger from today's accepted reports and approved adoptions and
+    recompute the totals from it, replacing the points stored by the old
+    compute-on-read code (same as `rebuild_rewards --reseed`).
+    """
+    rewards.reseed_ledger(apps)
+    rewards.rebuild_totals(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet_rescue_app', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rewardpoint',
+            name='adoption_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='rewardpoint',
+            name='rescue_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='RewardLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField()),
+                ('source', models.CharField(choices=[('Rescue', 'Rescue'), ('Adoption', 'Adoption')], max_length=20)),
+                ('reason', models.CharField(blank=True, max_length=255, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('adoption', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='pet_rescue_app.petadoption')),
+                ('report', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='pet_rescue_app.petreport')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reward_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-created_at'], name='rewardledger_user_idx')],
+            },
+        ),
+        migrations.RunPython(seed_reward_ledger, migrations.RunPython.noop),
+    ]
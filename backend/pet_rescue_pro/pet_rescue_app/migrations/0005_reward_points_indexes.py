@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-18 07:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet_rescue_app', '0004_reward_ledger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rewardpoint',
+            index=models.Index(fields=['-points', '-id'], name='rewardpoint_points_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rewardpoint',
+            index=models.Index(fields=['badge', '-points'], name='rewardpoint_badge_idx'),
+        ),
+    ]
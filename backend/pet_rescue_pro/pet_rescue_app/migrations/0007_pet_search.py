@@ -0,0 +1,79 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:40
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+POSTGRES_INSTALL = [
+    "CREATE INDEX pet_search_vector_idx ON pet_rescue_app_pet USING GIN (search_vector)",
+    """
+    CREATE OR REPLACE FUNCTION pet_rescue_app_pet_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.breed, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.color, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.city, '')), 'C') ||
+            setweight(to_tsvector('english', coalesce(NEW.state, '')), 'C') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'D');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER pet_search_vector_update
+    BEFORE INSERT OR UPDATE OF name, breed, color, city, state, description
+    ON pet_rescue_app_pet
+    FOR EACH ROW EXECUTE FUNCTION pet_rescue_app_pet_search_vector()
+    """,
+    # Backfill: touching a searched column fires the trigger
+    "UPDATE pet_rescue_app_pet SET name = name",
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS pet_search_vector_update ON pet_rescue_app_pet",
+    "DROP FUNCTION IF EXISTS pet_rescue_app_pet_search_vector()",
+    "DROP INDEX IF EXISTS pet_search_vector_idx",
+]
+
+SQLITE_INSTALL = [
+    "CREATE VIRTUAL TABLE pet_rescue_app_pet_fts USING fts5(name, breed, color, city, state, description)",
+    """
+    INSERT INTO pet_rescue_app_pet_fts (rowid, name, breed, color, city, state, description)
+    SELECT id, coalesce(name, ''), coalesce(breed, ''), coalesce(color, ''),
+           coalesce(city, ''), coalesce(state, ''), coalesce(description, '')
+    FROM pet_rescue_app_pet
+    """,
+]
+
+SQLITE_UNINSTALL = [
+    "DROP TABLE IF EXISTS pet_rescue_app_pet_fts",
+]
+
+
+def install_search_index(apps, schema_editor):
+    statements = {"postgresql": POSTGRES_INSTALL, "sqlite": SQLITE_INSTALL}.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def uninstall_search_index(apps, schema_editor):
+    statements = {"postgresql": POSTGRES_UNINSTALL, "sqlite": SQLITE_UNINSTALL}.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet_rescue_app', '0006_notification_read_marker'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pet',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
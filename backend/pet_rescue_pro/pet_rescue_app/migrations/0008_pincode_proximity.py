@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet_rescue_app', '0007_pet_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PincodeCentroid',
+            fields=[
+                ('pincode', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('district', models.CharField(blank=True, max_length=100, null=True)),
+                ('state', models.CharField(blank=True, max_length=100, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(fields=['pincode'], name='pet_pincode_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pincodecentroid',
+            index=models.Index(fields=['latitude', 'longitude'], name='pincode_latlon_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet_rescue_app', '0008_pincode_proximity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PetMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('details', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('Suggested', 'Suggested'), ('Confirmed', 'Confirmed'), ('Dismissed', 'Dismissed')], default='Suggested', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='pet',
+            name='match_block',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(fields=['match_block'], name='pet_match_block_idx'),
+        ),
+        migrations.AddField(
+            model_name='petmatch',
+            name='found_report',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='found_matches', to='pet_rescue_app.petreport'),
+        ),
+        migrations.AddField(
+            model_name='petmatch',
+            name='lost_report',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lost_matches', to='pet_rescue_app.petreport'),
+        ),
+        migrations.AddIndex(
+            model_name='petmatch',
+            index=models.Index(fields=['status', '-score', '-id'], name='petmatch_status_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='petmatch',
+            index=models.Index(fields=['found_report', '-score'], name='petmatch_found_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='petmatch',
+            constraint=models.UniqueConstraint(fields=('lost_report', 'found_report'), name='petmatch_unique_pair'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet_rescue_app', '0009_pet_matching'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportImageHash',
+            fields=[
+                ('report', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='image_hash', serialize=False, to='pet_rescue_app.petreport')),
+                ('image_name', models.CharField(max_length=255)),
+                ('ahash', models.BigIntegerField()),
+                ('dhash', models.BigIntegerField()),
+                ('dhash_0', models.IntegerField()),
+                ('dhash_1', models.IntegerField()),
+                ('dhash_2', models.IntegerField()),
+                ('dhash_3', models.IntegerField()),
+                ('hashed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['dhash_0'], name='imagehash_chunk0_idx'), models.Index(fields=['dhash_1'], name='imagehash_chunk1_idx'), models.Index(fields=['dhash_2'], name='imagehash_chunk2_idx'), models.Index(fields=['dhash_3'], name='imagehash_chunk3_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:16
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def queue_existing_photos(apps, schema_editor):
+    """Existing uploads go through the same processing (metadata strip, variants, hashes) once a worker runs."""
+    PetReport = apps.get_model("pet_rescue_app", "PetReport")
+    ImageJob = apps.get_model("pet_rescue_app", "ImageJob")
+    with_photo = PetReport.objects.exclude(image="").exclude(image__isnull=True)
+    report_ids = list(with_photo.values_list("id", flat=True))
+    ImageJob.objects.bulk_create([ImageJob(report_id=report_id) for report_id in report_ids], batch_size=1000)
+    with_photo.update(image_status="Pending")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet_rescue_app', '0010_report_image_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='petreport',
+            name='image_status',
+            field=models.CharField(choices=[('None', 'None'), ('Pending', 'Pending'), ('Processing', 'Processing'), ('Ready', 'Ready'), ('Failed', 'Failed')], default='None', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='ImageJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('Queued', 'Queued'), ('Running', 'Running'), ('Done', 'Done'), ('Failed', 'Failed')], default='Queued', max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('report', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='image_job', to='pet_rescue_app.petreport')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'available_at'], name='imagejob_status_available_idx')],
+            },
+        ),
+        migrations.RunPython(queue_existing_photos, migrations.RunPython.noop),
+    ]
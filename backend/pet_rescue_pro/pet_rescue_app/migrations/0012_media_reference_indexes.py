@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('pet_rescue_app', '0011_image_jobs'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feedbackstory',
+            index=models.Index(fields=['image'], name='feedback_image_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(fields=['image'], name='pet_image_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='petreport',
+            index=models.Index(fields=['image'], name='petreport_image_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['profile_image'], name='profile_image_idx'),
+        ),
+    ]
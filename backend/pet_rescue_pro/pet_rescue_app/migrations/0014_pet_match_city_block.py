@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:51
+
+import re
+
+from django.db import migrations, models
+
+
+def index_pets_by_city(apps, schema_editor):
+    """Same key as matching.city_block_key; run rebuild_matches afterwards to suggest the newly reachable pairs."""
+    Pet = apps.get_model("pet_rescue_app", "Pet")
+    batch = []
+    for pet in Pet.objects.exclude(city__isnull=True).only("id", "pet_type_id", "city").iterator(chunk_size=1000):
+        city = re.sub(r"\s+", " ", pet.city.strip().lower())
+        if city:
+            pet.match_city_block = f"{pet.pet_type_id}:c{city}"[:64]
+            batch.append(pet)
+    Pet.objects.bulk_update(batch, ["match_city_block"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pet_rescue_app', '0013_outbound_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pet',
+            name='match_city_block',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(fields=['match_city_block'], name='pet_match_city_block_idx'),
+        ),
+        migrations.RunPython(index_pets_by_city, migrations.RunPython.noop),
+    ]
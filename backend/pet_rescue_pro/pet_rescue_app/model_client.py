@@ -0,0 +1,258 @@
+import asyncio
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+BUSY_REPLY = "⚠️ The assistant is busy, please try again shortly."
+UNAVAILABLE_REPLY = "⚠️ The assistant is temporarily unavailable. Please try again in a minute."
+
+# Upper bounds (seconds) of the latency histogram buckets, Prometheus style
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class ModelUnavailable(Exception):
+    """The model was not called: the circuit is open or every slot is taken."""
+
+    def __init__(self, reason, reply, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.reply = reply
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Closed: calls go through. After ``failure_threshold`` consecutive
+    failures it opens and every call fails fast for ``reset_timeout``
+    seconds. Then it is half-open: one trial call goes through, and its
+    outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "open" if time.monotonic() < self.opened_at + self.reset_timeout else "half_open"
+
+    def retry_after(self):
+        if self.opened_at is None:
+            return 0
+        return max(1, round(self.opened_at + self.reset_timeout - time.monotonic()))
+
+    def would_allow(self):
+        """Whether a call would go through now, without claiming the half-open trial."""
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self.trial_in_flight)
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def release_trial(self):
+        """The half-open trial ended without an outcome (e.g. the caller went away)."""
+        with self._lock:
+            self.trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+
+    def snapshot(self):
+        return {"state": self.state, "consecutive_failures": self.failures, "retry_after": self.retry_after()}
+
+
+class LatencyHistogram:
+    """Cumulative bucket counts plus count and sum, like a Prometheus histogram."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = next((i for i, bound in enumerate(self.buckets) if seconds <= bound), len(self.buckets))
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+
+    def snapshot(self):
+        with self._lock:
+            counts, count, total = list(self.counts), self.count, self.sum
+        cumulative, running = {}, 0
+        for bound, n in zip([*map(str, self.buckets), "+Inf"], counts):
+            running += n
+            cumulative[bound] = running
+        return {"buckets": cumulative, "count": count, "sum": round(total, 4)}
+
+
+class ModelClient:
+    """
+    Guarded access to a GenerativeModel-like ``model``: at most
+    ``max_concurrency`` calls in flight, each cut off after ``timeout``
+    seconds, behind a circuit breaker so an unhealthy upstream costs
+    callers nothing. Calls that cannot go through raise ModelUnavailable
+    immediately. Call latencies are recorded per outcome (ok, error, timeout).
+    """
+
+    def __init__(self, model, timeout, max_concurrency, failure_threshold=5, reset_timeout=30):
+        self.model = model
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.latency = {outcome: LatencyHistogram() for outcome in ("ok", "error", "timeout")}
+        self.rejected = {"busy": 0, "circuit_open": 0}
+        # Sync calls run on these threads so the deadline holds whatever the model does
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="model-client")
+        self._semaphores = weakref.WeakKeyDictionary()  # event loop -> asyncio.Semaphore
+        self._lock = threading.Lock()
+
+    def _reject(self, reason):
+        with self._lock:
+            self.rejected[reason] += 1
+        if reason == "busy":
+            raise ModelUnavailable(reason, BUSY_REPLY, 5)
+        raise ModelUnavailable(reason, UNAVAILABLE_REPLY, self.breaker.retry_after())
+
+    def _record(self, outcome, started):
+        self.latency[outcome].observe(time.monotonic() - started)
+        if outcome == "ok":
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    # -------------------------
+    # Sync
+    # -------------------------
+    def generate(self, prompt):
+        """The full answer text. Raises ModelUnavailable, TimeoutError or the model's error."""
+        if not self._slots.acquire(blocking=False):
+            self._reject("busy")
+        if not self.breaker.allow():
+            self._slots.release()
+            self._reject("circuit_open")
+
+        started = time.monotonic()
+        future = self._executor.submit(
+            self.model.generate_content, prompt, request_options={"timeout": self.timeout},
+        )
+        # The slot is held until the call really ends, even after the caller gave up on it
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            response = future.result(timeout=self.timeout)
+            text = _chunk_text(response).strip() if response else ""
+        except FutureTimeoutError:
+            self._record("timeout", started)
+            raise TimeoutError(f"No answer within {self.timeout}s") from None
+        except Exception:
+            self._record("error", started)
+            raise
+        self._record("ok", started)
+        return text
+
+    # -------------------------
+    # Async
+    # -------------------------
+    def semaphore(self):
+        """The concurrency cap for the running event loop (an ASGI server runs one per process)."""
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphores[loop]
+
+    def check_available(self):
+        """Raise ModelUnavailable if a call made now would be turned away."""
+        if not self.breaker.would_allow():
+            self._reject("circuit_open")
+        if self.semaphore().locked():
+            self._reject("busy")
+
+    async def stream(self, prompt):
+        """
+        Yield the answer piece by piece as it is generated, the whole answer
+        within ``timeout`` seconds (else TimeoutError). Never waits for a slot:
+        raises ModelUnavailable when they are all taken, like generate().
+        """
+        semaphore = self.semaphore()
+        if semaphore.locked():
+            self._reject("busy")
+        if not self.breaker.allow():
+            self._reject("circuit_open")
+        # A free slot and no await since locked(): this returns without suspending
+        await semaphore.acquire()
+
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        deadline = loop.time() + self.timeout
+        try:
+            response = await asyncio.wait_for(
+                self.model.generate_content_async(prompt, stream=True), deadline - loop.time(),
+            )
+            chunks = response.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), max(0, deadline - loop.time()))
+                except StopAsyncIteration:
+                    break
+                text = _chunk_text(chunk)
+                if text:
+                    yield text
+        except TimeoutError:
+            self._record("timeout", started)
+            raise
+        except Exception:
+            self._record("error", started)
+            raise
+        except BaseException:
+            # Caller went away mid-answer: says nothing about upstream health
+            self.breaker.release_trial()
+            raise
+        finally:
+            semaphore.release()
+        self._record("ok", started)
+
+    def stats(self):
+        with self._lock:
+            rejected = dict(self.rejected)
+        return {
+            "breaker": self.breaker.snapshot(),
+            "max_concurrency": self.max_concurrency,
+            "timeout": self.timeout,
+            "rejected": rejected,
+            "latency": {outcome: histogram.snapshot() for outcome, histogram in self.latency.items()},
+        }
+
+
+def _chunk_text(chunk):
+    try:
+        return chunk.text or ""
+    except ValueError:
+        return ""  # chunk without text parts (e.g. a safety block)
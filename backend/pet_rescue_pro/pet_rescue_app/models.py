@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.hashers import make_password
 from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
+from django.contrib.postgres.search import SearchVectorField
 class BaseModel(models.Model):
     created_date = models.DateTimeField(auto_now_add=True)
     modified_date = models.DateTimeField(auto_now=True)
@@ -62,6 +63,14 @@ class Profile(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username"]
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of the admin user list
+            models.Index(fields=["-created_at", "-id"], name="profile_created_idx"),
+            # Stored-file reference checks (storage.is_referenced, collect_media_garbage)
+            models.Index(fields=["profile_image"], name="profile_image_idx"),
+        ]
+
     def __str__(self):
         return self.email
 
@@ -92,11 +101,45 @@ class Pet(BaseModel):
     image = models.ImageField(upload_to="pet_images/", blank=True, null=True)
     is_diseased = models.BooleanField(default=False)
     is_vaccinated = models.BooleanField(default=False)
+    # Postgres only: kept up to date by a database trigger (see migration 0007 / search.py)
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+    # Lost/found matching blocking key ("<pet_type>:<region>"), see matching.py
+    match_block = models.CharField(max_length=64, blank=True, null=True, editable=False)
+    # Second blocking key ("<pet_type>:c<city>") for pets that have a city
+    match_city_block = models.CharField(max_length=64, blank=True, null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Proximity search: pets whose pincode is in the nearby set
+            models.Index(fields=["pincode"], name="pet_pincode_idx"),
+            # Matching: candidate lookup per blocking key
+            models.Index(fields=["match_block"], name="pet_match_block_idx"),
+            models.Index(fields=["match_city_block"], name="pet_match_city_block_idx"),
+            models.Index(fields=["image"], name="pet_image_idx"),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class PincodeCentroid(models.Model):
+    """Offline pincode -> centroid reference table, loaded with `manage.py load_pincodes`."""
+    pincode = models.BigIntegerField(primary_key=True)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    district = models.CharField(max_length=100, blank=True, null=True)
+    state = models.CharField(max_length=100, blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Bounding-box prefilter: latitude range first, longitude checked in the index
+            models.Index(fields=["latitude", "longitude"], name="pincode_latlon_idx"),
+        ]
+
+    def __str__(self):
+        return str(self.pincode)
+
+
 class PetMedicalHistory(BaseModel):
     pet = models.ForeignKey(Pet, on_delete=models.CASCADE, related_name="medical_history")
     last_vaccinated_date = models.DateField(blank=True, null=True)
@@ -119,11 +162,107 @@ class PetReport(BaseModel):
     report_status = models.CharField(max_length=20, choices=REPORT_STATUS_CHOICES, default="Pending")
     image = models.ImageField(upload_to="report_images/", blank=True, null=True)
     is_resolved = models.BooleanField(default=False)
+    # Background photo processing (orientation, metadata strip, variants, hashing), see image_jobs.py
+    IMAGE_STATUS_CHOICES = [("None", "None"), ("Pending", "Pending"), ("Processing", "Processing"), ("Ready", "Ready"), ("Failed", "Failed")]
+    image_status = models.CharField(max_length=20, choices=IMAGE_STATUS_CHOICES, default="None")
+
+    class Meta:
+        indexes = [
+            # Listing endpoints: filter on status pair, newest first
+            models.Index(fields=["pet_status", "report_status", "-created_date"], name="petreport_status_created_idx"),
+            # Public lost/found/adoptable lists only ever read accepted reports
+            models.Index(fields=["pet_status", "-created_date"], condition=models.Q(report_status="Accepted"), name="petreport_accepted_idx"),
+            # "My lost/found pets" and reward counts
+            models.Index(fields=["user", "pet_status", "report_status", "-created_date"], name="petreport_user_status_idx"),
+            # Admin report list
+            models.Index(fields=["-created_date"], name="petreport_created_idx"),
+            models.Index(fields=["image"], name="petreport_image_idx"),
+        ]
 
     def __str__(self):
         return f"{self.pet.name} - {self.pet_status}"
 
 
+class PetMatch(models.Model):
+    """Suggested pairing of a Lost report with a Found report, scored by matching.py."""
+    STATUS_CHOICES = [("Suggested", "Suggested"), ("Confirmed", "Confirmed"), ("Dismissed", "Dismissed")]
+
+    lost_report = models.ForeignKey(PetReport, on_delete=models.CASCADE, related_name="lost_matches")
+    found_report = models.ForeignKey(PetReport, on_delete=models.CASCADE, related_name="found_matches")
+    score = models.FloatField()
+    details = models.JSONField(default=dict, blank=True)  # per-attribute score breakdown
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="Suggested")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["lost_report", "found_report"], name="petmatch_unique_pair"),
+        ]
+        indexes = [
+            # Admin suggestion list, best first
+            models.Index(fields=["status", "-score", "-id"], name="petmatch_status_score_idx"),
+            models.Index(fields=["found_report", "-score"], name="petmatch_found_idx"),
+        ]
+
+    def __str__(self):
+        return f"Lost #{self.lost_report_id} <-> Found #{self.found_report_id} ({self.score:.0f})"
+
+
+class ImageJob(models.Model):
+    """
+    Queue row for background processing of a report's photo. Claimed and run
+    by `manage.py process_images`; one row per report, re-queued when the photo changes.
+    """
+    STATUS_CHOICES = [("Queued", "Queued"), ("Running", "Running"), ("Done", "Done"), ("Failed", "Failed")]
+
+    report = models.OneToOneField(PetReport, on_delete=models.CASCADE, related_name="image_job")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="Queued")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    available_at = models.DateTimeField(default=timezone.now)  # retry backoff
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Worker polling: oldest runnable jobs first
+            models.Index(fields=["status", "available_at"], name="imagejob_status_available_idx"),
+        ]
+
+    def __str__(self):
+        return f"Image job for report #{self.report_id} ({self.status})"
+
+
+class ReportImageHash(models.Model):
+    """
+    Perceptual hashes of a report's photo (see image_hashing.py). The 64-bit
+    dHash is also stored as four indexed 16-bit chunks for Hamming-radius lookups.
+    """
+    report = models.OneToOneField(PetReport, on_delete=models.CASCADE, primary_key=True, related_name="image_hash")
+    image_name = models.CharField(max_length=255)  # file the hashes were computed from
+    ahash = models.BigIntegerField()
+    dhash = models.BigIntegerField()
+    dhash_0 = models.IntegerField()
+    dhash_1 = models.IntegerField()
+    dhash_2 = models.IntegerField()
+    dhash_3 = models.IntegerField()
+    hashed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # One index per chunk: a radius query ORs four IN lookups
+            models.Index(fields=["dhash_0"], name="imagehash_chunk0_idx"),
+            models.Index(fields=["dhash_1"], name="imagehash_chunk1_idx"),
+            models.Index(fields=["dhash_2"], name="imagehash_chunk2_idx"),
+            models.Index(fields=["dhash_3"], name="imagehash_chunk3_idx"),
+        ]
+
+    def __str__(self):
+        return f"Image hash for report #{self.report_id}"
+
+
 class PetAdoption(BaseModel):
     STATUS_CHOICES = [("Pending", "Pending"), ("Approved", "Approved"), ("Rejected", "Rejected")]
 
@@ -132,6 +271,13 @@ class PetAdoption(BaseModel):
     message = models.TextField(blank=True, null=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="Pending")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["requestor", "status", "-created_date"], name="adoption_requestor_status_idx"),
+            models.Index(fields=["status", "-created_date"], name="adoption_status_created_idx"),
+            models.Index(fields=["-created_date", "-id"], name="adoption_created_idx"),
+        ]
+
     def __str__(self):
         return f"Adoption Request for {self.pet.name} by {self.requestor.username}"
 
@@ -152,9 +298,58 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["receiver", "is_read", "-created_at"], name="notification_receiver_idx"),
+            # Unread badge count only touches unread rows above the read watermark
+            models.Index(fields=["receiver", "id"], condition=models.Q(is_read=False), name="notification_unread_idx"),
+        ]
+
     def __str__(self):
         receiver_name = self.receiver.username if self.receiver else "Unknown"
         return f"Notification from {self.sender.username} to {receiver_name}"
+
+
+class NotificationReadMarker(models.Model):
+    """
+    Per-user "read up to" watermark: every notification with id <= read_up_to
+    counts as read, so clearing an inbox is one UPDATE instead of one per row.
+    """
+    user = models.OneToOneField(Profile, on_delete=models.CASCADE, related_name="notification_read_marker")
+    read_up_to = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user.username} read up to #{self.read_up_to}"
+
+
+class OutboundEmail(models.Model):
+    """
+    Outbox row for an email. Requests only insert rows; `manage.py send_queued_email`
+    delivers them in batches over one SMTP connection, retrying failures with backoff.
+    """
+    STATUS_CHOICES = [("Queued", "Queued"), ("Sending", "Sending"), ("Sent", "Sent"), ("Failed", "Failed")]
+
+    to = models.EmailField()
+    subject = models.CharField(max_length=255)
+    text_body = models.TextField()
+    html_body = models.TextField(blank=True, default="")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="Queued")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    available_at = models.DateTimeField(default=timezone.now)  # retry backoff
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Worker polling: oldest sendable emails first
+            models.Index(fields=["status", "available_at"], name="outbox_status_available_idx"),
+        ]
+
+    def __str__(self):
+        return f"Email to {self.to}: {self.subject} ({self.status})"
     
 
 class RewardPoint(models.Model):
@@ -170,6 +365,16 @@ class RewardPoint(models.Model):
     points = models.IntegerField(default=0)
     badge = models.CharField(max_length=50, default="Starter")
     reason = models.CharField(max_length=255, blank=True, null=True)  # renamed field
+    # Materialized from RewardLedgerEntry, see rewards.py
+    rescue_count = models.IntegerField(default=0)
+    adoption_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Admin leaderboard: ordering and range filters on points
+            models.Index(fields=["-points", "-id"], name="rewardpoint_points_idx"),
+            models.Index(fields=["badge", "-points"], name="rewardpoint_badge_idx"),
+        ]
 
     def add_points(self, points: int, reason: str):
         """
@@ -187,10 +392,44 @@ class RewardPoint(models.Model):
                 self.badge = name
                 break
 
+    def next_badge(self):
+        """Return (name, threshold) of the next badge to earn, or None at the top."""
+        for name, score in self.BADGES:
+            if score > self.points:
+                return name, score
+        return None
+
     def _str_(self):
         return f"{self.user.username} - {self.points} Points - {self.badge} ({self.reason})"
 
 
+class RewardLedgerEntry(models.Model):
+    """
+    Append-only history of reward point changes.
+
+    One positive entry is written when a report becomes Accepted/Found or an
+    adoption becomes Approved, and a negative one if that is later undone.
+    RewardPoint holds the running total so reads never touch this table.
+    """
+    SOURCE_CHOICES = [("Rescue", "Rescue"), ("Adoption", "Adoption")]
+
+    user = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name="reward_entries")
+    points = models.IntegerField()
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    report = models.ForeignKey(PetReport, on_delete=models.SET_NULL, null=True, blank=True)
+    adoption = models.ForeignKey(PetAdoption, on_delete=models.SET_NULL, null=True, blank=True)
+    reason = models.CharField(max_length=255, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="rewardledger_user_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} {self.points:+d} ({self.source})"
+
+
 class FeedbackStory(models.Model):
     user = models.ForeignKey(Profile, on_delete=models.CASCADE)
     title = models.CharField(max_length=200)
@@ -203,6 +442,12 @@ class FeedbackStory(models.Model):
         blank=True
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-submitted_at", "-id"], name="feedback_submitted_idx"),
+            models.Index(fields=["image"], name="feedback_image_idx"),
+        ]
+
     def _str_(self):
         return f"{self.user} - {self.title}"
     
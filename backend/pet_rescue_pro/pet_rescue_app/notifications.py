@@ -0,0 +1,138 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Max, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Profile, Notification, NotificationReadMarker
+
+# Counters expire so any drift (bulk updates, lost increments) heals on its own;
+# `manage.py reconcile_notification_counts` re-primes them from the database.
+UNREAD_COUNT_KEY = "notifications:unread:{user_id}"
+UNREAD_COUNT_TIMEOUT = 300
+
+# Admin recipient ids; invalidated by signals when admin flags change
+ADMIN_RECIPIENTS_KEY = "notifications:admin_recipients"
+ADMIN_RECIPIENTS_TIMEOUT = 3600
+
+
+def _unread_key(user_id):
+    return UNREAD_COUNT_KEY.format(user_id=user_id)
+
+
+# -------------------------
+# Read watermark
+# -------------------------
+def get_read_watermark(user_id):
+    """Highest notification id the user has marked as read in bulk (0 if never)."""
+    watermark = NotificationReadMarker.objects.filter(user_id=user_id).values_list("read_up_to", flat=True).first()
+    return watermark or 0
+
+
+def mark_read_up_to(user, up_to=None):
+    """
+    Mark every notification of ``user`` with id <= ``up_to`` (default: all) as read
+    by advancing the watermark. Never moves it backwards. Returns the new watermark.
+    """
+    latest = Notification.objects.filter(receiver=user).aggregate(latest=Max("id"))["latest"] or 0
+    # Clamp so notifications created later are never pre-marked as read
+    up_to = latest if up_to is None else min(up_to, latest)
+
+    updated = NotificationReadMarker.objects.filter(user=user).update(
+        read_up_to=Greatest(F("read_up_to"), up_to), updated_at=timezone.now(),
+    )
+    if not updated:
+        NotificationReadMarker.objects.get_or_create(user=user, defaults={"read_up_to": up_to})
+
+    reset_unread(user.pk)
+    return get_read_watermark(user.pk)
+
+
+def unread_queryset(user_id, watermark=None):
+    if watermark is None:
+        watermark = get_read_watermark(user_id)
+    return Notification.objects.filter(receiver_id=user_id, is_read=False, id__gt=watermark)
+
+
+def count_unread_in_db(user_id):
+    return unread_queryset(user_id).count()
+
+
+def unread_count(user):
+    """Unread notifications for ``user``; a cache hit on every poll after the first."""
+    key = _unread_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = count_unread_in_db(user.pk)
+        # add(), not set(): never clobber a counter another request already primed
+        cache.add(key, count, timeout=UNREAD_COUNT_TIMEOUT)
+    return count
+
+
+def adjust_unread(user_id, delta):
+    """Atomically move a primed counter; an unprimed one is left for the next read."""
+    if not user_id or not delta:
+        return
+    key = _unread_key(user_id)
+    try:
+        value = cache.incr(key, delta)
+    except ValueError:
+        return  # not cached, next read recounts
+    if value < 0:
+        cache.delete(key)
+
+
+def reset_unread(user_id):
+    cache.delete(_unread_key(user_id))
+
+
+def reconcile_unread_counts(user_ids):
+    """Recount unread notifications for ``user_ids`` with one grouped query and re-prime the cache."""
+    user_ids = list(user_ids)
+    counts = dict.fromkeys(user_ids, 0)
+    rows = (
+        Notification.objects.filter(receiver_id__in=user_ids, is_read=False)
+        # Rows under the receiver's watermark are read even though is_read is False
+        .filter(Q(receiver__notification_read_marker__isnull=True) | Q(id__gt=F("receiver__notification_read_marker__read_up_to")))
+        .values("receiver_id")
+        .annotate(unread=Count("id"))
+    )
+    for row in rows:
+        counts[row["receiver_id"]] = row["unread"]
+    cache.set_many({_unread_key(user_id): count for user_id, count in counts.items()}, timeout=UNREAD_COUNT_TIMEOUT)
+    return counts
+
+
+# -------------------------
+# Admin fan-out
+# -------------------------
+def admin_recipient_ids():
+    """Ids of every active superuser, cached until an admin flag changes."""
+    ids = cache.get(ADMIN_RECIPIENTS_KEY)
+    if ids is None:
+        ids = list(Profile.objects.filter(is_superuser=True, is_active=True).order_by("id").values_list("id", flat=True))
+        cache.set(ADMIN_RECIPIENTS_KEY, ids, timeout=ADMIN_RECIPIENTS_TIMEOUT)
+    return ids
+
+
+def invalidate_admin_recipients():
+    cache.delete(ADMIN_RECIPIENTS_KEY)
+
+
+def notify_admins(sender, content, pet=None, report=None):
+    """
+    Send the same notification to every admin with one bulk INSERT.
+    Returns the created notifications (empty if there are no admins).
+    """
+    receiver_ids = admin_recipient_ids()
+    created = Notification.objects.bulk_create([
+        Notification(sender=sender, receiver_id=receiver_id, content=content, pet=pet, report=report)
+        for receiver_id in receiver_ids
+    ])
+
+    # bulk_create skips post_save, so bump the unread counters here
+    def bump_counters():
+        for receiver_id in receiver_ids:
+            adjust_unread(receiver_id, 1)
+    transaction.on_commit(bump_counters)
+    return created
@@ -0,0 +1,97 @@
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+EMAIL_MAX_ATTEMPTS = getattr(settings, "EMAIL_MAX_ATTEMPTS", 5)
+# A row still "Sending" after this long belongs to a dead worker and is re-queued
+SEND_TIMEOUT = timedelta(seconds=getattr(settings, "EMAIL_SEND_TIMEOUT", 300))
+RETRY_BASE_SECONDS = 30
+# Errors after which the SMTP session itself is unusable and must be reopened
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+# -------------------------
+# Queue
+# -------------------------
+def enqueue(to, subject, text_body, html_body=""):
+    """
+    Queue an email. This is all a request does: the row commits with the
+    request's transaction and a worker delivers it (see send_queued_email).
+    """
+    return OutboundEmail.objects.create(to=to, subject=subject, text_body=text_body, html_body=html_body)
+
+
+def claim(limit):
+    """Mark up to ``limit`` sendable emails as Sending for this worker and return them."""
+    now = timezone.now()
+    stale = OutboundEmail.objects.filter(status="Sending", claimed_at__lt=now - SEND_TIMEOUT)
+    # An email that keeps hanging or killing its worker gives up like one that keeps bouncing
+    stale.filter(attempts__gte=EMAIL_MAX_ATTEMPTS).update(
+        status="Failed", last_error=f"Timed out after {EMAIL_MAX_ATTEMPTS} attempts",
+    )
+    stale.update(status="Queued")
+
+    with transaction.atomic():
+        sendable = OutboundEmail.objects.filter(status="Queued", available_at__lte=now).order_by("available_at", "id")
+        if connection.features.has_select_for_update_skip_locked:
+            sendable = sendable.select_for_update(skip_locked=True)
+        ids = list(sendable.values_list("id", flat=True)[:limit])
+        OutboundEmail.objects.filter(id__in=ids, status="Queued").update(
+            status="Sending", claimed_at=now, attempts=F("attempts") + 1,
+        )
+    # Without SKIP LOCKED (SQLite) another worker may have won some of them
+    return list(OutboundEmail.objects.filter(id__in=ids, status="Sending", claimed_at=now).order_by("id"))
+
+
+# -------------------------
+# Delivery
+# -------------------------
+def _message(email, mail_connection):
+    message = EmailMultiAlternatives(
+        email.subject, email.text_body, settings.DEFAULT_FROM_EMAIL, [email.to], connection=mail_connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, "text/html")
+    return message
+
+
+def deliver(emails, mail_connection):
+    """
+    Send claimed emails over ``mail_connection``, which the caller keeps open
+    across batches. Each email is sent on its own so one bad address does not
+    fail the batch; failures are retried with exponential backoff up to
+    EMAIL_MAX_ATTEMPTS. Returns ``(sent, failed)``.
+    """
+    sent = failed = 0
+    for email in emails:
+        claimed = OutboundEmail.objects.filter(pk=email.pk, status="Sending", claimed_at=email.claimed_at)
+        try:
+            mail_connection.send_messages([_message(email, mail_connection)])
+        except Exception as e:  # noqa: BLE001 - any failure is recorded on the row
+            failed += 1
+            retry = email.attempts < EMAIL_MAX_ATTEMPTS
+            claimed.update(
+                status="Queued" if retry else "Failed",
+                last_error=f"{type(e).__name__}: {e}"[:2000],
+                available_at=timezone.now() + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (email.attempts - 1)),
+            )
+            if isinstance(e, CONNECTION_ERRORS):
+                # Reconnect for the rest of the batch; if that fails too, the
+                # next send records the error on its own row
+                mail_connection.close()
+                try:
+                    mail_connection.open()
+                except Exception:  # noqa: BLE001
+                    pass
+            continue
+        # Bodies carry OTPs and reset links: keep only what the log needs
+        claimed.update(status="Sent", last_error="", sent_at=timezone.now(), text_body="", html_body="")
+        sent += 1
+    return sent, failed
@@ -0,0 +1,140 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import DateTimeField, Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+# -------------------------
+# Keyset (cursor) pagination
+# -------------------------
+class KeysetCursorPagination(BasePagination):
+    """
+    Opaque-cursor pagination over ``(ordering field, id)``.
+
+    Pages are fetched with ``WHERE (field, id) < (last_field, last_id)``
+    instead of OFFSET, so every page costs the same no matter how deep the
+    client scrolls.
+
+    Pagination is opt-in: it only kicks in when the request carries
+    ``?cursor=`` or ``?page_size=``. Without either, ``paginate_queryset``
+    returns None and the view keeps answering with the full list, exactly
+    like before.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = getattr(settings, "CURSOR_PAGE_SIZE", 20)
+    max_page_size = getattr(settings, "CURSOR_MAX_PAGE_SIZE", 100)
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self, ordering=("-created_date", "-id"), optional=True):
+        field, tiebreak = ordering
+        self.optional = optional
+        self.descending = field.startswith("-")
+        self.field = field.lstrip("-")
+        self.tiebreak = tiebreak.lstrip("-")
+        self.ordering = ordering
+        self.next_cursor = None
+        self.request = None
+
+    def is_requested(self, request):
+        if not self.optional:
+            return True
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        raw = request.query_params.get(self.page_size_query_param)
+        try:
+            size = int(raw) if raw else self.page_size
+        except ValueError:
+            size = self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    # ---- cursor encoding ----
+    def encode_cursor(self, position):
+        # Full isoformat(): DjangoJSONEncoder cuts datetimes to milliseconds, and
+        # rows created within the same millisecond would then be skipped
+        value, last_id = position
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        raw = json.dumps([value, last_id]).encode("utf-8")
+        return urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    def decode_cursor(self, model, encoded):
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            value, last_id = json.loads(urlsafe_b64decode(padded.encode("ascii")))
+            try:
+                field = model._meta.get_field(self.field)
+            except FieldDoesNotExist:
+                field = None  # annotated value (e.g. a search rank) is used as-is
+            if isinstance(field, DateTimeField):
+                value = parse_datetime(value)
+                if value is None:
+                    raise ValueError("not a datetime")
+            elif field is not None:
+                value = field.to_python(value)
+            return value, int(last_id)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_position(self, request, model):
+        """Decoded ``(value, id)`` of the last row of the previous page, or None on the first page."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        return self.decode_cursor(model, encoded) if encoded else None
+
+    def finish_page(self, request, rows, page_size):
+        """
+        Trim a ``page_size + 1`` fetch to one page and remember the next cursor.
+        Used directly by views that fetch rows with raw SQL (e.g. full-text search).
+        """
+        self.request = request
+        page = list(rows)
+        if len(page) > page_size:
+            page = page[:page_size]
+            last = page[-1]
+            self.next_cursor = self.encode_cursor([getattr(last, self.field), getattr(last, self.tiebreak)])
+        else:
+            self.next_cursor = None
+        return page
+
+    # ---- BasePagination API ----
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        position = self.get_position(request, queryset.model)
+        if position is not None:
+            value, last_id = position
+            op = "lt" if self.descending else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{self.field}__{op}": value})
+                | Q(**{self.field: value, f"{self.tiebreak}__{op}": last_id})
+            )
+
+        return self.finish_page(request, queryset[:page_size + 1], page_size)
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data, key="results"):
+        return Response({
+            key: data,
+            "next": self.get_next_link(),
+            "next_cursor": self.next_cursor,
+        })
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .conditional import ListingValidators
+
+# Backstop for data without an invalidation signal (nested owner profiles, bulk updates)
+RESPONSE_CACHE_TIMEOUT = getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300)
+# How long one request may hold the recompute lock; waiters give up after this too
+RECOMPUTE_LOCK_TIMEOUT = 10
+RECOMPUTE_POLL_INTERVAL = 0.05
+
+GENERATION_KEY = "response_cache:generation:{model}"
+ENTRY_KEY = "response_cache:{endpoint}:{digest}"
+
+
+# -------------------------
+# Invalidation
+# -------------------------
+# Every entry key embeds the current generation of each model it was built
+# from. A write bumps the model's generation, so old entries are never read
+# again (they expire on their own) and invalidation is O(1) however many
+# query-param variants are cached.
+def _generation_key(model):
+    return GENERATION_KEY.format(model=model._meta.label_lower)
+
+
+def invalidate(*models):
+    """Make every cached response built from ``models`` stale. Call on commit."""
+    for model in models:
+        key = _generation_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_generation(), None)
+
+
+def _new_generation():
+    # Time-seeded, so a generation lost with the cache is never handed out again
+    return time.time_ns() // 1000
+
+
+def _generations(models):
+    keys = [_generation_key(model) for model in models]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _new_generation(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def entry_key(request, endpoint, models):
+    """Endpoint + absolute URL (host, path, sorted query params) + model generations."""
+    params = sorted(request.query_params.lists())
+    base = request.build_absolute_uri(request.path)  # image URLs in the body are absolute
+    raw = repr((base, params, _generations(models)))
+    return ENTRY_KEY.format(endpoint=endpoint, digest=hashlib.sha1(raw.encode()).hexdigest())
+
+
+# -------------------------
+# Lookup with miss collapsing
+# -------------------------
+def _build_entry(build):
+    validators, response = build()
+    if response.status_code != 200:
+        return None, response  # errors are not cached
+    entry = {
+        # Plain JSON types: serializer output holds references to the serializer
+        "data": json.loads(JSONRenderer().render(response.data)),
+        "status": response.status_code,
+        "etag": validators.etag if validators else None,
+        "last_modified": validators.last_modified if validators else None,
+    }
+    return entry, response
+
+
+def get_or_build(key, build):
+    """
+    The cached entry under ``key``, or build it. Concurrent misses for the
+    same key are collapsed: one request recomputes while the others wait for
+    its result (up to RECOMPUTE_LOCK_TIMEOUT, then they compute themselves).
+
+    Returns ``(entry, response)``; ``response`` is set only when this call
+    built it (it is also what to send when the build failed).
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        return entry, None
+
+    lock_key = f"{key}:lock"
+    if not cache.add(lock_key, 1, RECOMPUTE_LOCK_TIMEOUT):
+        deadline = time.monotonic() + RECOMPUTE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(RECOMPUTE_POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry, None
+            if cache.get(lock_key) is None:
+                break  # the holder failed without storing anything
+        return _build_entry(build)
+
+    try:
+        entry, response = _build_entry(build)
+        if entry is not None:
+            cache.set(key, entry, RESPONSE_CACHE_TIMEOUT)
+        return entry, response
+    finally:
+        cache.delete(lock_key)
+
+
+def respond(request, endpoint, models, build):
+    """
+    Serve a public (same body for everyone) GET from the response cache.
+
+    ``build()`` returns ``(validators_or_None, Response)``; its result is
+    cached until a write to any of ``models`` (see signals.py) or the
+    timeout. Cached ETag/Last-Modified still answer conditional requests,
+    so a warm hit touches no database at all.
+    """
+    entry, response = get_or_build(entry_key(request, endpoint, models), build)
+    if entry is None:
+        return response
+
+    validators = None
+    if entry["etag"]:
+        validators = ListingValidators.from_values(request, entry["etag"], entry["last_modified"])
+        not_modified = validators.not_modified()
+        if not_modified is not None:
+            return not_modified
+
+    response = Response(entry["data"], status=entry["status"])
+    return validators.apply(response) if validators else response
@@ -0,0 +1,262 @@
+from django.apps import apps as global_apps
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, IntegerField, Q, Sum, Value, When
+
+from .models import PetAdoption, PetReport, RewardPoint, RewardLedgerEntry
+
+# Points configuration
+RESCUER_POINTS = 100
+ADOPTER_POINTS = 50
+
+# Leaderboard: the top LEADERBOARD_MAX_K rows are cached and sliced per request
+LEADERBOARD_MAX_K = 100
+LEADERBOARD_CACHE_KEY = "rewards:leaderboard:top"
+LEADERBOARD_CACHE_TIMEOUT = 300
+
+
+def report_earns_points(pet_status, report_status):
+    """Rescuer points: only for reports that are "Accepted" and pet_status is "Found"."""
+    return report_status == "Accepted" and pet_status == "Found"
+
+
+def adoption_earns_points(status):
+    """Adopter points: all approved adoptions."""
+    return status == "Approved"
+
+
+def build_reason(rescue_count, adoption_count):
+    reasons = []
+    if rescue_count > 0:
+        reasons.append(f"Rescued {rescue_count} pets")
+    if adoption_count > 0:
+        reasons.append(f"Approved {adoption_count} adoptions")
+    return "; ".join(reasons) if reasons else "No points yet"
+
+
+def get_reward(user):
+    """
+    Read-only reward lookup for a user (single indexed query, no writes).
+    Users without a row yet get an unsaved zero-point RewardPoint.
+    """
+    reward_obj = RewardPoint.objects.select_related("user").filter(user=user).first()
+    if reward_obj is None:
+        reward_obj = RewardPoint(user=user, reason=build_reason(0, 0))
+    return reward_obj
+
+
+def _apply_entry(reward_obj, source, is_earning, label, report=None, adoption=None):
+    """
+    Bring the ledger for one report or adoption in line with ``is_earning``:
+    append a credit or a reversal if needed and fold it into ``reward_obj``.
+    The caller holds the lock on ``reward_obj`` (see _locked_reward).
+    """
+    target = {"report": report} if report is not None else {"adoption": adoption}
+    credited = (RewardLedgerEntry.objects.filter(**target).aggregate(net=Sum("points"))["net"] or 0) > 0
+    if credited == is_earning:
+        return None
+
+    direction = 1 if is_earning else -1
+    points = (RESCUER_POINTS if source == "Rescue" else ADOPTER_POINTS) * direction
+    verb = "Credited" if direction > 0 else "Reversed"
+    RewardLedgerEntry.objects.create(
+        user_id=reward_obj.user_id,
+        points=points,
+        source=source,
+        report=report,
+        adoption=adoption,
+        reason=f"{verb} {label}",
+    )
+    reward_obj.points += points
+    if source == "Rescue":
+        reward_obj.rescue_count += direction
+    else:
+        reward_obj.adoption_count += direction
+    reward_obj.reason = build_reason(reward_obj.rescue_count, reward_obj.adoption_count)
+    reward_obj.update_badge()
+    reward_obj.save()
+    transaction.on_commit(invalidate_leaderboard)
+    return reward_obj
+
+
+def _locked_reward(user_id):
+    # Every ledger write for a user goes through this row lock, so concurrent
+    # saves of the same report are applied one after the other, each reading
+    # the state the previous one committed.
+    reward_obj, _ = RewardPoint.objects.select_for_update().get_or_create(
+        user_id=user_id, defaults={"reason": build_reason(0, 0)},
+    )
+    return reward_obj
+
+
+def sync_report_rewards(report, deleting=False):
+    """Credit or reverse rescuer points so the ledger matches the report's committed Accepted+Found state."""
+    with transaction.atomic():
+        reward_obj = _locked_reward(report.user_id)
+        # Re-read under the lock: the saved instance may already be stale
+        current = None if deleting else PetReport.objects.filter(pk=report.pk).values_list("pet_status", "report_status").first()
+        is_earning = bool(current) and report_earns_points(*current)
+        return _apply_entry(reward_obj, "Rescue", is_earning, f"pet report #{report.id}", report=report)
+
+
+def sync_adoption_rewards(adoption, deleting=False):
+    """Credit or reverse adopter points so the ledger matches the adoption's committed Approved state."""
+    with transaction.atomic():
+        reward_obj = _locked_reward(adoption.requestor_id)
+        current = None if deleting else PetAdoption.objects.filter(pk=adoption.pk).values_list("status", flat=True).first()
+        return _apply_entry(reward_obj, "Adoption", adoption_earns_points(current), f"adoption #{adoption.id}", adoption=adoption)
+
+
+# -------------------------
+# Rebuilding from history
+# -------------------------
+# Used by `manage.py rebuild_rewards` and by migration 0004, which passes its
+# historical app registry; so only plain field access on the models here.
+def badge_for(points):
+    badge = RewardPoint.BADGES[0][0]
+    for name, score in RewardPoint.BADGES:
+        if points >= score:
+            badge = name
+    return badge
+
+
+def _bulk_insert(model, objs, batch_size):
+    batch = []
+    for obj in objs:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            model.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+
+
+def reseed_ledger(apps=global_apps, batch_size=1000):
+    """Replace the ledger with one credit per accepted Found report and per approved adoption."""
+    Report = apps.get_model("pet_rescue_app", "PetReport")
+    Adoption = apps.get_model("pet_rescue_app", "PetAdoption")
+    Entry = apps.get_model("pet_rescue_app", "RewardLedgerEntry")
+    Entry.objects.all().delete()
+
+    reports = (
+        Report.objects.filter(pet_status="Found", report_status="Accepted")
+        .values_list("id", "user_id")
+        .iterator(chunk_size=batch_size)
+    )
+    _bulk_insert(
+        Entry,
+        (
+            Entry(
+                user_id=user_id, points=RESCUER_POINTS, source="Rescue",
+                report_id=report_id, reason=f"Credited pet report #{report_id}",
+            )
+            for report_id, user_id in reports
+        ),
+        batch_size,
+    )
+
+    adoptions = (
+        Adoption.objects.filter(status="Approved")
+        .values_list("id", "requestor_id")
+        .iterator(chunk_size=batch_size)
+    )
+    _bulk_insert(
+        Entry,
+        (
+            Entry(
+                user_id=user_id, points=ADOPTER_POINTS, source="Adoption",
+                adoption_id=adoption_id, reason=f"Credited adoption #{adoption_id}",
+            )
+            for adoption_id, user_id in adoptions
+        ),
+        batch_size,
+    )
+
+
+def rebuild_totals(apps=global_apps, batch_size=1000):
+    """Recompute every RewardPoint row from the ledger; returns the number of rows written."""
+    Profile = apps.get_model("pet_rescue_app", "Profile")
+    Reward = apps.get_model("pet_rescue_app", "RewardPoint")
+    Entry = apps.get_model("pet_rescue_app", "RewardLedgerEntry")
+
+    # Every user gets a row so the admin leaderboard lists everyone
+    missing = Profile.objects.filter(rewardpoint__isnull=True).values_list("id", flat=True)
+    Reward.objects.bulk_create(
+        [Reward(user_id=user_id, reason=build_reason(0, 0)) for user_id in missing.iterator(chunk_size=batch_size)],
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+
+    # +1 for a credit, -1 for a reversal, per source
+    net = Case(When(points__gt=0, then=Value(1)), default=Value(-1), output_field=IntegerField())
+    totals = {
+        row["user_id"]: row
+        for row in Entry.objects.values("user_id").annotate(
+            total=Sum("points"),
+            rescues=Sum(net, filter=Q(source="Rescue")),
+            adoptions=Sum(net, filter=Q(source="Adoption")),
+        )
+    }
+
+    fields = ["points", "rescue_count", "adoption_count", "reason", "badge"]
+    updated = 0
+    batch = []
+    for reward_obj in Reward.objects.all().iterator(chunk_size=batch_size):
+        row = totals.get(reward_obj.user_id, {})
+        reward_obj.points = row.get("total") or 0
+        reward_obj.rescue_count = row.get("rescues") or 0
+        reward_obj.adoption_count = row.get("adoptions") or 0
+        reward_obj.reason = build_reason(reward_obj.rescue_count, reward_obj.adoption_count)
+        reward_obj.badge = badge_for(reward_obj.points)
+        batch.append(reward_obj)
+        if len(batch) >= batch_size:
+            Reward.objects.bulk_update(batch, fields)
+            updated += len(batch)
+            batch = []
+    if batch:
+        Reward.objects.bulk_update(batch, fields)
+        updated += len(batch)
+    return updated
+
+
+# -------------------------
+# Leaderboard
+# -------------------------
+def invalidate_leaderboard():
+    cache.delete(LEADERBOARD_CACHE_KEY)
+
+
+def leaderboard_top(k):
+    """
+    Top ``k`` users by points with their competition rank (ties share a rank).
+
+    The top LEADERBOARD_MAX_K rows come from one indexed query and are cached
+    until any user's points change.
+    """
+    rows = cache.get(LEADERBOARD_CACHE_KEY)
+    if rows is None:
+        rows = []
+        queryset = (
+            RewardPoint.objects.order_by("-points", "id")
+            .values("user_id", "user__username", "points", "badge")[:LEADERBOARD_MAX_K]
+        )
+        rank = 0
+        previous_points = None
+        for position, row in enumerate(queryset, start=1):
+            if row["points"] != previous_points:
+                rank = position
+                previous_points = row["points"]
+            rows.append({
+                "rank": rank,
+                "user": row["user_id"],
+                "username": row["user__username"],
+                "points": row["points"],
+                "badge": row["badge"],
+            })
+        cache.set(LEADERBOARD_CACHE_KEY, rows, timeout=LEADERBOARD_CACHE_TIMEOUT)
+    return rows[:k]
+
+
+def rank_for(points):
+    """Competition rank for a points total: 1 + number of users strictly ahead (index range count)."""
+    return RewardPoint.objects.filter(points__gt=points).count() + 1
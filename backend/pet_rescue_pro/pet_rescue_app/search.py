@@ -0,0 +1,134 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Cast
+
+from .models import Pet
+
+# Fields searched, in weight order (A..D on Postgres, bm25 column weights on SQLite)
+SEARCH_FIELDS = ("name", "breed", "color", "city", "state", "description")
+SQLITE_FTS_TABLE = "pet_rescue_app_pet_fts"
+SQLITE_FTS_WEIGHTS = (10.0, 5.0, 5.0, 3.0, 3.0, 1.0)
+
+
+# -------------------------
+# Index maintenance
+# -------------------------
+# Postgres keeps Pet.search_vector current with a trigger (migration 0007).
+# SQLite (local runs and tests) mirrors pets into an FTS5 table from signals.
+def index_pet(pet):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = %s", [pet.pk])
+        cursor.execute(
+            f"INSERT INTO {SQLITE_FTS_TABLE} (rowid, {', '.join(SEARCH_FIELDS)}) "
+            f"VALUES (%s, {', '.join(['%s'] * len(SEARCH_FIELDS))})",
+            [pet.pk] + [getattr(pet, field) or "" for field in SEARCH_FIELDS],
+        )
+
+
+def unindex_pet(pet_id):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = %s", [pet_id])
+
+
+# -------------------------
+# Querying
+# -------------------------
+def _fts5_query(text):
+    # Quote every word so user input can never be parsed as FTS5 syntax; prefix-match the last one
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_pets(text, position=None, limit=20):
+    """
+    Ranked full-text search over pets, best match first.
+
+    ``position`` is the ``(rank, id)`` of the last row already returned (keyset
+    paging). Returns up to ``limit`` Pet objects, each with a ``rank`` attribute.
+    Backends without a full-text index (e.g. MySQL) get unranked substring
+    matches, newest pet first.
+    """
+    if connection.vendor == "postgresql":
+        return _search_postgres(text, position, limit)
+    if connection.vendor == "sqlite":
+        return _search_sqlite(text, position, limit)
+    return _search_orm(text, position, limit)
+
+
+def _pet_queryset():
+    return Pet.objects.select_related("pet_type", "created_by", "modified_by")
+
+
+def _search_postgres(text, position, limit):
+    query = SearchQuery(text, search_type="websearch", config="english")
+    queryset = (
+        _pet_queryset()
+        .filter(search_vector=query)  # GIN index
+        # ts_rank is a float4; cast so the cursor value round-trips exactly
+        .annotate(rank=Cast(SearchRank(F("search_vector"), query), FloatField()))
+    )
+    if position is not None:
+        rank, last_id = position
+        queryset = queryset.filter(Q(rank__lt=rank) | Q(rank=rank, id__lt=last_id))
+    return list(queryset.order_by("-rank", "-id")[:limit])
+
+
+def _search_sqlite(text, position, limit):
+    match = _fts5_query(text)
+    if match is None:
+        return []
+
+    weights = ", ".join(str(weight) for weight in SQLITE_FTS_WEIGHTS)
+    # bm25() is "lower is better"; negate it so rank sorts like Postgres
+    sql = (
+        f"SELECT rowid, score FROM ("
+        f"  SELECT rowid, -bm25({SQLITE_FTS_TABLE}, {weights}) AS score"
+        f"  FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s"
+        f")"
+    )
+    params = [match]
+    if position is not None:
+        rank, last_id = position
+        sql += " WHERE score < %s OR (score = %s AND rowid < %s)"
+        params += [rank, rank, last_id]
+    sql += " ORDER BY score DESC, rowid DESC LIMIT %s"
+    params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        ranked = cursor.fetchall()
+
+    pets = _pet_queryset().in_bulk([pet_id for pet_id, _ in ranked])
+    results = []
+    for pet_id, score in ranked:
+        pet = pets.get(pet_id)
+        if pet is not None:
+            pet.rank = score
+            results.append(pet)
+    return results
+
+
+def _search_orm(text, position, limit):
+    words = re.findall(r"\w+", text)
+    if not words:
+        return []
+    queryset = _pet_queryset()
+    # Every word in some field; no index helps here, so it is a scan
+    for word in words:
+        queryset = queryset.filter(Q(**{f"{field}__icontains": word for field in SEARCH_FIELDS}, _connector=Q.OR))
+    if position is not None:
+        _, last_id = position
+        queryset = queryset.filter(id__lt=last_id)
+    # Same constant rank for every row, so cursors from search_pets() still apply
+    return list(queryset.annotate(rank=Value(0.0, output_field=FloatField())).order_by("-id")[:limit])
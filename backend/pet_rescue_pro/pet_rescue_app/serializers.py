@@ -1,12 +1,31 @@
 from rest_framework import serializers
 from .models import (
     Profile, PetType, Pet, PetMedicalHistory,
-    PetReport, PetAdoption, Notification, RewardPoint, FeedbackStory, UserReport
+    PetReport, PetAdoption, Notification, RewardPoint, FeedbackStory, UserReport, PetMatch
 )
 from django.contrib.auth.hashers import make_password, check_password
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
+from .image_variants import parse_size, variant_url
+
+
+def image_url_for(file, context):
+    """
+    URL of an uploaded image (absolute when the request is in context).
+    List views can ask for a resized variant with ?image_size=<w>x<h>
+    (or context["image_size"]) instead of the original upload.
+    """
+    request = context.get("request")
+    size = context.get("image_size")
+    if size is None and request is not None and hasattr(request, "query_params"):
+        size = request.query_params.get("image_size")
+    size = parse_size(size) if size else None
+
+    url = variant_url(file.name, size) if size else file.url
+    return request.build_absolute_uri(url) if request else url
+
+
 # ---------------- ProfileSerializer ----------------
 class ProfileSerializer(serializers.ModelSerializer):
     profile_image = serializers.ImageField(required=False, allow_null=True)
@@ -66,7 +85,7 @@ class PetSerializer(serializers.ModelSerializer):
             if getattr(obj, "image", None):
                 # CHANGED: safe attempt to return absolute URL when request is provided
                 if request:
-                    return request.build_absolute_uri(obj.image.url)
+                    return image_url_for(obj.image, self.context)
                 return f"{settings.MEDIA_URL}{obj.image.name}"
         except Exception:
             # defensive: if obj.image exists but something odd happens, continue to fallback
@@ -79,7 +98,7 @@ class PetSerializer(serializers.ModelSerializer):
                 latest_report = reports_manager.order_by("-created_date").first()
                 if latest_report and getattr(latest_report, "image", None):
                     if request:
-                        return request.build_absolute_uri(latest_report.image.url)
+                        return image_url_for(latest_report.image, self.context)
                     # If no request in context, return relative/report url (best-effort)
                     return getattr(latest_report.image, "url", None)
         except Exception:
@@ -125,16 +144,17 @@ class PetReportSerializer(serializers.ModelSerializer):
         model = PetReport
         fields = [
             "id", "pet", "user", "pet_status", "report_status",
-            "image", "image_url", "is_resolved",
+            "image", "image_url", "image_status", "is_resolved",
             "created_date", "modified_date", "created_by", "modified_by","gender"
         ]
+        read_only_fields = ["image_status"]
 
     def get_image_url(self, obj):
         if not obj.image:
             return None
         request = self.context.get("request")
         if request:
-            return request.build_absolute_uri(obj.image.url)
+            return image_url_for(obj.image, self.context)
 
     def create(self, validated_data):
         request = self.context.get("request")
@@ -221,6 +241,18 @@ class NotificationSerializer(serializers.ModelSerializer):
             "created_at"
         ]
 
+    def to_representation(self, obj):
+        """
+        Read if flagged individually or covered by the receiver's read watermark.
+        Views listing one receiver's inbox pass ``read_watermark`` in the context;
+        with a request in the context it only applies to the requesting user's rows.
+        """
+        data = super().to_representation(obj)
+        request = self.context.get("request")
+        if not data["is_read"] and (request is None or obj.receiver_id == request.user.id):
+            data["is_read"] = obj.id <= self.context.get("read_watermark", 0)
+        return data
+
 
 
 # ---------------- Register ----------------
@@ -352,16 +384,25 @@ class AdminPetReportSerializer(serializers.ModelSerializer):
     class Meta:
         model = PetReport
         # ✅ Add 'image_url' to the list of fields
-        fields = ["id", "pet", "user", "pet_status", "report_status", "image_url", "created_date", "modified_date"]
+        fields = ["id", "pet", "user", "pet_status", "report_status", "image_url", "image_status", "created_date", "modified_date"]
 
     # ✅ Add this method to generate the full image URL
     def get_image_url(self, obj):
         if obj.image and hasattr(obj.image, 'url'):
             request = self.context.get("request")
             if request:
-                return request.build_absolute_uri(obj.image.url)
+                return image_url_for(obj.image, self.context)
         return None
 
+class PetMatchSerializer(serializers.ModelSerializer):
+    lost_report = AdminPetReportSerializer(read_only=True)
+    found_report = AdminPetReportSerializer(read_only=True)
+
+    class Meta:
+        model = PetMatch
+        fields = ["id", "score", "status", "details", "lost_report", "found_report", "created_at", "updated_at"]
+
+
 class UserAdoptionDetailSerializer(serializers.ModelSerializer):
     """
     Custom serializer for a user's adoption requests.
@@ -450,7 +491,7 @@ class FeedbackStorySerializer(serializers.ModelSerializer):
             return None
         request = self.context.get("request")
         if request:
-            return request.build_absolute_uri(obj.image.url)
+            return image_url_for(obj.image, self.context)
         return settings.MEDIA_URL + obj.image.name
     
 class UserReportSerializer(serializers.ModelSerializer):
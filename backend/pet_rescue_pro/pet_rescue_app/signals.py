@@ -0,0 +1,231 @@
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .models import Profile, Pet, PetType, PetReport, PetAdoption, RewardPoint, Notification, FeedbackStory
+from . import rewards, notifications, search, matching, image_jobs, conditional, response_cache
+
+
+def _deleted_with_user(origin):
+    # Deleting a Profile cascades to its reports/adoptions; its rewards go with it
+    model = getattr(origin, "model", type(origin))
+    return model is Profile
+
+
+# -------------------------
+# Admin recipient cache
+# -------------------------
+ADMIN_FLAGS = ("is_superuser", "is_staff", "is_active")
+
+
+@receiver(pre_save, sender=Profile)
+def remember_admin_flags(sender, instance, raw=False, **kwargs):
+    previous = None
+    if instance.pk and not instance._state.adding:
+        previous = sender.objects.filter(pk=instance.pk).values_list(*ADMIN_FLAGS).first()
+    instance._previous_admin_flags = previous
+
+
+@receiver(post_save, sender=Profile)
+def refresh_admin_recipients(sender, instance, created, **kwargs):
+    current = tuple(getattr(instance, flag) for flag in ADMIN_FLAGS)
+    previous = getattr(instance, "_previous_admin_flags", None)
+    if (created and instance.is_superuser) or (previous is not None and previous != current):
+        transaction.on_commit(notifications.invalidate_admin_recipients)
+
+
+@receiver(post_delete, sender=Profile)
+def drop_admin_recipient(sender, instance, **kwargs):
+    if instance.is_superuser:
+        transaction.on_commit(notifications.invalidate_admin_recipients)
+
+
+# -------------------------
+# Reward ledger
+# -------------------------
+@receiver(post_save, sender=Profile)
+def create_reward_row(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        RewardPoint.objects.get_or_create(user=instance, defaults={"reason": rewards.build_reason(0, 0)})
+
+
+@receiver(pre_save, sender=PetReport)
+def remember_previous_report_state(sender, instance, raw=False, **kwargs):
+    previous = None
+    if instance.pk and not instance._state.adding:
+        previous = sender.objects.filter(pk=instance.pk).values_list("pet_status", "report_status", "image").first()
+    instance._previous_statuses = previous[:2] if previous else None
+    instance._previous_image = previous[2] if previous else None
+
+
+@receiver(post_save, sender=PetReport)
+def update_report_rewards(sender, instance, created, raw=False, **kwargs):
+    if raw or (created and not rewards.report_earns_points(instance.pet_status, instance.report_status)):
+        return
+    rewards.sync_report_rewards(instance)
+
+
+# pre_delete: the ledger entries still point at the row, and the reversal
+# commits or rolls back with the delete
+@receiver(pre_delete, sender=PetReport)
+def reverse_report_rewards(sender, instance, origin=None, **kwargs):
+    if _deleted_with_user(origin):
+        return
+    rewards.sync_report_rewards(instance, deleting=True)
+
+
+@receiver(post_save, sender=PetAdoption)
+def update_adoption_rewards(sender, instance, created, raw=False, **kwargs):
+    if raw or (created and not rewards.adoption_earns_points(instance.status)):
+        return
+    rewards.sync_adoption_rewards(instance)
+
+
+@receiver(pre_delete, sender=PetAdoption)
+def reverse_adoption_rewards(sender, instance, origin=None, **kwargs):
+    if _deleted_with_user(origin):
+        return
+    rewards.sync_adoption_rewards(instance, deleting=True)
+
+
+# -------------------------
+# Unread notification counters
+# -------------------------
+@receiver(pre_save, sender=Notification)
+def remember_notification_read_state(sender, instance, raw=False, **kwargs):
+    previous = None
+    if instance.pk and not instance._state.adding:
+        previous = sender.objects.filter(pk=instance.pk).values_list("receiver_id", "is_read").first()
+    instance._previous_unread_receiver = previous[0] if previous and not previous[1] else None
+
+
+@receiver(post_save, sender=Notification)
+def update_unread_counter(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        if not instance.is_read:
+            transaction.on_commit(lambda: notifications.adjust_unread(instance.receiver_id, 1))
+        return
+    # Whether an updated row was still counted depends on the read watermark,
+    # so drop the affected counters and let the next poll recount.
+    previous_receiver = getattr(instance, "_previous_unread_receiver", None)
+    current_receiver = instance.receiver_id if not instance.is_read else None
+    if previous_receiver == current_receiver:
+        return
+    for user_id in {previous_receiver, current_receiver} - {None}:
+        transaction.on_commit(lambda user_id=user_id: notifications.reset_unread(user_id))
+
+
+@receiver(post_delete, sender=Notification)
+def drop_unread_counter(sender, instance, **kwargs):
+    if not instance.is_read and instance.receiver_id:
+        transaction.on_commit(lambda: notifications.reset_unread(instance.receiver_id))
+
+
+# -------------------------
+# Pet search index (SQLite FTS5 mirror; Postgres uses a trigger)
+# -------------------------
+@receiver(post_save, sender=Pet)
+def index_pet_for_search(sender, instance, raw=False, **kwargs):
+    search.index_pet(instance)
+
+
+@receiver(post_delete, sender=Pet)
+def unindex_pet_for_search(sender, instance, **kwargs):
+    search.unindex_pet(instance.pk)
+
+
+# -------------------------
+# Lost/found matching
+# -------------------------
+@receiver(pre_save, sender=Pet)
+def update_match_block(sender, instance, raw=False, **kwargs):
+    matching.refresh_block_key(instance)
+
+
+@receiver(post_save, sender=Pet)
+def rematch_pet_reports(sender, instance, created, raw=False, **kwargs):
+    # Edited details (breed, colour, location...) change the scores of open reports
+    if created or raw:
+        return
+    report_ids = PetReport.objects.filter(
+        pet=instance, pet_status__in=("Lost", "Found"), report_status__in=matching.OPEN_REPORT_STATUSES,
+    ).values_list("id", flat=True)
+    for report_id in report_ids:
+        transaction.on_commit(lambda report_id=report_id: matching.match_report(report_id))
+
+
+@receiver(post_save, sender=PetReport)
+def match_new_or_changed_report(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    current = (instance.pet_status, instance.report_status)
+    if created or getattr(instance, "_previous_statuses", None) != current:
+        transaction.on_commit(lambda: matching.match_report(instance.pk))
+
+
+# -------------------------
+# Background photo processing (orientation, metadata, variants, hashes)
+# -------------------------
+@receiver(post_save, sender=PetReport)
+def queue_report_image(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if not created and (instance.image.name or "") == (getattr(instance, "_previous_image", None) or ""):
+        return
+    if instance.image or instance.pet.image:
+        # Same transaction as the report: the worker only ever sees committed rows.
+        # Without a photo of its own the job only hashes the pet's.
+        image_jobs.enqueue(instance)
+    else:
+        image_jobs.set_image_status(instance, "None")
+
+
+@receiver(post_save, sender=Pet)
+def queue_pet_image_for_reports(sender, instance, created, raw=False, **kwargs):
+    # Reports without their own photo are hashed with the pet's; re-queue them when it changes
+    if created or raw or not instance.image:
+        return
+    reports = (
+        PetReport.objects.filter(pet=instance)
+        .filter(Q(image="") | Q(image__isnull=True))
+        .exclude(image_hash__image_name=instance.image.name)
+    )
+    for report in reports:
+        image_jobs.enqueue(report)
+
+
+# -------------------------
+# Conditional GET: deletions leave no timestamp, so remember when they happen
+# -------------------------
+@receiver(post_delete, sender=Pet)
+@receiver(post_delete, sender=PetReport)
+@receiver(post_delete, sender=PetAdoption)
+@receiver(post_delete, sender=Notification)
+@receiver(post_delete, sender=FeedbackStory)
+def record_listing_deletion(sender, **kwargs):
+    # After commit: a Last-Modified taken mid-transaction must not cover the delete
+    transaction.on_commit(lambda: conditional.record_deletion(sender))
+
+
+# -------------------------
+# Public response cache
+# -------------------------
+@receiver(post_save, sender=Pet)
+@receiver(post_save, sender=PetReport)
+@receiver(post_save, sender=PetAdoption)
+@receiver(post_save, sender=FeedbackStory)
+@receiver(post_save, sender=PetType)
+@receiver(post_delete, sender=Pet)
+@receiver(post_delete, sender=PetReport)
+@receiver(post_delete, sender=PetAdoption)
+@receiver(post_delete, sender=FeedbackStory)
+@receiver(post_delete, sender=PetType)
+def invalidate_public_responses(sender, raw=False, **kwargs):
+    if raw:
+        return
+    # On commit: a request rebuilding in between would otherwise cache the old rows
+    transaction.on_commit(lambda: response_cache.invalidate(sender))
+
@@ -0,0 +1,115 @@
+import hashlib
+import os
+import re
+import tempfile
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+from django.db.models import Q
+
+# Every upload lives under BLOB_DIR/<h[0:2]>/<h[2:4]>/<sha256><ext>: two levels
+# of 256 shards keep each directory at a few hundred files even with millions of blobs
+BLOB_DIR = "blobs"
+EXTENSION_ALIASES = {".jpeg": ".jpg", ".jpe": ".jpg", ".tif": ".tiff"}
+
+
+def media_fields():
+    """``(model, field_name)`` for every file/image field stored in MEDIA_ROOT."""
+    return [
+        (model, field.name)
+        for model in apps.get_models()
+        for field in model._meta.concrete_fields
+        if isinstance(field, models.FileField)
+    ]
+
+
+def is_referenced(name):
+    """True while any row (pet, report, story, profile...) still points at ``name``."""
+    return any(model._default_manager.filter(Q(**{field: name})).exists() for model, field in media_fields())
+
+
+def repoint(old_name, new_name):
+    """Make every row that references ``old_name`` reference ``new_name`` instead."""
+    for model, field in media_fields():
+        model._default_manager.filter(**{field: old_name}).update(**{field: new_name})
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File storage that names uploads after the SHA-256 of their bytes.
+
+    The same photo uploaded twice (a pet's and its report's, or the same
+    picture on several reports) is stored once and every row references
+    the same name. The hash is computed before anything is written, so a
+    duplicate upload costs no disk writes at all. Files are immutable: a
+    name always means the same bytes, which also keeps the resized variant
+    cache valid forever.
+
+    ``upload_to`` directories are ignored; only the upload's extension is kept.
+    ``delete`` never removes anything: collect_media_garbage removes blobs no
+    row references once they are past its age grace.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content (see _save), never from a suffix
+        return name
+
+    def blob_name(self, content, name):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk if isinstance(chunk, bytes) else chunk.encode())
+        content.seek(0)
+
+        extension = os.path.splitext(name)[1].lower()
+        extension = EXTENSION_ALIASES.get(extension, extension)
+        if not re.fullmatch(r"\.[a-z0-9]{1,8}", extension):
+            extension = ""
+        hexdigest = digest.hexdigest()
+        return f"{BLOB_DIR}/{hexdigest[:2]}/{hexdigest[2:4]}/{hexdigest}{extension}"
+
+    def _save(self, name, content):
+        name = self.blob_name(content, name)
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            # Identical bytes already stored. Touch it so collect_media_garbage's
+            # age grace covers the row about to reference it.
+            os.utime(full_path)
+            return name
+
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        # Write aside and rename: readers never see a partial blob, and two
+        # concurrent uploads of the same bytes simply replace each other
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in content.chunks():
+                    out.write(chunk if isinstance(chunk, bytes) else chunk.encode())
+            os.chmod(tmp_path, self.file_permissions_mode or 0o644)
+            os.replace(tmp_path, full_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return name
+
+    def delete(self, name):
+        # A concurrent upload of the same bytes may have been handed this name
+        # by _save without having committed its row yet, so no reference check
+        # made here can be trusted. Left to collect_media_garbage.
+        return
+
+    def purge(self, name, modified_time):
+        """
+        Remove ``name`` now if no row references it and it has not been
+        handed out again since it was last seen at ``modified_time`` (a dedup
+        hit in _save touches the file). Returns True if the file was removed.
+        """
+        try:
+            if self.get_modified_time(name) != modified_time or is_referenced(name):
+                return False
+        except FileNotFoundError:
+            return False
+        super().delete(name)
+        return True
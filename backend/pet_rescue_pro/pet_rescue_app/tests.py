@@ -1,3 +1,1509 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.db import connection
+from django.db.models import Q
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage, FileSystemStorage
+from django.core.cache import cache, caches
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command, CommandError
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from .models import (
+    Profile, PetType, Pet, PetReport, PetAdoption, Notification, PincodeCentroid, PetMatch, ReportImageHash, ImageJob,
+    FeedbackStory, OutboundEmail, RewardPoint, RewardLedgerEntry, PetMedicalHistory,
+)
+from .listings import report_listing_queryset
+from .search import search_pets, _search_orm
+from .geo import pincodes_within
+from . import image_hashing, image_variants, image_jobs, storage, conditional, response_cache, outbox, chatbot, rewards, notifications
+from .cache_backends import TwoTierCache
+from .model_client import ModelClient, ModelUnavailable, LatencyHistogram, UNAVAILABLE_REPLY
+from .utils import generate_otp, verify_otp
+
+
+# -------------------------
+# Query plan checks
+# -------------------------
+class QueryPlanAssertions:
+    """
+    Fail when a hot query can only be answered with a full table scan.
+
+    Postgres happily seq-scans tiny tables, so the check disables seq scans
+    for the session: if the planner still picks one, no usable index exists.
+    """
+
+    def assertNoFullScan(self, queryset, table):
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            plan = queryset.explain()
+            self.assertNotIn(f"Seq Scan on {table}", plan, plan)
+        elif connection.vendor == "sqlite":
+            plan = queryset.explain()
+            # "SCAN <table>" without "USING ... INDEX" is a full table scan
+            full_scan = re.search(rf"SCAN {table}(?! USING)", plan)
+            self.assertIsNone(full_scan, plan)
+        else:
+            self.skipTest(f"No plan check for {connection.vendor}")
+
+
+class ListingQueryPlanTests(QueryPlanAssertions, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Profile.objects.create_user("owner@example.com", "owner", "pw")
+        dog = PetType.objects.create(type="Dog")
+        for i in range(30):
+            pet = Pet.objects.create(name=f"Pet {i}", pet_type=dog, city="Pune")
+            PetReport.objects.create(
+                pet=pet,
+                user=cls.user,
+                pet_status="Lost" if i % 2 else "Found",
+                report_status="Accepted" if i % 3 else "Pending",
+            )
+            PetAdoption.objects.create(pet=pet, requestor=cls.user, status="Approved" if i % 2 else "Pending")
+            Notification.objects.create(sender=cls.user, receiver=cls.user, content="hi", is_read=bool(i % 2))
+
+    def test_public_report_listings_use_index(self):
+        for pet_status in ("Lost", "Found"):
+            qs = report_listing_queryset(pet_status=pet_status, report_status="Accepted").order_by("-created_date")
+            self.assertNoFullScan(qs, PetReport._meta.db_table)
+
+    def test_user_report_listing_uses_index(self):
+        qs = PetReport.objects.filter(user=self.user, pet_status="Lost", report_status="Accepted").order_by("-created_date")
+        self.assertNoFullScan(qs, PetReport._meta.db_table)
+
+    def test_unread_notifications_use_index(self):
+        qs = Notification.objects.filter(receiver=self.user, is_read=False)
+        self.assertNoFullScan(qs, Notification._meta.db_table)
+
+    def test_user_notifications_use_index(self):
+        qs = Notification.objects.filter(receiver=self.user).order_by("-created_at")
+        self.assertNoFullScan(qs, Notification._meta.db_table)
+
+    def test_adoption_lookups_use_index(self):
+        qs = PetAdoption.objects.filter(requestor=self.user, status="Approved")
+        self.assertNoFullScan(qs, PetAdoption._meta.db_table)
+        qs = PetAdoption.objects.filter(status="Approved").order_by("-created_date")
+        self.assertNoFullScan(qs, PetAdoption._meta.db_table)
+
+
+# -------------------------
+# Listing queries
+# -------------------------
+class ListingQueryCountTests(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Profile.objects.create_user("lister@example.com", "lister", "pw")
+        cls.dog = PetType.objects.create(type="Dog")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def add_reports(self, count):
+        for i in range(count):
+            pet = Pet.objects.create(name=f"Pet {i}", pet_type=self.dog, city="Pune")
+            PetMedicalHistory.objects.create(pet=pet, vaccination_name="Rabies")
+            PetMedicalHistory.objects.create(pet=pet, vaccination_name="Booster")
+            PetReport.objects.create(pet=pet, user=self.user, pet_status="Lost", report_status="Accepted")
+
+    def listing_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/lost-pet-request/")
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()["lost_pets"]
+
+    def test_query_count_does_not_grow_with_the_listing(self):
+        self.add_reports(2)
+        small, _ = self.listing_queries()
+        self.add_reports(8)
+        large, pets = self.listing_queries()
+        self.assertEqual(len(pets), 10)
+        self.assertEqual(large, small)
+
+    def test_first_medical_record_is_listed(self):
+        self.add_reports(1)
+        _, pets = self.listing_queries()
+        self.assertEqual(pets[0]["pet"]["medical_history"]["vaccination_name"], "Rabies")
+
+
+# -------------------------
+# Cursor pagination
+# -------------------------
+class CursorPaginationTests(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Profile.objects.create_user("pager@example.com", "pager", "pw")
+        dog = PetType.objects.create(type="Dog")
+        cls.reports = [
+            PetReport.objects.create(
+                pet=Pet.objects.create(name=f"Pet {i}", pet_type=dog), user=cls.user,
+                pet_status="Lost", report_status="Accepted",
+            )
+            for i in range(6)
+        ]
+        # Six reports within the same millisecond, 100µs apart
+        base = timezone.now().replace(microsecond=0)
+        for i, report in enumerate(cls.reports):
+            PetReport.objects.filter(pk=report.pk).update(created_date=base + timedelta(microseconds=100 * i))
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def pages(self, page_size):
+        ids, response = [], self.client.get("/api/pets-list/", {"tab": "lost", "page_size": page_size})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids.append([row["id"] for row in response.json()["results"]])
+            if response.json()["next_cursor"] is None:
+                return ids
+            response = self.client.get(
+                "/api/pets-list/", {"tab": "lost", "page_size": page_size, "cursor": response.json()["next_cursor"]},
+            )
+
+    def test_pages_walk_every_row_newest_first(self):
+        expected = [report.id for report in reversed(self.reports)]
+        pages = self.pages(2)
+        self.assertEqual([len(page) for page in pages], [2, 2, 2])
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_new_rows_do_not_shift_later_pages(self):
+        first = self.client.get("/api/pets-list/", {"tab": "lost", "page_size": 3}).json()
+        PetReport.objects.create(pet=self.reports[0].pet, user=self.user, pet_status="Lost", report_status="Accepted")
+        cache.clear()
+        second = self.client.get("/api/pets-list/", {"tab": "lost", "page_size": 3, "cursor": first["next_cursor"]}).json()
+        self.assertEqual(
+            [row["id"] for row in first["results"] + second["results"]],
+            [report.id for report in reversed(self.reports)],
+        )
+
+    def test_without_cursor_or_page_size_the_full_list_is_returned(self):
+        response = self.client.get("/api/pets-list/?tab=lost").json()
+        self.assertEqual(len(response["results"]), 6)
+        self.assertNotIn("next_cursor", response)
+
+    def test_invalid_cursor_is_rejected(self):
+        self.assertEqual(self.client.get("/api/pets-list/", {"tab": "lost", "cursor": "garbage"}).status_code, 404)
+
+
+# -------------------------
+# Rewards
+# -------------------------
+class RewardLedgerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Profile.objects.create_user("rescuer@example.com", "rescuer", "pw")
+        cls.dog = PetType.objects.create(type="Dog")
+
+    def report(self, **fields):
+        pet = Pet.objects.create(name="Pet", pet_type=self.dog)
+        return PetReport.objects.create(pet=pet, user=self.user, **{"pet_status": "Found", **fields})
+
+    def points(self):
+        reward = RewardPoint.objects.get(user=self.user)
+        return reward.points, reward.rescue_count, reward.adoption_count
+
+    def test_accepting_and_reverting_a_found_report(self):
+        report = self.report(report_status="Pending")
+        self.assertEqual(self.points(), (0, 0, 0))
+
+        report.report_status = "Accepted"
+        report.save()
+        report.save()  # saving again without a transition credits nothing
+        self.assertEqual(self.points(), (100, 1, 0))
+
+        report.report_status = "Rejected"
+        report.save()
+        self.assertEqual(self.points(), (0, 0, 0))
+        self.assertEqual(
+            list(RewardLedgerEntry.objects.filter(report=report).order_by("id").values_list("points", flat=True)),
+            [100, -100],
+        )
+
+    def test_deleting_a_credited_report_reverses_it(self):
+        report = self.report(report_status="Accepted")
+        self.report(report_status="Accepted")
+        self.assertEqual(self.points(), (200, 2, 0))
+        report.delete()
+        self.assertEqual(self.points(), (100, 1, 0))
+        self.assertEqual(RewardLedgerEntry.objects.filter(report__isnull=True).count(), 2)
+
+    def test_adoptions_earn_adopter_points(self):
+        pet = Pet.objects.create(name="Pet", pet_type=self.dog)
+        adoption = PetAdoption.objects.create(pet=pet, requestor=self.user, status="Approved")
+        self.assertEqual(self.points(), (50, 0, 1))
+        adoption.delete()
+        self.assertEqual(self.points(), (0, 0, 0))
+
+    def test_reseed_replaces_legacy_totals(self):
+        report = self.report(report_status="Accepted")
+        self.report(report_status="Pending")
+        # As left by the old compute-on-read code: a stored total and no ledger
+        RewardLedgerEntry.objects.all().delete()
+        RewardPoint.objects.filter(user=self.user).update(points=999, rescue_count=0, badge="Gold")
+
+        rewards.reseed_ledger()
+        rewards.rebuild_totals()
+        self.assertEqual(self.points(), (100, 1, 0))
+        self.assertEqual(RewardPoint.objects.get(user=self.user).badge, "Bronze")
+
+        report.report_status = "Accepted"
+        report.save()  # re-approving credits nothing twice
+        report.report_status = "Rejected"
+        report.save()
+        self.assertEqual(self.points(), (0, 0, 0))
+
+    def test_stale_saves_follow_the_committed_state(self):
+        report = self.report(report_status="Pending")
+        first, second = PetReport.objects.get(pk=report.pk), PetReport.objects.get(pk=report.pk)
+        first.report_status = second.report_status = "Accepted"
+        first.save()
+        second.save()
+        self.assertEqual(self.points(), (100, 1, 0))
+
+        # Another writer moved the row on before this instance's rewards were applied
+        PetReport.objects.filter(pk=report.pk).update(report_status="Pending")
+        rewards.sync_report_rewards(first)
+        rewards.sync_report_rewards(first)
+        self.assertEqual(self.points(), (0, 0, 0))
+
+
+class RewardListTests(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Profile.objects.create_superuser("admin@example.com", "admin", "pw")
+        cls.users = {}
+        for username, points in [("asha", 150), ("bala", 250), ("chen", 600), ("dev", 250)]:
+            user = Profile.objects.create_user(f"{username}@example.com", username, "pw")
+            reward = RewardPoint.objects.get(user=user)
+            reward.points = points
+            reward.update_badge()
+            reward.save()
+            cls.users[username] = user
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def usernames(self, **params):
+        response = self.client.get("/api/all-rewards/", params)
+        self.assertEqual(response.status_code, 200)
+        return [row["username"] for row in response.json()]
+
+    def test_filters_run_in_the_database(self):
+        self.assertEqual(self.usernames(badge="silver"), ["bala", "dev"])
+        self.assertEqual(self.usernames(min_points=200, max_points=300), ["bala", "dev"])
+        self.assertEqual(self.usernames(search="CHEN@"), ["chen"])
+        with self.assertNumQueries(1):
+            self.client.get("/api/all-rewards/", {"ordering": "-points"})
+
+    def test_ordering_and_cursor_pages(self):
+        self.assertEqual(self.usernames(ordering="-points"), ["chen", "dev", "bala", "asha", "admin"])
+        seen, params = [], {"ordering": "-points", "page_size": 2}
+        while True:
+            body = self.client.get("/api/all-rewards/", params).json()
+            seen += [row["username"] for row in body["results"]]
+            if body["next_cursor"] is None:
+                break
+            params["cursor"] = body["next_cursor"]
+        self.assertEqual(seen, ["chen", "dev", "bala", "asha", "admin"])
+
+    def test_bad_points_range_is_rejected(self):
+        self.assertEqual(self.client.get("/api/all-rewards/", {"min_points": "lots"}).status_code, 400)
+
+
+class LeaderboardTests(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dog = PetType.objects.create(type="Dog")
+        cls.users = {}
+        for username, points in [("asha", 150), ("bala", 250), ("chen", 600), ("dev", 250), ("esha", 0)]:
+            user = Profile.objects.create_user(f"{username}@example.com", username, "pw")
+            RewardPoint.objects.filter(user=user).update(points=points)
+            cls.users[username] = user
+
+    def setUp(self):
+        cache.clear()
+
+    def leaderboard(self, username, **params):
+        self.client.force_authenticate(self.users[username])
+        return self.client.get("/api/leaderboard/", params).json()
+
+    def test_ties_share_a_rank(self):
+        body = self.leaderboard("asha", k=4)
+        self.assertEqual(
+            [(row["username"], row["rank"]) for row in body["top"]],
+            [("chen", 1), ("bala", 2), ("dev", 2), ("asha", 4)],
+        )
+        self.assertEqual(body["me"]["rank"], 4)
+        self.assertEqual(self.leaderboard("dev")["me"]["rank"], 2)
+        self.assertEqual(self.leaderboard("esha", k=1)["me"]["rank"], 5)
+
+    def test_top_is_cached_until_points_change(self):
+        self.leaderboard("asha")
+        with self.assertNumQueries(2):  # caller's reward row + rank count
+            self.leaderboard("asha")
+
+        pet = Pet.objects.create(name="Pet", pet_type=self.dog)
+        with self.captureOnCommitCallbacks(execute=True):
+            PetReport.objects.create(pet=pet, user=self.users["esha"], pet_status="Found", report_status="Accepted")
+        top = self.leaderboard("esha")["top"]
+        self.assertIn(("esha", 100), [(row["username"], row["points"]) for row in top])
+
+
+# -------------------------
+# Notifications
+# -------------------------
+class NotificationTests(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Profile.objects.create_user("reader@example.com", "reader", "pw")
+        cls.other = Profile.objects.create_user("other@example.com", "other", "pw")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def notify(self, receiver=None, count=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            return [Notification.objects.create(sender=self.other, receiver=receiver or self.user, content="hi") for _ in range(count)]
+
+    def read_flags(self, url, key):
+        return {item["id"]: item["is_read"] for item in self.client.get(url).json()[key]}
+
+    def unread(self):
+        return self.client.get("/api/notifications/unread-count/").json()["unread_count"]
+
+    def test_unread_count_is_served_from_the_counter(self):
+        self.notify(count=2)
+        self.assertEqual(self.unread(), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(notifications.unread_count(self.user), 2)
+
+        self.notify()
+        with self.assertNumQueries(0):
+            self.assertEqual(notifications.unread_count(self.user), 3)
+
+    def test_reading_or_deleting_resets_the_counter(self):
+        first, second = self.notify(count=2)
+        self.assertEqual(self.unread(), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f"/api/notifications/{first.id}/mark_as_read/")
+        self.assertEqual(self.unread(), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertEqual(self.unread(), 0)
+
+    def test_reconcile_fixes_a_drifted_counter(self):
+        self.notify(count=2)
+        self.assertEqual(self.unread(), 2)
+        Notification.objects.filter(receiver=self.user).update(is_read=True)  # no signals
+        self.assertEqual(self.unread(), 2)
+        call_command("reconcile_notification_counts", stdout=io.StringIO())
+        self.assertEqual(self.unread(), 0)
+
+    def test_mark_all_read_is_reflected_by_both_listings(self):
+        ids = {notification.id for notification in self.notify(count=3)}
+        self.client.post("/api/notifications/mark-all-read/", {}, format="json")
+
+        listed = {item["id"]: item["is_read"] for item in self.client.get("/api/notifications/").json()}
+        self.assertEqual({i for i, is_read in listed.items() if is_read}, ids)
+        self.assertEqual(set(self.read_flags("/api/get-notifications/", "notifications")), ids)
+        self.assertTrue(all(self.read_flags("/api/get-notifications/", "notifications").values()))
+
+    def test_watermark_is_clamped_to_existing_notifications(self):
+        first = self.notify()[0]
+        response = self.client.post("/api/notifications/mark-all-read/", {"up_to": first.id + 100}, format="json").json()
+        self.assertEqual(response, {"read_up_to": first.id, "unread_count": 0})
+
+        later = self.notify()[0]
+        self.assertEqual(self.read_flags("/api/get-notifications/", "notifications"), {first.id: True, later.id: False})
+        self.assertEqual(self.client.get("/api/notifications/unread-count/").json(), {"unread_count": 1})
+
+    def test_watermark_never_moves_back(self):
+        first, second = self.notify(count=2)
+        self.client.post("/api/notifications/mark-all-read/", {}, format="json")
+        response = self.client.post("/api/notifications/mark-all-read/", {"up_to": first.id}, format="json").json()
+        self.assertEqual(response["read_up_to"], second.id)
+
+    def test_is_read_can_be_patched(self):
+        notification = self.notify()[0]
+        response = self.client.patch(f"/api/notifications/{notification.id}/", {"is_read": True}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["is_read"])
+        notification.refresh_from_db()
+        self.assertTrue(notification.is_read)
+
+    def test_watermark_does_not_mark_other_receivers_read(self):
+        theirs = self.notify(receiver=self.other)[0]
+        self.notify()
+        self.client.post("/api/notifications/mark-all-read/", {}, format="json")
+        listed = {item["id"]: item["is_read"] for item in self.client.get("/api/notifications/").json()}
+        self.assertFalse(listed[theirs.id])
+
+
+class AdminFanOutTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Profile.objects.create_user("reporter@example.com", "reporter", "pw")
+        cls.admins = [Profile.objects.create_superuser(f"admin{i}@example.com", f"admin{i}", "pw") for i in range(3)]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_one_insert_for_every_admin(self):
+        notifications.admin_recipient_ids()  # warm the recipient cache
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                created = notifications.notify_admins(self.user, "New lost pet report")
+        self.assertEqual(len(created), 3)
+        self.assertEqual(len([q for q in queries if q["sql"].startswith("INSERT")]), 1)
+        self.assertEqual(sorted(n.receiver_id for n in created), [admin.id for admin in self.admins])
+
+    def test_counters_follow_the_bulk_insert(self):
+        self.assertEqual(notifications.unread_count(self.admins[0]), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            notifications.notify_admins(self.user, "New found pet report")
+        with self.assertNumQueries(0):
+            self.assertEqual(notifications.unread_count(self.admins[0]), 1)
+
+    def test_recipient_cache_follows_admin_flags(self):
+        self.assertEqual(len(notifications.admin_recipient_ids()), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admins[0].is_active = False
+            self.admins[0].save()
+            Profile.objects.create_superuser("admin9@example.com", "admin9", "pw")
+        self.assertEqual(len(notifications.admin_recipient_ids()), 3)
+        self.assertNotIn(self.admins[0].id, notifications.admin_recipient_ids())
+
+
+# -------------------------
+# Pet search
+# -------------------------
+class PetSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        dog = PetType.objects.create(type="Dog")
+        for i in range(6):
+            Pet.objects.create(name=f"Bruno {i}", pet_type=dog, breed="Labrador", city="Pune")
+        Pet.objects.create(name="Labrador", pet_type=dog, breed="Beagle", city="Mumbai")
+        Pet.objects.create(name="Tom", pet_type=dog, breed="Persian", city="Pune")
+
+    def test_results_are_ranked_and_cursor_paged(self):
+        seen = []
+        url = "/api/pets/search/?q=labrador&page_size=4"
+        while url:
+            body = self.client.get(url).json()
+            seen += [item["id"] for item in body["results"]]
+            url = body["next"]
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len(set(seen)), 7)
+        # A name match outweighs a breed match
+        self.assertEqual(Pet.objects.get(pk=seen[0]).name, "Labrador")
+
+    def test_index_follows_edits_and_deletes(self):
+        pet = Pet.objects.get(name="Tom")
+        pet.name = "Whiskers"
+        pet.save()
+        self.assertEqual([p.pk for p in search_pets("whiskers")], [pet.pk])
+        self.assertEqual(search_pets("tom"), [])
+        pet.delete()
+        self.assertEqual(search_pets("whiskers"), [])
+
+    def test_query_is_required(self):
+        self.assertEqual(self.client.get("/api/pets/search/").status_code, 400)
+
+    def test_fallback_matches_every_word_newest_first(self):
+        expected = list(Pet.objects.filter(breed="Labrador", city="Pune").order_by("-id").values_list("id", flat=True))
+        self.assertEqual([pet.id for pet in _search_orm("labra pune", None, 20)], expected)
+        page = _search_orm("labra pune", (0.0, expected[2]), 2)
+        self.assertEqual([pet.id for pet in page], expected[3:5])
+        self.assertEqual(_search_orm("!!", None, 20), [])
+
+
+# -------------------------
+# Pincode proximity
+# -------------------------
+class PincodeProximityTests(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Profile.objects.create_user("near@example.com", "near", "pw", pincode=411016)
+        PincodeCentroid.objects.bulk_create([
+            PincodeCentroid(pincode=411005, latitude=18.5308, longitude=73.8475),
+            PincodeCentroid(pincode=411016, latitude=18.5371, longitude=73.8320),
+            PincodeCentroid(pincode=411028, latitude=18.5089, longitude=73.9260),
+            PincodeCentroid(pincode=400001, latitude=18.9388, longitude=72.8354),
+        ])
+        dog = PetType.objects.create(type="Dog")
+        for pincode in (411005, 411016, 411028, 400001, None):
+            pet = Pet.objects.create(name=f"Pet {pincode}", pet_type=dog, pincode=pincode)
+            PetReport.objects.create(pet=pet, user=cls.user, pet_status="Lost", report_status="Accepted")
+
+    def test_radius_filters_by_exact_distance(self):
+        # 400001 (Mumbai) is far outside; 411028 is inside the bounding box of a 5 km search but ~10 km away
+        self.assertEqual(set(pincodes_within(411005, 5)), {411005, 411016})
+        self.assertEqual(set(pincodes_within(411005, 10)), {411005, 411016, 411028})
+
+    def test_listing_near_profile_pincode(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get("/api/lost-pet-request/", {"radius_km": 3})
+        pets = {item["pet"]["name"]: item["pet"]["distance_km"] for item in response.json()["lost_pets"]}
+        self.assertEqual(pets, {"Pet 411016": 0.0, "Pet 411005": 1.78})
+
+    def test_unknown_pincode_is_rejected(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get("/api/lost-pet-request/", {"near": 999999, "radius_km": 5})
+        self.assertEqual(response.status_code, 400)
+
+
+# -------------------------
+# Lost/found matching
+# -------------------------
+class PetMatchingTests(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Profile.objects.create_user("owner@example.com", "owner", "pw")
+        cls.admin = Profile.objects.create_superuser("admin@example.com", "admin", "pw")
+        cls.dog = PetType.objects.create(type="Dog")
+
+    def report(self, pet_status, **pet_fields):
+        pet = Pet.objects.create(name="Pet", pet_type=self.dog, **pet_fields)
+        with self.captureOnCommitCallbacks(execute=True):
+            return PetReport.objects.create(pet=pet, user=self.user, pet_status=pet_status)
+
+    def test_found_report_is_matched_within_its_block_only(self):
+        lost = self.report("Lost", breed="Labrador", color="Brown", city="Pune", pincode=411005)
+        self.report("Lost", breed="Labrador", color="Brown", city="Mumbai", pincode=400001)
+        found = self.report("Found", breed="Labrador", color="Brown", city="Pune", pincode=411005)
+
+        self.assertEqual(
+            list(PetMatch.objects.values_list("lost_report", "found_report")),
+            [(lost.id, found.id)],
+        )
+
+    def test_pincode_and_city_only_reports_meet_in_either_order(self):
+        self.report("Lost", breed="Indie", color="Black", city="Pune", pincode=411016)
+        self.report("Found", breed="Indie", color="Black", city="Pune")
+        self.assertEqual(PetMatch.objects.count(), 1)
+
+        PetMatch.objects.all().delete()
+        PetReport.objects.all().delete()
+        self.report("Lost", breed="Indie", color="Black", city="Pune")
+        self.report("Found", breed="Indie", color="Black", city=" pune ", pincode=411016)
+        self.assertEqual(PetMatch.objects.count(), 1)
+
+    def test_closing_a_report_drops_its_suggestions(self):
+        self.report("Lost", breed="Beagle", color="White", city="Pune")
+        found = self.report("Found", breed="Beagle", color="White", city="Pune")
+        self.assertEqual(PetMatch.objects.count(), 1)
+
+        found.report_status = "Resolved"
+        with self.captureOnCommitCallbacks(execute=True):
+            found.save()
+        self.assertEqual(PetMatch.objects.count(), 0)
+
+    def test_admin_list_is_ranked(self):
+        self.report("Lost", breed="Beagle", color="White", city="Pune")
+        self.report("Lost", breed="Beagle", color="Black", city="Pune")
+        self.report("Found", breed="Beagle", color="White", city="Pune")
+
+        self.client.force_authenticate(self.admin)
+        scores = [item["score"] for item in self.client.get("/api/admin/matches/").json()]
+        self.assertEqual(len(scores), 2)
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+
+# -------------------------
+# Perceptual image hashes
+# -------------------------
+class ImageHashSearchTests(QueryPlanAssertions, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = Profile.objects.create_user("owner@example.com", "owner", "pw")
+        dog = PetType.objects.create(type="Dog")
+        cls.base = 0x9F3C_5A1E_7700_C3B2
+        for offset in range(20):
+            report = PetReport.objects.create(pet=Pet.objects.create(name="Pet", pet_type=dog), user=user, pet_status="Found")
+            # Report n differs from the base hash in n bits, spread over the chunks
+            value = cls.base
+            for bit in range(offset):
+                value ^= 1 << ((bit * 17) % 64)
+            parts = image_hashing.chunks(value)
+            ReportImageHash.objects.create(
+                report=report, image_name=f"r{offset}.jpg", ahash=0, dhash=image_hashing.to_signed(value),
+                dhash_0=parts[0], dhash_1=parts[1], dhash_2=parts[2], dhash_3=parts[3],
+            )
+
+    def test_radius_query_matches_brute_force(self):
+        for radius in (0, 3, 8, 15):
+            found = [distance for _, distance in image_hashing.similar_hashes(self.base, radius)]
+            self.assertEqual(found, list(range(radius + 1)))
+
+    def test_radius_query_uses_chunk_indexes(self):
+        lookup = Q(dhash_0__in=[1, 2]) | Q(dhash_1__in=[3]) | Q(dhash_2__in=[4]) | Q(dhash_3__in=[5])
+        self.assertNoFullScan(ReportImageHash.objects.filter(lookup), ReportImageHash._meta.db_table)
+
+
+# -------------------------
+# Resized image variants
+# -------------------------
+class ResizedMediaTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root, IMAGE_VARIANT_CACHE_DIR=os.path.join(media_root, ".variants"))
+        override.enable()
+        self.addCleanup(override.disable)
+
+        upload = io.BytesIO()
+        Image.new("RGB", (1600, 1200), (200, 120, 40)).save(upload, "JPEG")
+        self.name = default_storage.save("pet_images/big.jpg", ContentFile(upload.getvalue()))
+
+    def fetch(self, url, **headers):
+        response = self.client.get(url, **headers)
+        return response, b"".join(response.streaming_content) if response.status_code == 200 else b""
+
+    def test_variant_is_downscaled_and_negotiated(self):
+        url = image_variants.variant_url(self.name, (400, 400))
+
+        response, body = self.fetch(url, HTTP_ACCEPT="image/webp,*/*")
+        self.assertEqual(response["Content-Type"], "image/webp")
+        self.assertEqual(Image.open(io.BytesIO(body)).size, (400, 300))
+
+        response, body = self.fetch(url)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertEqual(Image.open(io.BytesIO(body)).size, (400, 300))
+
+    def test_only_whitelisted_sizes_and_media_paths(self):
+        self.assertEqual(self.fetch(f"/media/r/123x77/{self.name}")[0].status_code, 400)
+        self.assertEqual(self.fetch("/media/r/200x200/../manage.py")[0].status_code, 400)
+        self.assertEqual(self.fetch("/media/r/200x200/pet_images/missing.jpg")[0].status_code, 404)
+
+
+# -------------------------
+# Background photo processing
+# -------------------------
+class ImageJobTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root, IMAGE_VARIANT_CACHE_DIR=os.path.join(media_root, ".variants"))
+        override.enable()
+        self.addCleanup(override.disable)
+
+        # Portrait phone photo: stored landscape with an orientation tag and a GPS position
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x8825] = {2: (18.0, 31.0, 0.0)}
+        upload = io.BytesIO()
+        Image.new("RGB", (400, 200), (30, 160, 90)).save(upload, "JPEG", exif=exif.tobytes())
+        self.original = name = default_storage.save("report_images/phone.jpg", ContentFile(upload.getvalue()))
+
+        user = Profile.objects.create_user("owner@example.com", "owner", "pw")
+        pet = Pet.objects.create(name="Rex", pet_type=PetType.objects.create(type="Dog"))
+        self.report = PetReport.objects.create(pet=pet, user=user, pet_status="Lost", image=name)
+
+    def test_saving_a_report_queues_its_photo(self):
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.image_status, "Pending")
+        self.assertEqual(self.report.image_job.status, "Queued")
+
+    def test_reports_without_any_photo_queue_nothing(self):
+        pet = Pet.objects.create(name="Tom", pet_type=self.report.pet.pet_type)
+        with CaptureQueriesContext(connection) as queries:
+            report = PetReport.objects.create(pet=pet, user=self.report.user, pet_status="Found")
+        self.assertFalse(ImageJob.objects.filter(report=report).exists())
+        self.assertEqual(report.image_status, "None")
+        self.assertFalse(any("pet_rescue_app_imagejob" in q["sql"] for q in queries))
+
+    def test_job_strips_metadata_and_indexes_the_photo(self):
+        job_ids = image_jobs.claim_jobs(10)
+        self.assertEqual(job_ids, [self.report.image_job.pk])
+        self.assertTrue(image_jobs.run_job(job_ids[0]))
+
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.image_status, "Ready")
+        self.assertEqual(ImageJob.objects.get(pk=job_ids[0]).status, "Done")
+        with default_storage.open(self.report.image.name) as f, Image.open(f) as image:
+            self.assertEqual(image.size, (200, 400))
+            self.assertEqual(len(image.getexif()), 0)
+        self.assertFalse(default_storage.exists(self.original))
+        self.assertEqual(ReportImageHash.objects.get(report=self.report).image_name, self.report.image.name)
+
+    def test_failed_job_is_retried_later(self):
+        os.remove(default_storage.path(self.report.image.name))  # storage keeps referenced blobs
+        job_id = image_jobs.claim_jobs(10)[0]
+        self.assertFalse(image_jobs.run_job(job_id))
+
+        job = ImageJob.objects.get(pk=job_id)
+        self.assertEqual(job.status, "Queued")
+        self.assertIn("FileNotFoundError", job.last_error)
+        self.assertEqual(image_jobs.claim_jobs(10), [])  # backing off
+
+    def test_jobs_that_keep_timing_out_give_up(self):
+        job = self.report.image_job
+        stale = timezone.now() - image_jobs.JOB_TIMEOUT - timedelta(seconds=1)
+        ImageJob.objects.filter(pk=job.pk).update(status="Running", claimed_at=stale, attempts=image_jobs.JOB_MAX_ATTEMPTS - 1)
+        self.assertEqual(image_jobs.claim_jobs(10), [job.pk])  # re-queued and claimed again
+
+        ImageJob.objects.filter(pk=job.pk).update(claimed_at=stale)
+        self.assertEqual(image_jobs.claim_jobs(10), [])
+        self.assertEqual(ImageJob.objects.get(pk=job.pk).status, "Failed")
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.image_status, "Failed")
+
+    def test_jobs_left_running_by_a_dead_worker_are_failed(self):
+        job_id = image_jobs.claim_jobs(10)[0]
+        self.assertEqual(image_jobs.fail_running([job_id], "Worker process died"), 1)
+        job = ImageJob.objects.get(pk=job_id)
+        self.assertEqual((job.status, job.last_error), ("Queued", "Worker process died"))
+        self.assertEqual(image_jobs.fail_running([job_id], "Worker process died"), 0)
+
+
+# -------------------------
+# Content-addressed media storage
+# -------------------------
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root, IMAGE_VARIANT_CACHE_DIR=os.path.join(self.media_root, ".variants"))
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = Profile.objects.create_user("owner@example.com", "owner", "pw")
+        self.dog = PetType.objects.create(type="Dog")
+
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, filename), self.media_root).replace(os.sep, "/")
+            for root, _, files in os.walk(self.media_root)
+            for filename in files
+            if ".variants" not in root
+        )
+
+    def test_identical_uploads_are_stored_once(self):
+        first = default_storage.save("pet_images/dog.JPEG", ContentFile(b"same bytes"))
+        second = default_storage.save("report_images/other.jpeg", ContentFile(b"same bytes"))
+        third = default_storage.save("report_images/dog.jpg", ContentFile(b"other bytes"))
+
+        self.assertEqual(first, second)
+        self.assertRegex(first, r"^blobs/([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}\.jpg$")
+        self.assertNotEqual(first, third)
+        self.assertEqual(self.stored_files(), sorted([first, third]))
+
+    def test_shared_blob_survives_until_last_reference_is_gone(self):
+        name = default_storage.save("pet_images/dog.jpg", ContentFile(b"photo"))
+        pet = Pet.objects.create(name="Rex", pet_type=self.dog, image=name)
+        self.user.profile_image = name
+        self.user.save()
+        seen = default_storage.get_modified_time(name)
+
+        self.assertFalse(default_storage.purge(name, seen))
+        self.assertTrue(default_storage.exists(name))
+
+        Pet.objects.filter(pk=pet.pk).update(image=None)
+        self.user.profile_image = None
+        self.user.save()
+        self.assertTrue(default_storage.purge(name, seen))
+        self.assertFalse(default_storage.exists(name))
+
+    def test_blob_handed_to_a_new_upload_is_never_removed(self):
+        name = default_storage.save("pet_images/dog.jpg", ContentFile(b"photo"))
+        seen = default_storage.get_modified_time(name)
+        old = seen.timestamp() - 3600
+        os.utime(default_storage.path(name), (old, old))
+        seen = default_storage.get_modified_time(name)
+
+        # Another upload of the same bytes, its row not committed yet
+        self.assertEqual(default_storage.save("report_images/dog.jpg", ContentFile(b"photo")), name)
+
+        default_storage.delete(name)
+        self.assertFalse(default_storage.purge(name, seen))
+        self.assertTrue(default_storage.exists(name))
+
+    def test_dedupe_media_merges_legacy_uploads(self):
+        legacy = FileSystemStorage(location=self.media_root)
+        pet_name = legacy.save("pet_images/a.jpg", ContentFile(b"photo"))
+        report_name = legacy.save("report_images/b.jpg", ContentFile(b"photo"))
+        pet = Pet.objects.create(name="Rex", pet_type=self.dog, image=pet_name)
+        report = PetReport.objects.create(pet=pet, user=self.user, pet_status="Lost", image=report_name)
+
+        call_command("dedupe_media", stdout=io.StringIO())
+
+        pet.refresh_from_db()
+        report.refresh_from_db()
+        self.assertTrue(pet.image.name.startswith(f"{storage.BLOB_DIR}/"))
+        self.assertEqual(report.image.name, pet.image.name)
+        self.assertEqual(self.stored_files(), [pet.image.name])
+
+
+# -------------------------
+# Orphaned media collection
+# -------------------------
+class CollectMediaGarbageTests(QueryPlanAssertions, TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.quarantine = tempfile.mkdtemp()
+        for path in (self.media_root, self.quarantine):
+            self.addCleanup(shutil.rmtree, path, ignore_errors=True)
+        override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            IMAGE_VARIANT_CACHE_DIR=os.path.join(self.media_root, ".variants"),
+            MEDIA_QUARANTINE_DIR=self.quarantine,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+        user = Profile.objects.create_user("owner@example.com", "owner", "pw")
+        self.kept = default_storage.save("pet_images/kept.jpg", ContentFile(b"kept"))
+        Pet.objects.create(name="Rex", pet_type=PetType.objects.create(type="Dog"), image=self.kept)
+        self.orphan = default_storage.save("report_images/orphan.jpg", ContentFile(b"orphan"))
+        self.fresh = default_storage.save("report_images/fresh.jpg", ContentFile(b"fresh"))
+        day_ago = time.time() - 2 * 86400
+        for name in (self.kept, self.orphan):
+            os.utime(default_storage.path(name), (day_ago, day_ago))
+
+    def collect(self, *args):
+        out = io.StringIO()
+        call_command("collect_media_garbage", "--batch-size=1", *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_lists_only_old_unreferenced_files(self):
+        output = self.collect("--dry-run")
+        self.assertIn(self.orphan, output)
+        self.assertNotIn(self.kept, output)
+        self.assertNotIn(self.fresh, output)
+        self.assertTrue(default_storage.exists(self.orphan))
+
+    def test_orphans_are_quarantined_or_deleted(self):
+        self.collect()
+        self.assertFalse(default_storage.exists(self.orphan))
+        self.assertTrue(default_storage.exists(self.kept))
+        self.assertTrue(default_storage.exists(self.fresh))
+        quarantined = [os.path.join(root, f) for root, _, files in os.walk(self.quarantine) for f in files]
+        self.assertEqual(len(quarantined), 1)
+        self.assertTrue(quarantined[0].endswith(self.orphan))
+
+        os.utime(default_storage.path(self.fresh), (0, 0))
+        self.collect("--delete")
+        self.assertFalse(default_storage.exists(self.fresh))
+        self.assertTrue(default_storage.exists(self.kept))
+
+    def test_reference_lookup_uses_image_index(self):
+        self.assertNoFullScan(PetReport.objects.filter(image__in=["a.jpg", "b.jpg"]), PetReport._meta.db_table)
+
+
+# -------------------------
+# Conditional GET
+# -------------------------
+class ConditionalGetTests(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        cache.clear()
+        self.user = Profile.objects.create_user("owner@example.com", "owner", "pw")
+        self.client.force_authenticate(self.user)
+        dog = PetType.objects.create(type="Dog")
+        self.report = PetReport.objects.create(
+            pet=Pet.objects.create(name="Rex", pet_type=dog), user=self.user, pet_status="Lost", report_status="Accepted",
+        )
+        self.story = FeedbackStory.objects.create(user=self.user, title="Home", story="Found again", pet_name="Rex")
+
+    def test_unchanged_listing_is_a_304_without_serializing(self):
+        first = self.client.get("/api/pets-list/?tab=lost")
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first["ETag"].startswith('W/"'))
+        self.assertIn("no-cache", first["Cache-Control"])
+
+        with self.assertNumQueries(1):  # the aggregate (plus the deletion marker from the cache)
+            second = self.client.get("/api/pets-list/?tab=lost", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b"")
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_edits_and_nested_edits_change_the_etag(self):
+        etag = self.client.get("/api/pets-list/?tab=lost")["ETag"]
+        self.report.pet.breed = "Beagle"
+        self.report.pet.save()
+        response = self.client.get("/api/pets-list/?tab=lost", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        etag = self.client.get("/api/get-notifications/")["ETag"]
+        Notification.objects.create(sender=self.user, receiver=self.user, content="hi")
+        self.assertEqual(self.client.get("/api/get-notifications/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_marking_notifications_read_is_never_a_stale_304(self):
+        Notification.objects.create(sender=self.user, receiver=self.user, content="hi")
+        first = self.client.get("/api/get-notifications/")
+        self.assertFalse(first.has_header("Last-Modified"))
+
+        self.client.post("/api/notifications/mark-all-read/", {}, format="json")
+        response = self.client.get("/api/get-notifications/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["notifications"][0]["is_read"])
+
+    def test_deletion_invalidates_both_validators(self):
+        # Pretend the last change was a while ago, so a delete now lands in a later second
+        cache.set(conditional._deleted_at_key(FeedbackStory), 1_000_000_000, None)
+        FeedbackStory.objects.filter(pk=self.story.pk).update(submitted_at="2020-01-01T00:00:00Z")
+        other = FeedbackStory.objects.create(user=self.user, title="Again", story="...", pet_name="Tom")
+        FeedbackStory.objects.filter(pk=other.pk).update(submitted_at="2020-01-01T00:00:00Z")
+        Profile.objects.filter(pk=self.user.pk).update(updated_at="2020-01-01T00:00:00Z")
+
+        first = self.client.get("/api/feedback-stories/")
+        self.assertEqual(
+            self.client.get("/api/feedback-stories/", HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]).status_code, 304,
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertEqual(self.client.get("/api/feedback-stories/", HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 200)
+        self.assertEqual(
+            self.client.get("/api/feedback-stories/", HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]).status_code, 200,
+        )
+
+
+# -------------------------
+# Public response cache
+# -------------------------
+class ResponseCacheTests(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        cache.clear()
+        self.dog = PetType.objects.create(type="Dog")
+        Pet.objects.create(name="Rex", pet_type=self.dog)
+
+    def test_warm_hit_and_revalidation_touch_no_database(self):
+        first = self.client.get("/api/pets/recent/")
+        self.assertEqual([pet["name"] for pet in first.json()["recent_pets"]], ["Rex"])
+
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/pets/recent/")
+            not_modified = self.client.get("/api/pets/recent/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_writes_invalidate_on_commit(self):
+        self.client.get("/api/pets/recent/")
+        with self.captureOnCommitCallbacks(execute=True):
+            Pet.objects.create(name="Tom", pet_type=self.dog)
+        names = [pet["name"] for pet in self.client.get("/api/pets/recent/").json()["recent_pets"]]
+        self.assertEqual(sorted(names), ["Rex", "Tom"])
+
+    def test_query_params_are_cached_separately(self):
+        self.client.get("/api/pets/recent/")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/pets/recent/?image_size=200x200")
+        self.assertTrue(queries.captured_queries)
+        with self.assertNumQueries(0):
+            self.client.get("/api/pets/recent/?image_size=200x200")
+
+    def test_concurrent_misses_recompute_once(self):
+        calls = []
+        release = threading.Event()
+
+        def build():
+            calls.append(1)
+            release.wait(5)
+            return None, Response({"ok": True})
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(response_cache.get_or_build("response_cache:test", build)[0]))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([entry["data"] for entry in results], [{"ok": True}] * 5)
+
+
+# -------------------------
+# Two-tier cache
+# -------------------------
+class TwoTierCacheTests(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        cache.clear()
+        # Two "workers": separate local tiers over the same shared backend
+        params = {"OPTIONS": {"SHARED_ALIAS": "shared", "LOCAL_EXCLUDE_PREFIXES": ["otp_"]}}
+        self.worker_a = TwoTierCache(None, params)
+        self.worker_b = TwoTierCache(None, params)
+
+    def test_values_are_shared_between_workers(self):
+        self.worker_a.set("greeting", {"text": "hi"})
+        self.assertEqual(self.worker_b.get("greeting"), {"text": "hi"})
+
+        self.worker_b.delete("greeting")
+        self.worker_a._local.clear()  # as after LOCAL_TIMEOUT
+        self.assertIsNone(self.worker_a.get("greeting"))
+
+    def test_otps_are_never_kept_locally(self):
+        self.worker_a.set("otp_a@example.com", "123456", 600)
+        self.assertEqual(self.worker_a._local, {})
+        self.assertEqual(self.worker_b.get("otp_a@example.com"), "123456")
+
+        self.worker_b.delete("otp_a@example.com")
+        self.assertIsNone(self.worker_a.get("otp_a@example.com"))
+
+    def test_stats_count_local_and_shared_hits(self):
+        self.worker_a.set("key", 1)
+        self.worker_a.get("key")
+        self.worker_b.get("key")
+        self.worker_b.get("key")
+        self.worker_b.get("missing")
+
+        self.assertEqual(self.worker_a.stats()["local_hits"], 1)
+        stats = self.worker_b.stats()
+        self.assertEqual((stats["local_hits"], stats["shared_hits"], stats["misses"]), (1, 1, 1))
+        self.assertEqual(stats["hit_rate"], 0.6667)
+
+    def test_otp_is_accepted_once(self):
+        otp = generate_otp("user@example.com")
+        self.assertFalse(verify_otp("user@example.com", "000000" if otp != "000000" else "111111"))
+        self.assertTrue(verify_otp("user@example.com", otp))
+        self.assertFalse(verify_otp("user@example.com", otp))
+
+    def test_stats_endpoint_is_admin_only(self):
+        user = Profile.objects.create_user(username="user", email="user@example.com", password="x")
+        admin = Profile.objects.create_superuser(username="admin", email="admin@example.com", password="x")
+        self.client.force_authenticate(user)
+        self.assertEqual(self.client.get("/api/admin/cache-stats/").status_code, 403)
+
+        self.client.force_authenticate(admin)
+        response = self.client.get("/api/admin/cache-stats/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("hit_rate", response.json())
+
+
+# -------------------------
+# Email outbox
+# -------------------------
+class BouncingEmailBackend(BaseEmailBackend):
+    """Test stand-in for an SMTP server that rejects one address."""
+
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            if "bounce@" in message.to[0]:
+                raise ConnectionRefusedError("rejected")
+        return len(email_messages)
+
+
+class EmailOutboxTests(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        self.mail_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.mail_dir, ignore_errors=True)
+
+    def test_signup_only_queues_the_otp_email(self):
+        response = self.client.post(
+            "/api/register/", {"username": "new", "email": "new@example.com", "password": "secret", "pincode": "411001"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(mail.outbox, [])
+        email = OutboundEmail.objects.get()
+        self.assertEqual((email.to, email.status), ("new@example.com", "Queued"))
+        self.assertIn(Profile.objects.get(email="new@example.com").otp, email.text_body)
+
+    def test_worker_sends_batches_over_one_connection(self):
+        for i in range(3):
+            outbox.enqueue(f"user{i}@example.com", "Hello", "Plain", "<p>Html</p>")
+
+        with self.settings(EMAIL_BACKEND="django.core.mail.backends.filebased.EmailBackend", EMAIL_FILE_PATH=self.mail_dir):
+            call_command("send_queued_email", "--once", "--batch-size", "2", stdout=io.StringIO())
+
+        self.assertEqual(set(OutboundEmail.objects.values_list("status", "text_body", "html_body")), {("Sent", "", "")})
+        # The file backend writes one file per connection it opens
+        files = os.listdir(self.mail_dir)
+        self.assertEqual(len(files), 1)
+        with open(os.path.join(self.mail_dir, files[0])) as f:
+            self.assertEqual(f.read().count("Subject: Hello"), 3)
+
+    def test_failures_are_retried_with_backoff(self):
+        outbox.enqueue("bounce@example.com", "Hello", "Plain")
+        outbox.enqueue("ok@example.com", "Hello", "Plain")
+
+        with self.settings(EMAIL_BACKEND=f"{__name__}.BouncingEmailBackend"):
+            call_command("send_queued_email", "--once", stdout=io.StringIO())
+
+        bounced = OutboundEmail.objects.get(to="bounce@example.com")
+        self.assertEqual((bounced.status, bounced.attempts), ("Queued", 1))
+        self.assertIn("rejected", bounced.last_error)
+        self.assertGreater(bounced.available_at, bounced.created_at)
+        self.assertEqual(OutboundEmail.objects.get(to="ok@example.com").status, "Sent")
+
+        # Not due yet: a second run leaves it alone
+        with self.settings(EMAIL_BACKEND=f"{__name__}.BouncingEmailBackend"):
+            call_command("send_queued_email", "--once", stdout=io.StringIO())
+        self.assertEqual(OutboundEmail.objects.get(to="bounce@example.com").attempts, 1)
+
+    def test_emails_that_keep_timing_out_give_up(self):
+        email = outbox.enqueue("slow@example.com", "Hello", "Plain")
+        for _ in range(outbox.EMAIL_MAX_ATTEMPTS):
+            self.assertEqual([e.pk for e in outbox.claim(10)], [email.pk])
+            # The worker died mid-send
+            OutboundEmail.objects.filter(pk=email.pk).update(claimed_at=timezone.now() - outbox.SEND_TIMEOUT * 2)
+
+        self.assertEqual(outbox.claim(10), [])
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ("Failed", outbox.EMAIL_MAX_ATTEMPTS))
+        self.assertIn("Timed out", email.last_error)
+
+
+# -------------------------
+# Streaming chatbot
+# -------------------------
+class FakeChatModel:
+    """Local stand-in for genai.GenerativeModel: streams a canned answer."""
+    delay = 0
+
+    def __init__(self, model_name):
+        self.prompts = []
+
+    def generate_content(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return SimpleNamespace(text="Hello from BuddyBot")
+
+    async def generate_content_async(self, prompt, stream=False):
+        self.prompts.append(prompt)
+
+        async def chunks():
+            for text in ["Hello", " from", " BuddyBot"]:
+                await asyncio.sleep(self.delay)
+                yield SimpleNamespace(text=text)
+        return chunks()
+
+
+class SlowChatModel(FakeChatModel):
+    delay = 1
+
+
+class BrokenChatModel(FakeChatModel):
+    def generate_content(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        raise ConnectionError("upstream down")
+
+
+@override_settings(CHATBOT_MODEL_CLASS=f"{__name__}.FakeChatModel", CHATBOT_TIMEOUT=5, CHATBOT_MAX_CONCURRENCY=2)
+class ChatbotStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches["chatbot"].clear()
+
+    async def events(self, response):
+        body = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        events = []
+        for block in body.strip().split("\n\n"):
+            lines = dict(line.split(": ", 1) for line in block.splitlines())
+            events.append((lines.get("event", "message"), json.loads(lines["data"])))
+        return events
+
+    async def test_answer_is_streamed_as_server_sent_events(self):
+        response = await self.async_client.post(
+            "/api/chatbot/stream/", {"message": "hi", "section": "pet-adopter"}, content_type="application/json",
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = await self.events(response)
+        self.assertEqual(
+            events,
+            [
+                ("message", {"delta": "Hello"}),
+                ("message", {"delta": " from"}),
+                ("message", {"delta": " BuddyBot"}),
+                ("done", {"reply": "Hello from BuddyBot"}),
+            ],
+        )
+        self.assertIn("'pet-adopter' section", chatbot.get_model().prompts[-1])
+
+    async def test_model_client_is_reused(self):
+        before = len(chatbot.get_model().prompts)
+        for message in ["hi", "hello"]:
+            await self.events(await self.async_client.post(
+                "/api/chatbot/stream/", {"message": message}, content_type="application/json",
+            ))
+        self.assertIs(chatbot.get_model(), chatbot.get_model())
+        self.assertEqual(len(chatbot.get_model().prompts), before + 2)
+
+    @override_settings(CHATBOT_MODEL_CLASS=f"{__name__}.SlowChatModel", CHATBOT_TIMEOUT=0.1)
+    async def test_slow_answers_time_out(self):
+        response = await self.async_client.post("/api/chatbot/stream/", {"message": "hi"}, content_type="application/json")
+        event, data = (await self.events(response))[-1]
+        self.assertEqual(event, "error")
+        self.assertIn("too long", data["error"])
+
+    async def test_requests_over_the_cap_are_turned_away(self):
+        semaphore = chatbot.client().semaphore()
+        async with semaphore, semaphore:
+            response = await self.async_client.post("/api/chatbot/stream/", {"message": "hi"}, content_type="application/json")
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response)
+
+    async def test_repeated_questions_are_streamed_from_the_cache(self):
+        before = len(chatbot.get_model().prompts)
+        for message in ["How do I report a lost pet?", "how do i report a LOST pet"]:
+            events = await self.events(await self.async_client.post(
+                "/api/chatbot/stream/", {"message": message}, content_type="application/json",
+            ))
+            self.assertEqual(events[-1], ("done", {"reply": "Hello from BuddyBot"}))
+        self.assertEqual(len(chatbot.get_model().prompts), before + 1)
+
+
+@override_settings(CHATBOT_MODEL_CLASS=f"{__name__}.FakeChatModel")
+class ChatbotAnswerTests(QueryPlanAssertions, TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Profile.objects.create_user("owner@example.com", "owner", "pw")
+        cls.admin = Profile.objects.create_superuser("admin@example.com", "admin", "pw")
+        cls.dog = PetType.objects.create(type="Dog")
+        cls.cat = PetType.objects.create(type="Cat")
+
+    def setUp(self):
+        cache.clear()
+        caches["chatbot"].clear()
+
+    def report(self, pet_status, pet_type, report_status="Accepted", **pet_fields):
+        pet = Pet.objects.create(name="Pet", pet_type=pet_type, **pet_fields)
+        return PetReport.objects.create(pet=pet, user=self.user, pet_status=pet_status, report_status=report_status)
+
+    def ask(self, message, section=""):
+        return self.client.post("/api/chatbot/", {"message": message, "section": section}, format="json").json()["reply"]
+
+    def test_count_questions_are_answered_from_reports(self):
+        self.report("Lost", self.dog, city="Pune", pincode=411001)
+        self.report("Lost", self.dog, city="pune", pincode=411001)
+        self.report("Lost", self.dog, city="Pune", report_status="Resolved")
+        self.report("Lost", self.cat, city="Pune")
+        self.report("Found", self.dog, city="Pune")
+        self.report("Lost", self.dog, city="Mumbai")
+        before = len(chatbot.get_model().prompts)
+
+        with CaptureQueriesContext(connection) as queries:
+            reply = self.ask("How many lost dogs in Pune?")
+        self.assertEqual(reply, "There are currently 2 lost dogs reported in Pune on Pet Rescue.")
+        self.assertEqual(len(queries), 3)  # pet types + known city + one count
+        self.assertEqual(self.ask("how many found pets are there in total"), "There is currently 1 found pet reported on Pet Rescue.")
+        self.assertEqual(self.ask("How many lost cats near 411001?"), "There are currently 0 lost cats reported near pincode 411001 on Pet Rescue.")
+        self.assertEqual(len(chatbot.get_model().prompts), before)
+
+    def test_count_query_uses_an_index(self):
+        self.assertNoFullScan(chatbot.open_reports("Lost", "Dog", city="Pune"), "pet_rescue_app_petreport")
+
+    def test_other_questions_go_to_the_model_once_per_section(self):
+        for question in [
+            "How many pets should I adopt?",
+            "How many days should I wait after my dog got lost?",
+            "How many times have I lost my password?",
+            "How many lost dogs were reported in the last week?",
+            "How many lost dogs in Atlantis?",
+        ]:
+            self.assertIsNone(chatbot.count_answer(chatbot.normalize(question)), question)
+        before = len(chatbot.get_model().prompts)
+
+        self.ask("How do I report a lost pet?", "pet-owner")
+        self.ask("  how do I report a lost pet ", "pet-owner")
+        self.ask("How do I report a lost pet?", "pet-adopter")
+        self.assertEqual(len(chatbot.get_model().prompts), before + 2)
+
+        self.client.force_authenticate(self.admin)
+        stats = self.client.get("/api/admin/chatbot-stats/").json()
+        self.assertEqual((stats["cache_hits"], stats["cache_misses"]), (1, 2))
+        self.assertEqual(stats["cache_hit_rate"], 0.3333)
+
+
+# -------------------------
+# Guarded model client
+# -------------------------
+class StubModel:
+    """Local stand-in for Gemini with configurable latency and failures."""
+
+    def __init__(self, delay=0, fail=False):
+        self.delay, self.fail, self.calls = delay, fail, 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("upstream down")
+        return SimpleNamespace(text=" ok ")
+
+    async def generate_content_async(self, prompt, stream=False):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("upstream down")
+
+        async def chunks():
+            yield SimpleNamespace(text="ok")
+        return chunks()
+
+
+class ModelClientTests(TestCase):
+    def test_breaker_opens_fails_fast_and_recovers(self):
+        model = StubModel(fail=True)
+        client = ModelClient(model, timeout=1, max_concurrency=2, failure_threshold=2, reset_timeout=0.1)
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                client.generate("hi")
+
+        with self.assertRaises(ModelUnavailable) as raised:
+            client.generate("hi")
+        self.assertEqual((raised.exception.reason, raised.exception.reply), ("circuit_open", UNAVAILABLE_REPLY))
+        self.assertEqual(model.calls, 2)
+        self.assertEqual(client.stats()["breaker"]["state"], "open")
+
+        time.sleep(0.15)  # half-open: one trial call decides
+        model.fail = False
+        self.assertEqual(client.generate("hi"), "ok")
+        self.assertEqual(client.stats()["breaker"]["state"], "closed")
+
+    def test_failed_trial_reopens_the_circuit(self):
+        client = ModelClient(StubModel(fail=True), timeout=1, max_concurrency=1, failure_threshold=1, reset_timeout=0.05)
+        with self.assertRaises(ConnectionError):
+            client.generate("hi")
+        time.sleep(0.06)
+        with self.assertRaises(ConnectionError):
+            client.generate("hi")
+        self.assertEqual(client.stats()["breaker"]["state"], "open")
+
+    def test_slow_calls_are_cut_off_at_the_deadline(self):
+        model = StubModel(delay=0.5)
+        client = ModelClient(model, timeout=0.05, max_concurrency=1)
+        started = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            client.generate("hi")
+        self.assertLess(time.monotonic() - started, 0.4)
+        self.assertEqual(client.stats()["latency"]["timeout"]["count"], 1)
+
+        # The slot stays taken until the abandoned call really ends
+        with self.assertRaises(ModelUnavailable) as raised:
+            client.generate("hi")
+        self.assertEqual(raised.exception.reason, "busy")
+        time.sleep(0.5)
+        model.delay = 0
+        self.assertEqual(client.generate("hi"), "ok")
+
+    def test_calls_over_the_cap_are_rejected(self):
+        client = ModelClient(StubModel(delay=0.2), timeout=1, max_concurrency=1)
+        thread = threading.Thread(target=client.generate, args=("hi",))
+        thread.start()
+        time.sleep(0.05)
+        with self.assertRaises(ModelUnavailable):
+            client.generate("hi")
+        thread.join()
+        self.assertEqual(client.stats()["rejected"], {"busy": 1, "circuit_open": 0})
+
+    def test_stream_failures_count_towards_the_breaker(self):
+        client = ModelClient(StubModel(fail=True), timeout=1, max_concurrency=1, failure_threshold=1)
+
+        async def consume():
+            return [text async for text in client.stream("hi")]
+
+        with self.assertRaises(ConnectionError):
+            asyncio.run(consume())
+        with self.assertRaises(ModelUnavailable):
+            asyncio.run(consume())
+
+    def test_stream_does_not_wait_for_a_slot(self):
+        client = ModelClient(StubModel(), timeout=1, max_concurrency=1, failure_threshold=1, reset_timeout=0.05)
+        client.breaker.record_failure()
+        time.sleep(0.06)  # half-open
+
+        async def consume_while_busy():
+            async with client.semaphore():
+                # Passed check_available() a moment ago, lost the slot since
+                return await asyncio.wait_for(anext(client.stream("hi")), 1)
+
+        with self.assertRaises(ModelUnavailable) as raised:
+            asyncio.run(consume_while_busy())
+        self.assertEqual(raised.exception.reason, "busy")
+        # The half-open trial was not claimed by the rejected call
+        self.assertTrue(client.breaker.would_allow())
+
+    def test_latency_histogram_is_cumulative(self):
+        histogram = LatencyHistogram(buckets=(0.1, 1))
+        for seconds in (0.05, 0.5, 0.7, 3):
+            histogram.observe(seconds)
+        self.assertEqual(histogram.snapshot(), {"buckets": {"0.1": 1, "1": 3, "+Inf": 4}, "count": 4, "sum": 4.25})
+
+    @override_settings(CHATBOT_MODEL_CLASS=f"{__name__}.BrokenChatModel", CHATBOT_BREAKER_FAILURES=1)
+    def test_views_answer_at_once_while_the_circuit_is_open(self):
+        cache.clear()
+        caches["chatbot"].clear()
+        chatbot.client().breaker.record_success()  # fresh breaker for this configuration
+        before = len(chatbot.get_model().prompts)
+
+        first = self.client.post("/api/chatbot/", {"message": "hi"}, content_type="application/json").json()
+        self.assertIn("upstream down", first["reply"])
+        second = self.client.post("/api/chatbot/", {"message": "hello"}, content_type="application/json").json()
+        self.assertEqual(second["reply"], UNAVAILABLE_REPLY)
+        self.assertEqual(len(chatbot.get_model().prompts), before + 1)
+
+        streamed = self.client.post("/api/chatbot/stream/", {"message": "hey"}, content_type="application/json")
+        self.assertEqual(streamed.status_code, 503)
+        self.assertEqual(streamed.json()["error"], UNAVAILABLE_REPLY)
+
+
+# -------------------------
+# Startup time
+# -------------------------
+class StartupBenchmarkTests(TestCase):
+    def test_worker_boot_skips_lazy_and_dev_only_imports(self):
+        out = io.StringIO()
+        call_command("startup_benchmark", "--runs", "1", "--top", "5000", stdout=out)
+        modules = out.getvalue()
+        self.assertIn("pet_rescue_app.views", modules)
+        self.assertIn("drf_yasg", modules)
+        # Imported by the first chatbot call, not at startup
+        self.assertNotIn("google.generativeai", modules)
+
+    def test_production_profile_and_time_budget(self):
+        out = io.StringIO()
+        with self.assertRaises(CommandError):
+            call_command("startup_benchmark", "--runs", "1", "--top", "5000", "--profile", "production", "--max-ms", "1", stdout=out)
+        self.assertIn("production profile", out.getvalue())
+        self.assertNotIn("drf_yasg", out.getvalue())
+        self.assertNotIn("django_extensions", out.getvalue())
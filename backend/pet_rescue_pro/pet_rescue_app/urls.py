@@ -4,11 +4,12 @@ from .views import (
     ProfileViewSet, PetViewSet, PetTypeViewSet,
     PetMedicalHistoryViewSet, PetReportViewSet, PetAdoptionViewSet,
     NotificationViewSet, RegisterAPIView, LoginAPIView, LostPetRequestAPIView, PetsListAPIView, AdminApprovalAPIView, UserNotificationsAPIView, UserRequestsListAPIView,
-    AdminUserListView, AdminUserDetailView, AdminPetReportsAPIView, AdminPetReportDetailAPIView, AdminUnreadNotificationCountAPIView,
+    AdminUserListView, AdminUserDetailView, AdminPetReportsAPIView, AdminPetReportDetailAPIView, AdminUnreadNotificationCountAPIView, AdminCacheStatsAPIView, AdminChatbotStatsAPIView,
+    AdminPetMatchesAPIView, AdminPetMatchDetailAPIView,
     AdminLostPetRequestsAPIView, AdminManageReportStatusAPIView, VerifyRegisterAPIView,
     PasswordResetRequestAPIView, PasswordResetConfirmAPIView,AdminFoundPetRequestsAPIView,AdminChangePasswordView,
     FoundPetRequestAPIView, UserLostPetsAPIView, UserFoundPetsAPIView, AdoptionPetsView,UserPetAdoptionsAPIView, AdoptablePetsAPIView,
-    RecentPetsAPIView, MyRewardView, AllRewardsView, FeedbackStoryAPIView, UserReportViewSet
+    RecentPetsAPIView, PetSearchAPIView, MyRewardView, AllRewardsView, LeaderboardView, FeedbackStoryAPIView, UserReportViewSet
 )
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
@@ -49,8 +50,12 @@ urlpatterns = [
     path("admin/reports/", AdminPetReportsAPIView.as_view(), name="admin-reports"),
     path("admin/reports/<int:report_id>/", AdminPetReportDetailAPIView.as_view(), name="admin-report-detail"),
     path('admin/notifications/unread-count/', AdminUnreadNotificationCountAPIView.as_view(), name='admin-unread-count'),
+    path("admin/cache-stats/", AdminCacheStatsAPIView.as_view(), name="admin-cache-stats"),
+    path("admin/chatbot-stats/", AdminChatbotStatsAPIView.as_view(), name="admin-chatbot-stats"),
     path("admin/lost-pet-requests/", AdminLostPetRequestsAPIView.as_view(), name="admin-lost-pet-requests"),
     path("admin/manage-report/<int:report_id>/", AdminManageReportStatusAPIView.as_view(), name="admin-manage-report"),
+    path("admin/matches/", AdminPetMatchesAPIView.as_view(), name="admin-matches"),
+    path("admin/matches/<int:match_id>/", AdminPetMatchDetailAPIView.as_view(), name="admin-match-detail"),
     path("verify-register/", VerifyRegisterAPIView.as_view(), name="verify-register"),
     path("password-reset-request/", PasswordResetRequestAPIView.as_view(), name="password-reset-request"),
     path("password-reset-confirm/", PasswordResetConfirmAPIView.as_view(), name="password-reset-confirm"),
@@ -60,14 +65,17 @@ urlpatterns = [
     path("admin/change-password/", AdminChangePasswordView.as_view(), name="admin-change-password"),
     path("found-pet-request/", FoundPetRequestAPIView.as_view(), name="found-pet-request"),
     path("chatbot/", views.chatbot_response, name="chatbot"),
+    path("chatbot/stream/", views.chatbot_stream, name="chatbot-stream"),
     path("my-lost-pets/", UserLostPetsAPIView.as_view(), name="my-lost-pets"),
     path("my-found-pets/", UserFoundPetsAPIView.as_view(), name="my-found-pets"),
     path("my-pet-adoptions/", UserPetAdoptionsAPIView.as_view(), name="my-pet-adoptions"),
     path("my-pet-adoptions/", UserPetAdoptionsAPIView.as_view(), name="my-pet-adoptions"),
     path("adoptable-pets/", AdoptablePetsAPIView.as_view(), name="adoptable-pets"),
     path("pets/recent/", RecentPetsAPIView.as_view(), name="recent-pets"),
+    path("pets/search/", PetSearchAPIView.as_view(), name="pet-search"),
     path("my-rewards/", MyRewardView.as_view(), name="my-rewards"),
     path("all-rewards/", AllRewardsView.as_view(), name="all-rewards"),
+    path("leaderboard/", LeaderboardView.as_view(), name="leaderboard"),
     path("feedback-stories/", FeedbackStoryAPIView.as_view(), name="feedback-list-create"),
 ]
 
@@ -32,8 +32,8 @@
 
 import random
 from django.core.cache import cache
-from django.core.mail import EmailMultiAlternatives
-from django.conf import settings
+
+from . import outbox
 
 
 def generate_otp(email: str) -> str:
@@ -46,8 +46,8 @@ def generate_otp(email: str) -> str:
 def verify_otp(email: str, submitted_otp: str) -> bool:
     """Check if submitted OTP matches stored OTP in cache."""
     stored_otp = cache.get(f"otp_{email}")
-    if stored_otp and stored_otp == submitted_otp:
-        cache.delete(f"otp_{email}")  # remove once used
+    # delete() reports whether this call removed it, so an OTP is only ever accepted once
+    if stored_otp and stored_otp == submitted_otp and cache.delete(f"otp_{email}"):
         return True
     return False
 
@@ -108,10 +108,8 @@ def send_otp_email(email: str, purpose: str = "verification", otp: str = None) -
     </html>
     """
 
-    # Send email using EmailMultiAlternatives
-    msg = EmailMultiAlternatives(subject, text_content, settings.DEFAULT_FROM_EMAIL, [email])
-    msg.attach_alternative(html_content, "text/html")
-    msg.send()
+    # Queued in the outbox; `manage.py send_queued_email` delivers it outside the request
+    outbox.enqueue(email, subject, text_content, html_content)
 
     return otp
 
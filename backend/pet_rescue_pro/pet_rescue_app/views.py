@@ -5,7 +5,7 @@ from rest_framework.views import APIView
 from django.contrib.auth.hashers import make_password, check_password
 from .models import (
     Profile, Pet, PetType,
-    PetMedicalHistory, PetReport, PetAdoption, Notification, RewardPoint, FeedbackStory, UserReport
+    PetMedicalHistory, PetReport, PetAdoption, Notification, RewardPoint, FeedbackStory, UserReport, PetMatch
 )
 from .serializers import (
     ProfileSerializer, PetTypeSerializer, PetSerializer,
@@ -13,9 +13,21 @@ from .serializers import (
     PetAdoptionSerializer, NotificationSerializer, LoginSerializer, LostPetRequestSerializer, AdminNotificationSerializer,
       PetReportListSerializer, PetAdoptionListSerializer, AdminApprovalSerializer, UserPetReportSerializer,
         UserAdoptionRequestSerializer, AdminUserSerializer,AdminPetReportSerializer, PasswordResetRequestSerializer, PasswordResetConfirmSerializer,
-        RegisterSerializer, VerifyRegisterSerializer,UserAdoptionDetailSerializer, RewardPointSerializer, FeedbackStorySerializer, UserReportCreateSerializer,UserReportSerializer
+        RegisterSerializer, VerifyRegisterSerializer,UserAdoptionDetailSerializer, RewardPointSerializer, FeedbackStorySerializer, UserReportCreateSerializer,UserReportSerializer,
+        PetMatchSerializer
 )
 from .utils import send_otp_email, verify_otp
+from .listings import report_listing_queryset, build_report_listing, filter_near, report_listing_payload
+from .image_hashing import index_report_image, similar_hashes, DEFAULT_RADIUS, MAX_RADIUS
+from .image_variants import open_variant, preferred_format, parse_size, VariantError
+from .geo import proximity_from_request, ProximityError
+from .pagination import KeysetCursorPagination
+from .conditional import ListingValidators, PET_TIMESTAMPS, REPORT_TIMESTAMPS, nested
+from . import chatbot, response_cache
+from .model_client import ModelUnavailable
+from .search import search_pets
+from .notifications import unread_count, get_read_watermark, mark_read_up_to, notify_admins
+from .rewards import get_reward, leaderboard_top, rank_for, LEADERBOARD_MAX_K
 
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.permissions import IsAuthenticated, IsAdminUser 
@@ -34,16 +46,16 @@ from rest_framework.permissions import AllowAny
 from django.core.cache import cache
 import os
 import json
-import google.generativeai as genai
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, FileResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_safe
 from django.utils import timezone
+from django.db.models import Count, Q
 from datetime import timedelta
 
 
 
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-
 @csrf_exempt
 def chatbot_response(request):
     if request.method == "POST":
@@ -52,32 +64,21 @@ def chatbot_response(request):
             user_message = data.get("message", "")
             section = data.get("section", "")  # ✅ context info from frontend
 
-            # Context-aware prompt
-            context = f"""
-            You are Pet Rescue Assistant for the project pet_rescue_pro.
-
-            The user is currently in the '{section}' section of the dashboard.
-
-            Rules for context:
-            - If in 'pet-owner', focus on pet ownership and lost pet reports.
-            - If in 'pet-rescuer', focus on rescue activities and medical history.
-            - If in 'pet-adopter', focus on adoption and available pets.
-            - If section is empty or unclear, give a friendly response and guide back to project features.
-            - If asked for code or technical solutions unrelated to pets, politely decline and say:
-                "I can only provide coding help related to Pet Rescue Pro (like adoption forms, pet reports, etc.)."
-            General behavior:
-            - Be friendly and conversational. Respond to greetings (hi, hello, hey) warmly.
-            - If the user asks about general things (weather, math, chit-chat), you may answer briefly,
-              but always guide the conversation back to pet rescue, adoption, or project features.
-            - Keep your answers concise and helpful, like a real assistant inside the project.
-            """
-
-            # Call Gemini
-            model = genai.GenerativeModel("gemini-2.5-flash")
-            response = model.generate_content(f"{context}\n\nUser: {user_message}\nAssistant:")
-
-            reply = response.text.strip() if response and response.text else "⚠️ No response from Gemini."
-
+            # Data questions and repeated questions are answered without Gemini
+            reply = chatbot.quick_answer(user_message, section)
+            if reply is None:
+                # Context-aware prompt (see chatbot.PROMPT) through the guarded, shared client
+                reply = chatbot.client().generate(chatbot.build_prompt(user_message, section))
+                if reply:
+                    chatbot.remember_answer(user_message, section, reply)
+                else:
+                    reply = "⚠️ No response from Gemini."
+
+        except ModelUnavailable as e:
+            # Upstream unhealthy or at capacity: answered at once, without waiting on Gemini
+            reply = e.reply
+        except TimeoutError:
+            reply = "⚠️ Gemini took too long to answer."
         except Exception as e:
             reply = f"⚠️ Error connecting to Gemini API: {str(e)}"
 
@@ -86,6 +87,75 @@ def chatbot_response(request):
     # For GET requests → return health check
     return JsonResponse({"status": "Chatbot API running ✅"}, status=200)
 
+
+def _sse(data, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+def _event_stream(events):
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # let nginx pass events through unbuffered
+    return response
+
+
+@csrf_exempt
+async def chatbot_stream(request):
+    """
+    Async, streaming variant of chatbot_response (serve with asgi.py). The
+    answer arrives as Server-Sent Events: ``data: {"delta": ...}`` per piece,
+    then ``event: done`` with the full reply, or ``event: error``. Waiting on
+    the model holds no worker thread, so slow answers do not starve the pet APIs.
+    Count questions and repeated questions skip the model (chatbot.quick_answer).
+    """
+    if request.method != "POST":
+        return JsonResponse({"status": "Chatbot API running ✅"}, status=200)
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON body."}, status=400)
+    message, section = data.get("message", ""), data.get("section", "")
+
+    reply = await sync_to_async(chatbot.quick_answer)(message, section)
+    if reply is not None:
+        async def events():
+            yield _sse({"delta": reply})
+            yield _sse({"reply": reply}, event="done")
+        return _event_stream(events())
+
+    client = chatbot.client()
+    try:
+        client.check_available()
+    except ModelUnavailable as e:
+        response = JsonResponse({"error": e.reply}, status=503)
+        response["Retry-After"] = str(e.retry_after)
+        return response
+
+    prompt = chatbot.build_prompt(message, section)
+
+    async def events():
+        reply = []
+        try:
+            async for text in client.stream(prompt):
+                reply.append(text)
+                yield _sse({"delta": text})
+        except ModelUnavailable as e:
+            yield _sse({"error": e.reply}, event="error")
+            return
+        except TimeoutError:
+            yield _sse({"error": "⚠️ Gemini took too long to answer."}, event="error")
+            return
+        except Exception as e:  # noqa: BLE001 - reported to the client like chatbot_response does
+            yield _sse({"error": f"⚠️ Error connecting to Gemini API: {str(e)}"}, event="error")
+            return
+        answer = "".join(reply).strip()
+        if answer:
+            await sync_to_async(chatbot.remember_answer)(message, section, answer)
+        yield _sse({"reply": answer or "⚠️ No response from Gemini."}, event="done")
+
+    return _event_stream(events())
+
 # -------------------------
 # PetType ViewSet
 # -------------------------
@@ -93,6 +163,11 @@ class PetTypeViewSet(viewsets.ModelViewSet):
     queryset = PetType.objects.all().order_by("id")
     serializer_class = PetTypeSerializer
 
+    def list(self, request, *args, **kwargs):
+        def build():
+            return None, super(PetTypeViewSet, self).list(request, *args, **kwargs)
+        return response_cache.respond(request, "pet-types", [PetType], build)
+
 
 # -------------------------
 # Profile ViewSet
@@ -195,8 +270,8 @@ class ProfileViewSet(viewsets.ModelViewSet):
         image_field = getattr(profile, image_field_name, None)
 
         if image_field:
-            # deletes file on storage and clears the field
-            image_field.delete(save=False)  # delete file from storage
+            # stored files are shared: clearing the field is enough, and
+            # collect_media_garbage removes the file once nothing references it
             setattr(profile, image_field_name, None)  # set field to None
             profile.save(update_fields=[image_field_name])
             return Response(
@@ -259,6 +334,42 @@ class PetReportViewSet(viewsets.ModelViewSet):
     def perform_update(self, serializer):
         user = self.request.user if self.request.user.is_authenticated else None
         serializer.save(modified_by=user)
+
+    @action(detail=True, methods=["get"], url_path="similar")
+    def similar(self, request, pk=None):
+        """
+        Reports whose photo looks like this one (perceptual hash within ?radius= bits).
+        Optional ?pet_status=Lost|Found narrows the results, e.g. found pets for a lost report.
+        """
+        report = self.get_object()
+        try:
+            radius = int(request.query_params.get("radius", DEFAULT_RADIUS))
+        except ValueError:
+            return Response({"error": "radius must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= radius <= MAX_RADIUS:
+            return Response({"error": f"radius must be between 0 and {MAX_RADIUS}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        image_hash = getattr(report, "image_hash", None) or index_report_image(report.id)
+        if image_hash is None:
+            return Response({"error": "This report has no image to compare"}, status=status.HTTP_400_BAD_REQUEST)
+
+        distances = {
+            row.report_id: distance
+            for row, distance in similar_hashes(image_hash.dhash, radius)
+            if row.report_id != report.id
+        }
+        reports = report_listing_queryset(id__in=list(distances), report_status__in=["Pending", "Accepted"])
+        pet_status = request.query_params.get("pet_status")
+        if pet_status:
+            reports = reports.filter(pet_status=pet_status)
+
+        data = []
+        for other in sorted(reports, key=lambda r: (distances[r.id], -r.id)):
+            item = report_listing_payload(other, image_size=parse_size(request.query_params.get("image_size")))
+            item["distance"] = distances[other.id]
+            data.append(item)
+        return Response({"report_id": report.id, "radius": radius, "similar_reports": data}, status=status.HTTP_200_OK)
+
     def update(self, request, *args, **kwargs):
         # Get the report instance that is about to be updated
         report = self.get_object()
@@ -305,20 +416,12 @@ class PetAdoptionViewSet(viewsets.ModelViewSet):
             modified_by=user
         )
 
-        # ✨ START: New logic to notify the admin
-        try:
-            # Assuming Profile is linked to the User model
-            admin_user = Profile.objects.get(is_superuser=True)
-        except Profile.DoesNotExist:
-            admin_user = None
-
-        if admin_user:
-            Notification.objects.create(
-                sender=user,
-                receiver=admin_user,
-                content=f"User '{user.username}' has submitted a Adopt claim for the pet '{adoption_instance.pet.name}'.",
-                pet=adoption_instance.pet  # ✅ Use the instance, not serializer
-            )
+        # ✨ START: New logic to notify the admins (one bulk insert for all of them)
+        notify_admins(
+            sender=user,
+            content=f"User '{user.username}' has submitted a Adopt claim for the pet '{adoption_instance.pet.name}'.",
+            pet=adoption_instance.pet  # ✅ Use the instance, not serializer
+        )
         # ✨ END
 
     def perform_update(self, serializer):
@@ -335,6 +438,13 @@ class NotificationViewSet(viewsets.ModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_serializer_context(self):
+        # Notifications under the user's watermark (mark-all-read) show as read here too
+        context = super().get_serializer_context()
+        if self.request.user.is_authenticated:
+            context["read_watermark"] = get_read_watermark(self.request.user.id)
+        return context
+
     def perform_create(self, serializer):
         user = self.request.user if self.request.user.is_authenticated else None
         serializer.save(created_by=user, modified_by=user)
@@ -347,12 +457,35 @@ class NotificationViewSet(viewsets.ModelViewSet):
             return Response({"detail": "Notification not found"}, status=status.HTTP_404_NOT_FOUND)
         
         notification.is_read = True
-        notification.save()
+        notification.save(update_fields=["is_read"])
         
         # Return the updated notification data
         serializer = self.get_serializer(notification)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    # ✅ POST /api/notifications/mark-all-read/   body: {"up_to": <notification id>} (optional)
+    @action(detail=False, methods=['post'], url_path='mark-all-read')
+    def mark_all_read(self, request):
+        up_to = request.data.get("up_to")
+        if up_to is not None:
+            try:
+                up_to = int(up_to)
+            except (TypeError, ValueError):
+                return Response({"error": "up_to must be a notification id"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # One watermark UPDATE, no matter how many notifications it covers
+        read_up_to = mark_read_up_to(request.user, up_to)
+        return Response(
+            {"read_up_to": read_up_to, "unread_count": unread_count(request.user)},
+            status=status.HTTP_200_OK
+        )
+
+    # ✅ GET /api/notifications/unread-count/
+    @action(detail=False, methods=['get'], url_path='unread-count')
+    def unread(self, request):
+        # Served from the per-receiver counter in the cache, see notifications.py
+        return Response({"unread_count": unread_count(request.user)}, status=status.HTTP_200_OK)
+
 class RegisterAPIView(APIView):
     permission_classes = [AllowAny]
 
@@ -543,113 +676,80 @@ class LostPetRequestAPIView(APIView):
         if pet_image:
             pet_data['image'] = pet_image
 
-        # 1️⃣ Create Pet
-        pet_serializer = PetSerializer(data=pet_data, context={"request": request})
-        if pet_serializer.is_valid():
-            pet = pet_serializer.save(created_by=user, modified_by=user)
-            print(f"Pet created with image: {pet.image}")  # Debug log
-        else:
-            print("Pet serializer errors:", pet_serializer.errors)  # Debug logging
-            return Response({"pet": pet_serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Handle report image (use same image as pet for now)
-        if pet_image:
-            report_data['image'] = pet_image
-
-        # 2️⃣ Create PetReport
-        report_serializer = PetReportSerializer(data=report_data, context={"request": request})
-        if report_serializer.is_valid():
-            report = report_serializer.save(user=user, pet=pet, created_by=user, modified_by=user)
-            print(f"Report created with image: {report.image}")  # Debug log
-        else:
-            return Response({"report": report_serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
-
-        # 3️⃣ Create PetMedicalHistory (if vaccinated or diseased)
-        if pet.is_vaccinated or pet.is_diseased:
-            medical_serializer = PetMedicalHistorySerializer(
-                data=medical_history_data,
-                context={"request": request, "pet": pet}  # pass pet in context
-            )
-            if medical_serializer.is_valid():
-                medical_serializer.save()  # pet and user are already in create() via context
+        # All rows commit together (or not at all). Photo processing (orientation,
+        # metadata strip, variants, hashing) is queued and done by `manage.py process_images`.
+        with transaction.atomic():
+            # 1️⃣ Create Pet
+            pet_serializer = PetSerializer(data=pet_data, context={"request": request})
+            if pet_serializer.is_valid():
+                pet = pet_serializer.save(created_by=user, modified_by=user)
+                print(f"Pet created with image: {pet.image}")  # Debug log
+            else:
+                print("Pet serializer errors:", pet_serializer.errors)  # Debug logging
+                transaction.set_rollback(True)
+                return Response({"pet": pet_serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+            # Handle report image (use same image as pet for now)
+            if pet_image:
+                report_data['image'] = pet_image
+
+            # 2️⃣ Create PetReport
+            report_serializer = PetReportSerializer(data=report_data, context={"request": request})
+            if report_serializer.is_valid():
+                report = report_serializer.save(user=user, pet=pet, created_by=user, modified_by=user)
+                print(f"Report created with image: {report.image}")  # Debug log
             else:
-                return Response(
-                    {"medical_history": medical_serializer.errors},
-                    status=status.HTTP_400_BAD_REQUEST
+                transaction.set_rollback(True)
+                return Response({"report": report_serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+            # 3️⃣ Create PetMedicalHistory (if vaccinated or diseased)
+            if pet.is_vaccinated or pet.is_diseased:
+                medical_serializer = PetMedicalHistorySerializer(
+                    data=medical_history_data,
+                    context={"request": request, "pet": pet}  # pass pet in context
                 )
+                if medical_serializer.is_valid():
+                    medical_serializer.save()  # pet and user are already in create() via context
+                else:
+                    transaction.set_rollback(True)
+                    return Response(
+                        {"medical_history": medical_serializer.errors},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
 
-        # 4️⃣ Create Notification for Admin
-         # 4️⃣ Create Notification for Admin
-        try:
-            admin_user = Profile.objects.get(is_superuser=True)
-        except Profile.DoesNotExist:
-            admin_user = None
-
-        # Create the notification and explicitly set the admin as the receiver
-        notification = Notification.objects.create(
-            sender=user,
-            receiver=admin_user, # 👈 SET THE RECEIVER
-            content=f"New lost pet reported: {pet.name}",
-            pet=pet,
-            report=report
-        )
+            # 4️⃣ Create Notification for every Admin
+            notifications = notify_admins(
+                sender=user,
+                content=f"New lost pet reported: {pet.name}",
+                pet=pet,
+                report=report
+            )
 
         return Response({
             "message": "Lost pet request submitted successfully",
             "pet_id": pet.id,
             "report_id": report.id,
-            "notification_id": notification.id
+            "image_status": report.image_status,
+            "notification_id": notifications[0].id if notifications else None
         }, status=status.HTTP_201_CREATED)
     
 
     def get(self, request):
         user = request.user  
 
+        try:
+            nearby = proximity_from_request(request)  # ?near=<pincode>&radius_km=<km>
+        except ProximityError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         # ✅ Step 2: filter Lost pets whose reports are Accepted
-        reports = PetReport.objects.filter(
+        reports = report_listing_queryset(
             pet_status="Lost",
             report_status="Accepted"
         )
+        reports = filter_near(reports, nearby)
 
-        data = []
-        for report in reports:
-            pet_obj = report.pet
-            
-            # 💡 Fetch Medical History
-            medical_history = PetMedicalHistory.objects.filter(pet=pet_obj).first()
-            
-            # Map medical fields, defaulting to None if no history exists
-            medical_data = {
-                "last_vaccinated_date": medical_history.last_vaccinated_date.isoformat() if medical_history and medical_history.last_vaccinated_date else None,
-                "vaccination_name": medical_history.vaccination_name if medical_history else None,
-                "disease_name": medical_history.disease_name if medical_history else None,
-                "stage": medical_history.stage if medical_history else None,
-                "no_of_years": medical_history.no_of_years if medical_history else None,
-            }
-            
-            data.append({
-                "report_id": report.id,
-                "report_status": report.report_status,
-                "pet_status": report.pet_status,
-                "image": report.image.url if report.image else None,
-                "pet": {
-                    "id": pet_obj.id,
-                    "name": pet_obj.name,
-                    "pet_type": str(pet_obj.pet_type) if pet_obj.pet_type else None,
-                    "breed": pet_obj.breed,
-                    "age": pet_obj.age,
-                    "description": pet_obj.description,
-                    "color": pet_obj.color,
-                    "address": pet_obj.address, 
-                    "city": pet_obj.city,
-                    "state": pet_obj.state,
-                    "gender": pet_obj.gender,
-                    "is_diseased": pet_obj.is_diseased,
-                    "is_vaccinated": pet_obj.is_vaccinated,
-                    # ✅ EMBED MEDICAL DATA
-                    "medical_history": medical_data,
-                }
-            })
+        data = build_report_listing(reports, include_created_date=False, distances=nearby, image_size=parse_size(request.query_params.get("image_size")))
 
         return Response({"lost_pets": data}, status=status.HTTP_200_OK)
 
@@ -669,9 +769,17 @@ class AdminNotificationsAPIView(APIView):
 
         # Filter for notifications where the receiver is the current superuser
         notifications = Notification.objects.filter(receiver=user).order_by("-created_at")
+
+        context = {"read_watermark": get_read_watermark(user.id)}
+
+        paginator = KeysetCursorPagination(ordering=("-created_at", "-id"))
+        page = paginator.paginate_queryset(notifications, request)
+        if page is not None:
+            serializer = NotificationSerializer(page, many=True, context=context)
+            return paginator.get_paginated_response(serializer.data, key="notifications")
         
         # Use the serializer to handle the data conversion automatically
-        serializer = NotificationSerializer(notifications, many=True)
+        serializer = NotificationSerializer(notifications, many=True, context=context)
         
         return Response({"notifications": serializer.data}, status=status.HTTP_200_OK)
     
@@ -690,21 +798,43 @@ class PetsListAPIView(APIView):
         data = []
 
         if tab.lower() == "lost":
-            reports = PetReport.objects.filter(pet_status="Lost", report_status="Accepted")
-            data = PetReportSerializer(reports, many=True, context={"request": request}).data
+            queryset = PetReport.objects.filter(pet_status="Lost", report_status="Accepted")
+            serializer_class = PetReportSerializer
+            timestamps = REPORT_TIMESTAMPS + ("pet__modified_date",)
 
         elif tab.lower() == "found":
-            reports = PetReport.objects.filter(pet_status="Found", report_status="Accepted")
-            data = PetReportSerializer(reports, many=True, context={"request": request}).data
+            queryset = PetReport.objects.filter(pet_status="Found", report_status="Accepted")
+            serializer_class = PetReportSerializer
+            timestamps = REPORT_TIMESTAMPS + ("pet__modified_date",)
 
         elif tab.lower() == "adopt":
-            adoptions = PetAdoption.objects.filter(status="Approved")
-            data = PetAdoptionListSerializer(adoptions, many=True, context={"request": request}).data
+            queryset = PetAdoption.objects.filter(status="Approved")
+            serializer_class = PetAdoptionListSerializer
+            timestamps = ("modified_date", "requestor__updated_at") + nested("pet", PET_TIMESTAMPS)
 
         else:
             return Response({"error": "Invalid tab value"}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response({"results": data}, status=status.HTTP_200_OK)
+        try:
+            nearby = proximity_from_request(request)  # ?near=<pincode>&radius_km=<km>
+        except ProximityError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = filter_near(queryset, nearby)
+
+        validators = ListingValidators(request, [(queryset, timestamps)], extra=[nearby and sorted(nearby)])
+        not_modified = validators.not_modified()
+        if not_modified is not None:
+            return not_modified
+
+        paginator = KeysetCursorPagination(ordering=("-created_date", "-id"))
+        page = paginator.paginate_queryset(queryset, request)
+        if page is not None:
+            data = serializer_class(page, many=True, context={"request": request}).data
+            return validators.apply(paginator.get_paginated_response(data))
+
+        data = serializer_class(queryset, many=True, context={"request": request}).data
+        return validators.apply(Response({"results": data}, status=status.HTTP_200_OK))
 
 
 # -------------------------
@@ -786,8 +916,31 @@ class UserNotificationsAPIView(APIView):
         # Get all notifications for this user, order by latest
         notifications = Notification.objects.filter(receiver=user).order_by('-created_at')
 
-        serializer = NotificationSerializer(notifications, many=True, context={"request": request})
-        return Response({"notifications": serializer.data}, status=status.HTTP_200_OK)
+        context = {"request": request, "read_watermark": get_read_watermark(user.id)}
+
+        validators = ListingValidators(
+            request,
+            [(
+                notifications,
+                ("created_at", "sender__updated_at") + nested("report", REPORT_TIMESTAMPS) + nested("pet", PET_TIMESTAMPS),
+                {"read": Count("pk", distinct=True, filter=Q(is_read=True))},
+            )],
+            extra=[context["read_watermark"], user.updated_at.isoformat()],
+            # Marking notifications read moves no timestamp: ETag only
+            last_modified=False,
+        )
+        not_modified = validators.not_modified()
+        if not_modified is not None:
+            return not_modified
+
+        paginator = KeysetCursorPagination(ordering=("-created_at", "-id"))
+        page = paginator.paginate_queryset(notifications, request)
+        if page is not None:
+            serializer = NotificationSerializer(page, many=True, context=context)
+            return validators.apply(paginator.get_paginated_response(serializer.data, key="notifications"))
+
+        serializer = NotificationSerializer(notifications, many=True, context=context)
+        return validators.apply(Response({"notifications": serializer.data}, status=status.HTTP_200_OK))
 
 
 
@@ -844,6 +997,12 @@ class AdminUserListView(APIView):
                 qs = qs.filter(is_superuser=False)
             # otherwise ignore invalid values
 
+        paginator = KeysetCursorPagination(ordering=("-created_at", "-id"))
+        page = paginator.paginate_queryset(qs, request)
+        if page is not None:
+            serializer = AdminUserSerializer(page, many=True, context={"request": request})
+            return paginator.get_paginated_response(serializer.data)
+
         serializer = AdminUserSerializer(qs, many=True, context={"request": request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -907,6 +1066,10 @@ class AdminChangePasswordView(APIView):
     
 
 
+# AdminPetReportSerializer renders the report, its user and the nested pet
+ADMIN_REPORT_TIMESTAMPS = REPORT_TIMESTAMPS + ("user__updated_at",) + nested("pet", PET_TIMESTAMPS)
+
+
 class AdminPetReportsAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -915,8 +1078,20 @@ class AdminPetReportsAPIView(APIView):
             return Response({"detail": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
 
         reports = PetReport.objects.all().order_by("-created_date")
+
+        validators = ListingValidators(request, [(reports, ADMIN_REPORT_TIMESTAMPS)])
+        not_modified = validators.not_modified()
+        if not_modified is not None:
+            return not_modified
+
+        paginator = KeysetCursorPagination()
+        page = paginator.paginate_queryset(reports, request)
+        if page is not None:
+            serializer = AdminPetReportSerializer(page, many=True)
+            return validators.apply(paginator.get_paginated_response(serializer.data))
+
         serializer = AdminPetReportSerializer(reports, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return validators.apply(Response(serializer.data, status=status.HTTP_200_OK))
 
 
 class AdminPetReportDetailAPIView(APIView):
@@ -955,6 +1130,66 @@ class AdminPetReportDetailAPIView(APIView):
         return Response({"message": "Report deleted successfully"}, status=status.HTTP_200_OK)
     
 
+# -------------------------
+# Admin: lost/found match suggestions
+# -------------------------
+class AdminPetMatchesAPIView(APIView):
+    """
+    Ranked lost/found match suggestions (best score first).
+    GET /api/admin/matches/?status=Suggested[&report_id=<id>][&cursor=...]
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not request.user.is_superuser:
+            return Response({"detail": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
+
+        match_status = request.query_params.get("status", "Suggested")
+        if match_status not in dict(PetMatch.STATUS_CHOICES):
+            return Response({"error": "Invalid status"}, status=status.HTTP_400_BAD_REQUEST)
+
+        matches = PetMatch.objects.filter(status=match_status).select_related(
+            "lost_report__pet__pet_type", "lost_report__user",
+            "found_report__pet__pet_type", "found_report__user",
+        ).order_by("-score", "-id")
+
+        report_id = request.query_params.get("report_id")
+        if report_id:
+            if not report_id.isdigit():
+                return Response({"error": "report_id must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+            matches = matches.filter(Q(lost_report_id=report_id) | Q(found_report_id=report_id))
+
+        paginator = KeysetCursorPagination(ordering=("-score", "-id"))
+        page = paginator.paginate_queryset(matches, request)
+        if page is not None:
+            serializer = PetMatchSerializer(page, many=True, context={"request": request})
+            return paginator.get_paginated_response(serializer.data)
+
+        serializer = PetMatchSerializer(matches, many=True, context={"request": request})
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class AdminPetMatchDetailAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def patch(self, request, match_id):
+        if not request.user.is_superuser:
+            return Response({"detail": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            match = PetMatch.objects.get(id=match_id)
+        except PetMatch.DoesNotExist:
+            return Response({"detail": "Match not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        new_status = request.data.get("status")  # "Confirmed" or "Dismissed"
+        if new_status not in dict(PetMatch.STATUS_CHOICES):
+            return Response({"detail": "Invalid status"}, status=status.HTTP_400_BAD_REQUEST)
+
+        match.status = new_status
+        match.save(update_fields=["status", "updated_at"])
+        return Response({"message": f"Match marked as {new_status}"}, status=status.HTTP_200_OK)
+
+
 class AdminUnreadNotificationCountAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -962,10 +1197,33 @@ class AdminUnreadNotificationCountAPIView(APIView):
         if not request.user.is_superuser:
             return Response({"detail": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
         
-        # Filter for notifications where the receiver is the current superuser
-        unread_count = Notification.objects.filter(is_read=False, receiver=request.user).count()
-        
-        return Response({"unread_count": unread_count}, status=status.HTTP_200_OK)
+        # Cached counter for notifications where the receiver is the current superuser
+        return Response({"unread_count": unread_count(request.user)}, status=status.HTTP_200_OK)
+
+
+class AdminChatbotStatsAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not request.user.is_superuser:
+            return Response({"detail": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
+
+        # Fast-path answers, answer cache hits/misses and hit rates (all workers), plus
+        # breaker state and model latency histograms (the worker serving this request)
+        return Response({**chatbot.metrics(), "model": chatbot.client().stats()}, status=status.HTTP_200_OK)
+
+
+class AdminCacheStatsAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not request.user.is_superuser:
+            return Response({"detail": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
+
+        # Hit/miss counters of the two-tier cache, for the worker serving this request
+        if not hasattr(cache, "stats"):
+            return Response({"error": "The configured cache does not report stats."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(cache.stats(), status=status.HTTP_200_OK)
     
 class AdminLostPetRequestsAPIView(APIView):
     permission_classes = [IsAuthenticated]
@@ -981,10 +1239,22 @@ class AdminLostPetRequestsAPIView(APIView):
         # ✅ Use the detailed AdminPetReportSerializer for a consistent response
         # This ensures all necessary data (user, pet details, dates) is included.
         reports = PetReport.objects.filter(pet_status="Lost").select_related("pet", "user").order_by("-created_date")
+
+        validators = ListingValidators(request, [(reports, ADMIN_REPORT_TIMESTAMPS)])
+        not_modified = validators.not_modified()
+        if not_modified is not None:
+            return not_modified
+
+        paginator = KeysetCursorPagination()
+        page = paginator.paginate_queryset(reports, request)
+        if page is not None:
+            serializer = AdminPetReportSerializer(page, many=True, context={'request': request})
+            return validators.apply(paginator.get_paginated_response(serializer.data))
+
         serializer = AdminPetReportSerializer(reports, many=True, context={'request': request})
         
         # ✅ Return the serialized data directly as an array
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return validators.apply(Response(serializer.data, status=status.HTTP_200_OK))
 
 
 class AdminFoundPetRequestsAPIView(APIView):
@@ -1000,9 +1270,21 @@ class AdminFoundPetRequestsAPIView(APIView):
 
         # Use the same detailed serializer, but filter for "Found" status
         reports = PetReport.objects.filter(pet_status="Found").select_related("pet", "user").order_by("-created_date")
+
+        validators = ListingValidators(request, [(reports, ADMIN_REPORT_TIMESTAMPS)])
+        not_modified = validators.not_modified()
+        if not_modified is not None:
+            return not_modified
+
+        paginator = KeysetCursorPagination()
+        page = paginator.paginate_queryset(reports, request)
+        if page is not None:
+            serializer = AdminPetReportSerializer(page, many=True, context={'request': request})
+            return validators.apply(paginator.get_paginated_response(serializer.data))
+
         serializer = AdminPetReportSerializer(reports, many=True, context={'request': request})
         
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return validators.apply(Response(serializer.data, status=status.HTTP_200_OK))
 
 
 class AdminManageReportStatusAPIView(APIView):
@@ -1046,49 +1328,19 @@ class FoundPetRequestAPIView(APIView): # Inheriting from APIView for public read
     permission_classes = [IsAuthenticated] # Assuming users must be logged in to view
 
     def get(self, request):
+        try:
+            nearby = proximity_from_request(request)  # ?near=<pincode>&radius_km=<km>
+        except ProximityError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         # 1. Filter Accepted 'Found' reports
-        reports = PetReport.objects.filter(
+        reports = report_listing_queryset(
             pet_status="Found",
             report_status="Accepted"
         )
+        reports = filter_near(reports, nearby)
 
-        data = []
-        for report in reports:
-            pet_obj = report.pet
-            medical_history = PetMedicalHistory.objects.filter(pet=pet_obj).first()
-            
-            medical_data = {
-                "last_vaccinated_date": medical_history.last_vaccinated_date.isoformat() if medical_history and medical_history.last_vaccinated_date else None,
-                "vaccination_name": medical_history.vaccination_name if medical_history else None,
-                "disease_name": medical_history.disease_name if medical_history else None,
-                "stage": medical_history.stage if medical_history else None,
-                "no_of_years": medical_history.no_of_years if medical_history else None,
-            }
-            
-            data.append({
-                "report_id": report.id,
-                "report_status": report.report_status,
-                "pet_status": report.pet_status,
-                "image": report.image.url if report.image else None,
-                "created_date": report.created_date.isoformat(),
-                "pet": {
-                    "id": pet_obj.id,
-                    "name": pet_obj.name,
-                    "pet_type": str(pet_obj.pet_type) if pet_obj.pet_type else None,
-                    "breed": pet_obj.breed,
-                    "age": pet_obj.age,
-                    "color": pet_obj.color,
-                    "address": pet_obj.address, 
-                    "description": pet_obj.description,
-                    "city": pet_obj.city,
-                    "state": pet_obj.state,
-                    "pincode": pet_obj.pincode, # Added pincode
-                    "gender": pet_obj.gender,
-                    "is_diseased": pet_obj.is_diseased,
-                    "is_vaccinated": pet_obj.is_vaccinated,
-                    "medical_history": medical_data,
-                }
-            })
+        data = build_report_listing(reports, include_pincode=True, distances=nearby, image_size=parse_size(request.query_params.get("image_size")))
         return Response({"found_pets": data}, status=status.HTTP_200_OK)
     
 
@@ -1101,49 +1353,13 @@ class UserLostPetsAPIView(APIView):
 
     def get(self, request):
         # Filter PetReport objects by the current user and where the pet status is 'Lost'
-        reports = PetReport.objects.filter(
+        reports = report_listing_queryset(
         user=request.user,          # ✅ Filters for the currently logged-in user
         pet_status="Lost",          # ✅ Filters for reports where the pet is 'Lost'
         report_status="Accepted"    # ✅ Filters for reports that have been 'Accepted'
         ).order_by("-created_date")
 
-        data = []
-        for report in reports:
-            pet_obj = report.pet
-            medical_history = PetMedicalHistory.objects.filter(pet=pet_obj).first()
-            
-            medical_data = {
-                "last_vaccinated_date": medical_history.last_vaccinated_date.isoformat() if medical_history and medical_history.last_vaccinated_date else None,
-                "vaccination_name": medical_history.vaccination_name if medical_history else None,
-                "disease_name": medical_history.disease_name if medical_history else None,
-                "stage": medical_history.stage if medical_history else None,
-                "no_of_years": medical_history.no_of_years if medical_history else None,
-            }
-            
-            data.append({
-                "report_id": report.id,
-                "report_status": report.report_status,
-                "pet_status": report.pet_status,
-                "image": report.image.url if report.image else None,
-                "created_date": report.created_date.isoformat(),
-                "pet": {
-                    "id": pet_obj.id,
-                    "name": pet_obj.name,
-                    "pet_type": str(pet_obj.pet_type) if pet_obj.pet_type else None,
-                    "breed": pet_obj.breed,
-                    "age": pet_obj.age,
-                    "description": pet_obj.description,
-                    "color": pet_obj.color,
-                    "address": pet_obj.address, 
-                    "city": pet_obj.city,
-                    "state": pet_obj.state,
-                    "gender": pet_obj.gender,
-                    "is_diseased": pet_obj.is_diseased,
-                    "is_vaccinated": pet_obj.is_vaccinated,
-                    "medical_history": medical_data,
-                    
-                }
-            })
+        data = build_report_listing(reports, image_size=parse_size(request.query_params.get("image_size")))
 
         # Use the same response structure as the other endpoint
         return Response({"lost_pets": data}, status=status.HTTP_200_OK)
@@ -1157,45 +1373,10 @@ class UserFoundPetsAPIView(APIView):
 
     def get(self, request):
         # Filter reports by the current user and for 'Found' pets
-        reports = PetReport.objects.filter(user=request.user, pet_status="Found", report_status="Accepted").order_by("-created_date")
+        reports = report_listing_queryset(user=request.user, pet_status="Found", report_status="Accepted").order_by("-created_date")
+
+        data = build_report_listing(reports, image_size=parse_size(request.query_params.get("image_size")))
 
-        data = []
-        for report in reports:
-            pet_obj = report.pet
-            medical_history = PetMedicalHistory.objects.filter(pet=pet_obj).first()
-            
-            medical_data = {
-                "last_vaccinated_date": medical_history.last_vaccinated_date.isoformat() if medical_history and medical_history.last_vaccinated_date else None,
-                "vaccination_name": medical_history.vaccination_name if medical_history else None,
-                "disease_name": medical_history.disease_name if medical_history else None,
-                "stage": medical_history.stage if medical_history else None,
-                "no_of_years": medical_history.no_of_years if medical_history else None,
-            }
-            
-            data.append({
-                "report_id": report.id,
-                "report_status": report.report_status,
-                "pet_status": report.pet_status,
-                "image": report.image.url if report.image else None,
-                "created_date": report.created_date.isoformat(),
-                "pet": {
-                    "id": pet_obj.id,
-                    "name": pet_obj.name,
-                    "pet_type": str(pet_obj.pet_type) if pet_obj.pet_type else None,
-                    "breed": pet_obj.breed,
-                    "age": pet_obj.age,
-                    "description": pet_obj.description,
-                    "color": pet_obj.color,
-                    "address": pet_obj.address, 
-                    "city": pet_obj.city,
-                    "state": pet_obj.state,
-                    "gender": pet_obj.gender,
-                    "is_diseased": pet_obj.is_diseased,
-                    "is_vaccinated": pet_obj.is_vaccinated,
-                    "medical_history": medical_data,
-                }
-            })
-        
         # We'll use the same response key 'found_pets' for consistency
         return Response({"found_pets": data}, status=status.HTTP_200_OK)
     
@@ -1203,8 +1384,18 @@ class AdoptionPetsView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
+        return response_cache.respond(request, "adoption-pets", [PetAdoption, Pet, PetReport], lambda: (None, self.build(request)))
+
+    def build(self, request):
         # Fetch all PetAdoption entries (you can filter by status if needed)
         adoption_requests = PetAdoption.objects.all()
+
+        paginator = KeysetCursorPagination()
+        page = paginator.paginate_queryset(adoption_requests, request)
+        if page is not None:
+            serializer = PetAdoptionSerializer(page, many=True, context={"request": request})
+            return paginator.get_paginated_response(serializer.data)
+
         serializer = PetAdoptionSerializer(adoption_requests, many=True, context={"request": request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -1224,55 +1415,24 @@ class AdoptablePetsAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
+        try:
+            nearby = proximity_from_request(request)  # ?near=<pincode>&radius_km=<km>
+        except ProximityError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         # time_cutoff = timezone.now() - timedelta(days=30) 
         time_cutoff = timezone.now() - timedelta(minutes=1)  # For testing, set to 1 minute
         # 2. Filter Pet Reports based on the adoption criteria
-        reports = PetReport.objects.filter(
+        reports = report_listing_queryset(
             pet_status="Found",          # Must be a found pet
             report_status="Accepted",    # The report must have been accepted by an admin
             modified_date__lte=time_cutoff  # Accepted more than 30 days ago
         ).order_by("-created_date")
+        reports = filter_near(reports, nearby)
 
         # 3. Serialize the data in the same format as your other pet list endpoints
-        data = []
-        for report in reports:
-            pet_obj = report.pet
-            medical_history = PetMedicalHistory.objects.filter(pet=pet_obj).first()
-            
-            medical_data = {
-                "last_vaccinated_date": medical_history.last_vaccinated_date.isoformat() if medical_history and medical_history.last_vaccinated_date else None,
-                "vaccination_name": medical_history.vaccination_name if medical_history else None,
-                "disease_name": medical_history.disease_name if medical_history else None,
-                "stage": medical_history.stage if medical_history else None,
-                "no_of_years": medical_history.no_of_years if medical_history else None,
-            }
-            
-            data.append({
-                "report_id": report.id,
-                "report_status": report.report_status,
-                "pet_status": report.pet_status,
-                "image": report.image.url if report.image else None,
-                "created_date": report.created_date.isoformat(),
-                "pet": {
-                    "id": pet_obj.id,
-                    "name": pet_obj.name,
-                    "pet_type": str(pet_obj.pet_type) if pet_obj.pet_type else None,
-                    "breed": pet_obj.breed,
-                    "age": pet_obj.age,
-                    "color": pet_obj.color,
-                    "address": pet_obj.address, 
-                    "description": pet_obj.description,
-                    "city": pet_obj.city,
-                    "state": pet_obj.state,
-                    "pincode": pet_obj.pincode,
-                    "gender": pet_obj.gender,
-                    "is_diseased": pet_obj.is_diseased,
-                    "is_vaccinated": pet_obj.is_vaccinated,
-                    "medical_history": medical_data,
-                }
-            })
-            
+        data = build_report_listing(reports, include_pincode=True, distances=nearby, image_size=parse_size(request.query_params.get("image_size")))
+
         # Use a new key 'adoptable_pets' for clarity on the frontend
         return Response({"adoptable_pets": data}, status=status.HTTP_200_OK)
 
@@ -1286,18 +1446,68 @@ class RecentPetsAPIView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
+        # Cached (validators included) until a pet or report changes
+        return response_cache.respond(request, "recent-pets", [Pet, PetReport], lambda: self.build(request))
+
+    def build(self, request):
+        # PetSerializer falls back to the latest report photo, so reports count too
+        validators = ListingValidators(request, [
+            (Pet.objects.all(), PET_TIMESTAMPS),
+            (PetReport.objects.all(), REPORT_TIMESTAMPS),
+        ], per_user=False)
+
         pets = Pet.objects.all().order_by('-created_date')[:10]
         serializer = PetSerializer(pets, many=True, context={"request": request})
-        return Response({
+        return validators, Response({
             "recent_pets": serializer.data
         }, status=status.HTTP_200_OK)
 
 
+# -------------------------
+# Pet full-text search
+# -------------------------
+class PetSearchAPIView(APIView):
+    """
+    Ranked full-text search over pet name, breed, color, location and description.
+    GET /api/pets/search/?q=brown labrador pune[&cursor=...][&page_size=...]
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response({"error": "Search query 'q' is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Best match first; ties broken by newest pet id
+        paginator = KeysetCursorPagination(ordering=("-rank", "-id"), optional=False)
+        page_size = paginator.get_page_size(request)
+        position = paginator.get_position(request, Pet)
 
+        pets = paginator.finish_page(request, search_pets(query, position, limit=page_size + 1), page_size)
+        data = PetSerializer(pets, many=True, context={"request": request}).data
+        for item, pet in zip(data, pets):
+            item["rank"] = pet.rank
+        return paginator.get_paginated_response(data)
 
 
+# -------------------------
+# Resized media: /media/r/<w>x<h>/<path>
+# -------------------------
+@require_safe
+def resized_media(request, width, height, path):
+    """
+    Serve a downscaled WebP/JPEG variant of an upload from the disk cache.
+    Only the sizes in IMAGE_VARIANT_SIZES are accepted.
+    """
+    try:
+        handle, content_type = open_variant(path, (int(width), int(height)), preferred_format(request))
+    except VariantError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
 
-# Points configuration
+    response = FileResponse(handle, content_type=content_type)
+    response["Cache-Control"] = f"public, max-age={getattr(settings, 'IMAGE_VARIANT_MAX_AGE', 86400)}"
+    response["Vary"] = "Accept"  # WebP or JPEG depending on the client
+    return response
 
 
 # -------------------------
@@ -1305,71 +1515,14 @@ class RecentPetsAPIView(APIView):
 # -------------------------
 class MyRewardView(APIView):
     permission_classes = [permissions.IsAuthenticated]
-    RESCUER_POINTS = 100
-    ADOPTER_POINTS = 50
-
-    @staticmethod
-    def calculate_user_rewards(user):
-        reasons = []
-
-        # Rescuer points: only for reports that are "Accepted" and pet_status is "Found"
-        accepted_found_reports = PetReport.objects.filter(user=user, report_status="Accepted", pet_status="Found")
-        rescuer_points = accepted_found_reports.count() * MyRewardView.RESCUER_POINTS
-        if accepted_found_reports.count() > 0:
-            reasons.append(f"Rescued {accepted_found_reports.count()} pets")
-
-        # Adopter points: all approved adoptions
-        approved_adoptions = PetAdoption.objects.filter(requestor=user, status="Approved")
-        adopter_points = approved_adoptions.count() * MyRewardView.ADOPTER_POINTS
-        if approved_adoptions.count() > 0:
-            reasons.append(f"Approved {approved_adoptions.count()} adoptions")
-
-        total_points = rescuer_points + adopter_points
-        reason_text = "; ".join(reasons) if reasons else "No points yet"
-
-        # Get or create reward object
-        reward_obj, created = RewardPoint.objects.get_or_create(user=user)
-        reward_obj.points = total_points
-        reward_obj.reason = reason_text
-        reward_obj.update_badge()  # make sure this exists in RewardPoint model
-        reward_obj.save()
-        return reward_obj
 
     def get(self, request):
-        user = request.user
-        reward_obj = MyRewardView.calculate_user_rewards(user)
+        # Totals are maintained by the reward ledger (see rewards.py); this is a pure read
+        reward_obj = get_reward(request.user)
         serializer = RewardPointSerializer(reward_obj)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-# utils.py or at the top of views.py
-def calculate_user_rewards(user):
-    RESCUER_POINTS = 100
-    ADOPTER_POINTS = 50
-    reasons = []
-
-    # Rescuer points: only for reports that are "Accepted" and pet_status is "Found"
-    accepted_found_reports = PetReport.objects.filter(user=user, report_status="Accepted", pet_status="Found")
-    rescuer_points = accepted_found_reports.count() * RESCUER_POINTS
-    if accepted_found_reports.count() > 0:
-        reasons.append(f"Rescued {accepted_found_reports.count()} pets")
-
-    # Adopter points: all approved adoptions
-    approved_adoptions = PetAdoption.objects.filter(requestor=user, status="Approved")
-    adopter_points = approved_adoptions.count() * ADOPTER_POINTS
-    if approved_adoptions.count() > 0:
-        reasons.append(f"Approved {approved_adoptions.count()} adoptions")
-
-    total_points = rescuer_points + adopter_points
-    reason_text = "; ".join(reasons) if reasons else "No points yet"
-
-    reward_obj, created = RewardPoint.objects.get_or_create(user=user)
-    reward_obj.points = total_points
-    reward_obj.reason = reason_text
-    reward_obj.update_badge()
-    reward_obj.save()
-    return reward_obj
-
 class AllRewardsView(APIView):
     permission_classes = [permissions.IsAdminUser]
 
@@ -1381,52 +1534,103 @@ class AllRewardsView(APIView):
         max_points = request.query_params.get("max_points")
         ordering = request.query_params.get("ordering")  # "points" or "-points"
 
-        users = Profile.objects.all()
-        rewards_list = []
-
-        # Calculate rewards for each user
-        for user in users:
-            reward_obj = calculate_user_rewards(user)
-            rewards_list.append(reward_obj)
+        # One query over RewardPoint joined to Profile, only the columns the serializer reads
+        rewards_qs = RewardPoint.objects.select_related("user").only(
+            "user", "points", "badge", "reason", "user__username", "user__email"
+        )
 
         # Search by username/email
         if search:
-            rewards_list = [
-                r for r in rewards_list
-                if (r.user.username and search.lower() in r.user.username.lower())
-                or (r.user.email and search.lower() in r.user.email.lower())
-            ]
+            rewards_qs = rewards_qs.filter(Q(user__username__icontains=search) | Q(user__email__icontains=search))
 
-        # Filter by badge
+        # Filter by badge (badges are stored with their canonical name, so match exactly)
         if badge:
-            rewards_list = [r for r in rewards_list if r.badge and r.badge.lower() == badge.lower()]
+            badge_names = {name.lower(): name for name, _ in RewardPoint.BADGES}
+            rewards_qs = rewards_qs.filter(badge=badge_names.get(badge.lower(), badge))
 
         # Filter by points range
-        if min_points:
-            rewards_list = [r for r in rewards_list if r.points >= int(min_points)]
-        if max_points:
-            rewards_list = [r for r in rewards_list if r.points <= int(max_points)]
-
-        # Ordering
-        if ordering:
-            reverse = ordering.startswith("-")
-            field = ordering.lstrip("-")
-            if field == "points":
-                rewards_list.sort(key=lambda r: r.points, reverse=reverse)
+        try:
+            if min_points:
+                rewards_qs = rewards_qs.filter(points__gte=int(min_points))
+            if max_points:
+                rewards_qs = rewards_qs.filter(points__lte=int(max_points))
+        except ValueError:
+            return Response({"error": "min_points and max_points must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Ordering (served by the points index)
+        if ordering == "points":
+            order_fields = ("points", "id")
+        elif ordering == "-points":
+            order_fields = ("-points", "-id")
+        else:
+            order_fields = ("id", "pk")
+        rewards_qs = rewards_qs.order_by(*order_fields)
+
+        paginator = KeysetCursorPagination(ordering=order_fields)
+        page = paginator.paginate_queryset(rewards_qs, request)
+        if page is not None:
+            serializer = RewardPointSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
 
         # Serialize and return
-        serializer = RewardPointSerializer(rewards_list, many=True)
+        serializer = RewardPointSerializer(rewards_qs, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+# -------------------------
+# API: Leaderboard
+# -------------------------
+class LeaderboardView(APIView):
+    """
+    Top K volunteers by reward points plus the caller's own standing.
+
+    GET /api/leaderboard/?k=10
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    DEFAULT_K = 10
+
+    def get(self, request):
+        try:
+            k = int(request.query_params.get("k", self.DEFAULT_K))
+        except ValueError:
+            return Response({"error": "k must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        k = max(1, min(k, LEADERBOARD_MAX_K))
+
+        reward_obj = get_reward(request.user)
+        next_badge = reward_obj.next_badge()
+
+        return Response({
+            "top": leaderboard_top(k),
+            "me": {
+                "rank": rank_for(reward_obj.points),
+                "points": reward_obj.points,
+                "badge": reward_obj.badge,
+                "next_badge": next_badge[0] if next_badge else None,
+                "points_to_next_badge": next_badge[1] - reward_obj.points if next_badge else 0,
+            },
+        }, status=status.HTTP_200_OK)
+
+
 class FeedbackStoryAPIView(APIView):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     parser_classes = [JSONParser,MultiPartParser, FormParser]
 
     def get(self, request, *args, **kwargs):
+        return response_cache.respond(request, "feedback-stories", [FeedbackStory], lambda: self.build(request))
+
+    def build(self, request):
         stories = FeedbackStory.objects.all().order_by("-submitted_at")
+
+        validators = ListingValidators(request, [(stories, ("submitted_at", "user__updated_at"))], per_user=False)
+
+        paginator = KeysetCursorPagination(ordering=("-submitted_at", "-id"))
+        page = paginator.paginate_queryset(stories, request)
+        if page is not None:
+            serializer = FeedbackStorySerializer(page, many=True, context={"request": request})
+            return validators, paginator.get_paginated_response(serializer.data)
+
         serializer = FeedbackStorySerializer(stories, many=True, context={"request": request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return validators, Response(serializer.data, status=status.HTTP_200_OK)
 
     def post(self, request, *args, **kwargs):
         serializer = FeedbackStorySerializer(data=request.data, context={"request": request})
@@ -1477,18 +1681,12 @@ class UserReportViewSet(viewsets.ModelViewSet):
             modified_by=requester
         )
 
-        # The rest of the notification logic remains the same
-        try:
-            admin_user = Profile.objects.filter(is_superuser=True).first()
-            if admin_user:
-                Notification.objects.create(
-                    sender=requester, # The notification is sent by the new requester
-                    receiver=admin_user,
-                    content=f"New '{user_report.report_type}' report from {requester.username} for pet '{user_report.pet_report.pet.name}'.",
-                    report=user_report.pet_report
-                )
-        except Profile.DoesNotExist:
-            pass # No admin user found
+        # Notify every admin with one bulk insert
+        notify_admins(
+            sender=requester, # The notification is sent by the new requester
+            content=f"New '{user_report.report_type}' report from {requester.username} for pet '{user_report.pet_report.pet.name}'.",
+            report=user_report.pet_report
+        )
 
     def update(self, request, *args, **kwargs):
         """
@@ -3,6 +3,10 @@ ASGI config for pet_rescue_pro project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the project with an ASGI server (e.g. ``uvicorn pet_rescue_pro.asgi:application``)
+so async views such as the streaming chatbot (/api/chatbot/stream/) wait on the
+model without holding a worker thread.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
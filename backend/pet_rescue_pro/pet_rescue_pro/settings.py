@@ -1,7 +1,6 @@
 from pathlib import Path 
 import os
 from dotenv import load_dotenv
-import google.generativeai as genai
 from datetime import timedelta
 import dj_database_url
 
@@ -18,10 +17,24 @@ DEBUG = os.getenv("DEBUG", "True") == "True"
 ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS", "").split(",")
 
 # ==== Gemini AI API ====
+# The client library is imported and configured on the first chatbot call (chatbot.gemini_model)
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=GEMINI_API_KEY)
+CHATBOT_MODEL = os.getenv("CHATBOT_MODEL", "gemini-2.5-flash")
+# Seconds for a whole chatbot answer, and model calls in flight per worker process
+CHATBOT_TIMEOUT = float(os.getenv("CHATBOT_TIMEOUT", "30"))
+CHATBOT_MAX_CONCURRENCY = int(os.getenv("CHATBOT_MAX_CONCURRENCY", "8"))
+# Circuit breaker: fail fast for CHATBOT_BREAKER_RESET seconds after this many consecutive model failures
+CHATBOT_BREAKER_FAILURES = int(os.getenv("CHATBOT_BREAKER_FAILURES", "5"))
+CHATBOT_BREAKER_RESET = float(os.getenv("CHATBOT_BREAKER_RESET", "30"))
+# Answers to repeated (section, question) pairs are reused for this long
+CHATBOT_ANSWER_CACHE_TIMEOUT = int(os.getenv("CHATBOT_ANSWER_CACHE_TIMEOUT", "86400"))
 
 # ==== Applications ====
+# "production" leaves out development-only apps (API docs, shell_plus & co), so
+# workers and manage.py commands do not import them at startup
+APP_PROFILE = os.getenv("APP_PROFILE", "development")
+DEV_ONLY_APPS = ["drf_yasg", "django_extensions"]
+
 INSTALLED_APPS = [
     'django.contrib.admin',
     'django.contrib.auth',
@@ -34,12 +47,12 @@ INSTALLED_APPS = [
     "corsheaders",
     "rest_framework",
     "rest_framework_simplejwt",
-    "drf_yasg",
-    'django_extensions',
 
     # local apps
     "pet_rescue_app",
 ]
+if APP_PROFILE != "production":
+    INSTALLED_APPS += DEV_ONLY_APPS
 
 # ==== Middleware ====
 MIDDLEWARE = [
@@ -116,9 +129,73 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Uploads are stored once per content hash under media/blobs/ (see pet_rescue_app/storage.py)
+STORAGES = {
+    "default": {"BACKEND": "pet_rescue_app.storage.ContentAddressedStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+# Orphaned uploads are moved here by `manage.py collect_media_garbage` (outside MEDIA_ROOT, so never served)
+MEDIA_QUARANTINE_DIR = Path(os.getenv("MEDIA_QUARANTINE_DIR", BASE_DIR / "media_quarantine"))
+
+# Resized image variants served from /media/r/<w>x<h>/<path> (see pet_rescue_app/image_variants.py)
+IMAGE_VARIANT_SIZES = os.getenv("IMAGE_VARIANT_SIZES", "200x200,400x400,800x800,1200x1200").split(",")
+IMAGE_VARIANT_CACHE_DIR = Path(os.getenv("IMAGE_VARIANT_CACHE_DIR", MEDIA_ROOT / ".variants"))
+IMAGE_VARIANT_CACHE_MAX_BYTES = int(os.getenv("IMAGE_VARIANT_CACHE_MAX_MB", "512")) * 1024 * 1024
+IMAGE_VARIANT_MAX_AGE = int(os.getenv("IMAGE_VARIANT_MAX_AGE", "86400"))
+
+# Background photo processing (`manage.py process_images`)
+IMAGE_PREGENERATE_SIZES = os.getenv("IMAGE_PREGENERATE_SIZES", "200x200,400x400").split(",")
+IMAGE_JOB_MAX_ATTEMPTS = int(os.getenv("IMAGE_JOB_MAX_ATTEMPTS", "5"))
+IMAGE_JOB_TIMEOUT = int(os.getenv("IMAGE_JOB_TIMEOUT", "600"))
+
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# ==== Cache ====
+# Per-process LRU in front of a tier every worker and node shares (OTPs, counters,
+# cached responses). Shared tier: Redis when REDIS_URL is set, the database with
+# SHARED_CACHE=db (run `manage.py createcachetable`), else a file cache (one host).
+# Use Redis once more than one process serves requests: the unread counters and the
+# recompute lock rely on incr() and add() being atomic across processes. Redis
+# gives both; the database cache only add(); the file cache neither, so there
+# counters drift (until reconcile_notification_counts) and cache misses are not
+# reliably collapsed.
+# Tests use pet_rescue_pro.test_settings (an in-process cache).
+if os.getenv("REDIS_URL"):
+    SHARED_CACHE = {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": os.getenv("REDIS_URL")}
+elif os.getenv("SHARED_CACHE") == "db":
+    SHARED_CACHE = {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "pet_rescue_cache"}
+else:
+    SHARED_CACHE = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("CACHE_DIR", str(BASE_DIR / "cache")),
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    }
+
+CACHES = {
+    "default": {
+        "BACKEND": "pet_rescue_app.cache_backends.TwoTierCache",
+        "OPTIONS": {
+            "SHARED_ALIAS": "shared",
+            "LOCAL_MAX_ENTRIES": int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", "1000")),
+            "LOCAL_TIMEOUT": float(os.getenv("LOCAL_CACHE_TIMEOUT", "5")),
+            # One-time codes must be consumed exactly once, across all workers
+            "LOCAL_EXCLUDE_PREFIXES": ["otp_"],
+        },
+    },
+    "shared": SHARED_CACHE,
+    # Chatbot answers to repeated questions: bounded LRU per process over the shared tier
+    "chatbot": {
+        "BACKEND": "pet_rescue_app.cache_backends.TwoTierCache",
+        "OPTIONS": {
+            "SHARED_ALIAS": "shared",
+            "LOCAL_MAX_ENTRIES": int(os.getenv("CHATBOT_ANSWER_CACHE_ENTRIES", "500")),
+            "LOCAL_TIMEOUT": float(os.getenv("CHATBOT_ANSWER_CACHE_TIMEOUT", "86400")),
+        },
+    },
+}
+
 # ==== Django REST Framework & JWT ====
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -129,6 +206,21 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Opt-in keyset pagination for list endpoints (?cursor= / ?page_size=)
+CURSOR_PAGE_SIZE = int(os.getenv("CURSOR_PAGE_SIZE", "20"))
+CURSOR_MAX_PAGE_SIZE = int(os.getenv("CURSOR_MAX_PAGE_SIZE", "100"))
+
+# Pincode proximity filter on listings (?near=<pincode>&radius_km=<km>)
+PROXIMITY_DEFAULT_RADIUS_KM = float(os.getenv("PROXIMITY_DEFAULT_RADIUS_KM", "10"))
+PROXIMITY_MAX_RADIUS_KM = float(os.getenv("PROXIMITY_MAX_RADIUS_KM", "100"))
+
+# Public listing responses (recent pets, stories, adoptions, pet types) cached until a write, at most this long
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", "300"))
+
+# Lost/found matching: minimum stored score (0-100) and neighbour-region radius
+MATCH_MIN_SCORE = float(os.getenv("MATCH_MIN_SCORE", "40"))
+MATCH_RADIUS_KM = float(os.getenv("MATCH_RADIUS_KM", "15"))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -141,7 +233,11 @@ ADMINS = [('Admin', 'gopim2565@gmail.com')]
 AUTH_USER_MODEL = 'pet_rescue_app.Profile'
 
 # ==== Email Settings ====
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+# Emails are queued in the outbox and sent by `manage.py send_queued_email`.
+# EMAIL_BACKEND=django.core.mail.backends.filebased.EmailBackend writes them to EMAIL_FILE_PATH instead.
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend")
+EMAIL_FILE_PATH = os.getenv("EMAIL_FILE_PATH", str(BASE_DIR / "sent_emails"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "5"))
 EMAIL_HOST = "smtp.gmail.com"
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
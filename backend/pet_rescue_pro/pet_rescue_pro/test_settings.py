@@ -0,0 +1,12 @@
+"""
+Settings for the test suite:
+
+    python manage.py test --settings=pet_rescue_pro.test_settings
+
+(or DJANGO_SETTINGS_MODULE=pet_rescue_pro.test_settings for other runners).
+"""
+from .settings import *  # noqa: F401,F403
+
+# Keep tests off the file/database/Redis tier a dev server may be using: every
+# test case clears the cache
+CACHES["shared"] = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "shared"}  # noqa: F405
@@ -1,31 +1,43 @@
 from django.contrib import admin
-from django.urls import path, include
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-from rest_framework import permissions
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Pet Rescue API",
-        default_version="v1",
-        description="Pet Rescue and adoption management",
-        terms_of_service="https://www.google.com/policies/terms/",
-        contact=openapi.Contact(email="contact@example.com"),
-        license=openapi.License(name="BSD License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+from pet_rescue_app.views import resized_media
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("pet_rescue_app.urls")),
-    path("docs/", schema_view.with_ui("swagger", cache_timeout=0), name="schema-swagger-ui"),
-    path("redoc/", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"),
+    # Resized image variants; must come before the plain media route below
+    re_path(
+        rf"^{settings.MEDIA_URL.strip('/')}/r/(?P<width>\d+)x(?P<height>\d+)/(?P<path>.+)$",
+        resized_media,
+        name="resized-media",
+    ),
 ]
 
+# API docs: drf_yasg is a development-only app (see APP_PROFILE in settings)
+if "drf_yasg" in settings.INSTALLED_APPS:
+    from drf_yasg.views import get_schema_view
+    from drf_yasg import openapi
+    from rest_framework import permissions
+
+    schema_view = get_schema_view(
+        openapi.Info(
+            title="Pet Rescue API",
+            default_version="v1",
+            description="Pet Rescue and adoption management",
+            terms_of_service="https://www.google.com/policies/terms/",
+            contact=openapi.Contact(email="contact@example.com"),
+            license=openapi.License(name="BSD License"),
+        ),
+        public=True,
+        permission_classes=(permissions.AllowAny,),
+    )
+    urlpatterns += [
+        path("docs/", schema_view.with_ui("swagger", cache_timeout=0), name="schema-swagger-ui"),
+        path("redoc/", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"),
+    ]
+
 # Serve media files during development
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)